@@ -0,0 +1,38 @@
+"""Table user_balances (solde maintenu par utilisateur)
+
+Revision ID: 0002_user_balances
+Revises: 0001_initial
+Create Date: 2025-11-10 10:00:00.000000
+
+Les lignes sont créées au premier accès à /stats/summary ; pour les remplir
+immédiatement : `python -m app.ledger rebuild`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_user_balances"
+down_revision: Union[str, Sequence[str], None] = "0001_initial"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_balances",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("total_income", sa.Float(), nullable=False),
+        sa.Column("total_expense", sa.Float(), nullable=False),
+        sa.Column("transaction_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_balances")
@@ -0,0 +1,31 @@
+"""Index composites sur transactions
+
+Revision ID: 0003_transaction_indexes
+Revises: 0002_user_balances
+Create Date: 2025-11-12 10:00:00.000000
+
+- (user_id, date, id) : liste et pagination par curseur
+- (user_id, category, date) : filtre par catégorie et agrégats
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_transaction_indexes"
+down_revision: Union[str, Sequence[str], None] = "0002_user_balances"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_transactions_user_date_id", "transactions", ["user_id", "date", "id"])
+    op.create_index("ix_transactions_user_category_date", "transactions", ["user_id", "category", "date"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_transactions_user_category_date", table_name="transactions")
+    op.drop_index("ix_transactions_user_date_id", table_name="transactions")
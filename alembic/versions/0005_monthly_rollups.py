@@ -0,0 +1,70 @@
+"""Table monthly_rollups (totaux par utilisateur, mois et catégorie)
+
+Revision ID: 0005_monthly_rollups
+Revises: 0004_user_token_version
+Create Date: 2025-11-20 10:00:00.000000
+
+La table est remplie à partir des transactions existantes dans la
+migration (les séries mensuelles lisent les mois clos dans cette table) ;
+`python -m app.rollups verify` contrôle le résultat.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.analytics import period_start
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_monthly_rollups"
+down_revision: Union[str, Sequence[str], None] = "0004_user_token_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "monthly_rollups",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("year_month", sa.String(length=7), nullable=False),
+        sa.Column("category", sa.String(length=50), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "year_month", "category"),
+    )
+
+    # Totaux des transactions existantes, calculés par la base en une requête
+    transactions = sa.table(
+        "transactions",
+        sa.column("user_id", sa.Integer()),
+        sa.column("date", sa.DateTime()),
+        sa.column("category", sa.String()),
+        sa.column("amount", sa.Float()),
+    )
+    monthly_rollups = sa.table(
+        "monthly_rollups",
+        sa.column("user_id", sa.Integer()),
+        sa.column("year_month", sa.String()),
+        sa.column("category", sa.String()),
+        sa.column("total", sa.Float()),
+        sa.column("count", sa.Integer()),
+    )
+    year_month = sa.func.substr(period_start(transactions.c.date, "month"), 1, 7)
+    op.execute(monthly_rollups.insert().from_select(
+        ["user_id", "year_month", "category", "total", "count"],
+        sa.select(
+            transactions.c.user_id,
+            year_month,
+            transactions.c.category,
+            sa.func.sum(transactions.c.amount),
+            sa.func.count(),
+        ).group_by(transactions.c.user_id, year_month, transactions.c.category)
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("monthly_rollups")
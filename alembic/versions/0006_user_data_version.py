@@ -0,0 +1,31 @@
+"""Colonnes users.data_version et users.data_modified_at (ETag des lectures)
+
+Revision ID: 0006_user_data_version
+Revises: 0005_monthly_rollups
+Create Date: 2025-11-24 10:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_user_data_version"
+down_revision: Union[str, Sequence[str], None] = "0005_monthly_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("data_modified_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("data_modified_at")
+        batch_op.drop_column("data_version")
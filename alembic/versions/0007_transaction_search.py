@@ -0,0 +1,47 @@
+"""Index de recherche plein texte des transactions
+
+Revision ID: 0007_transaction_search
+Revises: 0006_user_data_version
+Create Date: 2025-11-28 10:00:00.000000
+
+Crée l'index natif du dialecte (FTS5, GIN, FULLTEXT ; voir app/search.py),
+rempli à partir des transactions existantes, et la table transaction_tokens
+utilisée sans index natif. Pour remplir cette dernière :
+`python -m app.search rebuild` (avec SEARCH_INDEX=tokens si besoin).
+
+Sous SQLite, les triggers FTS5 sont attachés à transactions : une migration
+qui recrée cette table (batch_alter_table) doit les recréer ensuite.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.search import create_native_index, drop_native_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_transaction_search"
+down_revision: Union[str, Sequence[str], None] = "0006_user_data_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "transaction_tokens",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("token", sa.String(length=50), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["transaction_id"], ["transactions.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "token", "transaction_id"),
+    )
+    create_native_index(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_native_index(op.get_bind())
+    op.drop_table("transaction_tokens")
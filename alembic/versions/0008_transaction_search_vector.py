@@ -0,0 +1,41 @@
+"""Recherche PostgreSQL : tsvector stocké dans une colonne générée
+
+Revision ID: 0008_transaction_search_vector
+Revises: 0007_transaction_search
+Create Date: 2025-12-05 10:00:00.000000
+
+Remplace l'index GIN sur expression de 0007 par la colonne générée
+transactions.search_vector et un index GIN (user_id, search_vector) : le
+classement (ts_rank) lit le tsvector stocké au lieu de le recalculer pour
+chaque ligne trouvée. Sans effet hors PostgreSQL.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.search import PG_COLUMN, PG_DOCUMENT, PG_INDEX, native_index_ddl
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_transaction_search_vector"
+down_revision: Union[str, Sequence[str], None] = "0007_transaction_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+    for statement in native_index_ddl(op.get_bind().dialect):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+    op.execute(f"ALTER TABLE transactions DROP COLUMN IF EXISTS {PG_COLUMN}")
+    op.execute(f"CREATE INDEX {PG_INDEX} ON transactions USING gin (({PG_DOCUMENT}))")
@@ -0,0 +1,181 @@
+# app/analytics.py - Séries temporelles des transactions (jour, semaine, mois)
+#
+# Le regroupement est fait par la base : le début de période est calculé en SQL
+# (date_trunc, DATE_FORMAT ou strftime selon le dialecte) puis agrégé avec
+# GROUP BY. Seules les lignes agrégées remontent à l'application, et le filtre
+# (user_id, date) suit l'index ix_transactions_user_date_id. Pour les séries
+# mensuelles, les mois clos viennent de monthly_rollups (app/rollups.py).
+
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import String, func, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from app.models import MonthlyRollup, Transaction, naive_utc
+
+BUCKETS = ("day", "week", "month")
+
+
+class period_start(FunctionElement):
+    """
+    Début de la période contenant une date, au format 'YYYY-MM-DD'.
+
+    Les semaines commencent le lundi (ISO 8601).
+    """
+    type = String()
+    inherit_cache = True
+    # La période fait partie de la clé du cache de compilation
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("bucket", InternalTraversal.dp_string)
+    ]
+
+    def __init__(self, column, bucket: str):
+        if bucket not in BUCKETS:
+            raise ValueError(f"Période inconnue : {bucket}")
+        self.bucket = bucket
+        super().__init__(column)
+
+
+@compiles(period_start)
+def _period_start_default(element, compiler, **kw):
+    # PostgreSQL et dialectes qui disposent de date_trunc
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return f"to_char(date_trunc('{element.bucket}', {column}), 'YYYY-MM-DD')"
+
+
+@compiles(period_start, "mysql")
+@compiles(period_start, "mariadb")
+def _period_start_mysql(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    if element.bucket == "day":
+        return f"DATE_FORMAT({column}, '%%Y-%%m-%%d')"
+    if element.bucket == "week":
+        return f"DATE_FORMAT(DATE_SUB({column}, INTERVAL WEEKDAY({column}) DAY), '%%Y-%%m-%%d')"
+    return f"DATE_FORMAT({column}, '%%Y-%%m-01')"
+
+
+@compiles(period_start, "sqlite")
+def _period_start_sqlite(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    if element.bucket == "day":
+        return f"date({column})"
+    if element.bucket == "week":
+        # 'weekday 0' avance au dimanche (inchangé si dimanche), -6 jours : le lundi
+        return f"date({column}, 'weekday 0', '-6 days')"
+    return f"strftime('%Y-%m-01', {column})"
+
+
+def _month_floor(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _month_ceil(value: datetime) -> datetime:
+    floor = _month_floor(value)
+    if floor == value:
+        return floor
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _closed_months(date_from: Optional[datetime], date_to: Optional[datetime]) -> Tuple[Optional[datetime], datetime]:
+    """
+    Intervalle [début, fin) des mois entiers et clos compris dans [date_from, date_to).
+
+    Le mois courant n'est jamais clos ; le début vaut None si date_from n'est
+    pas fourni. L'intervalle peut être vide (début >= fin).
+    """
+    end = _month_floor(datetime.now(timezone.utc).replace(tzinfo=None))
+    if date_to is not None:
+        end = min(end, _month_floor(date_to))
+    start = _month_ceil(date_from) if date_from is not None else None
+    return start, end
+
+
+def timeseries(
+        db: Session,
+        user_id: int,
+        bucket: str = "month",
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        by_category: bool = False
+) -> List[dict]:
+    """
+    Revenus, dépenses et solde net par période, triés par période.
+
+    `date_from` est inclus, `date_to` exclu. Avec `by_category`, chaque
+    période contient aussi le total et le nombre de transactions par catégorie.
+
+    Par mois, les mois entiers et clos sont lus dans monthly_rollups ; seules
+    les transactions du mois courant (et des mois coupés par les bornes) sont
+    agrégées depuis la table transactions.
+    """
+    date_from = naive_utc(date_from) if date_from else None
+    date_to = naive_utc(date_to) if date_to else None
+
+    rows = []
+    period = period_start(Transaction.date, bucket).label("period")
+    query = db.query(
+        period,
+        Transaction.category,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    ).filter(Transaction.user_id == user_id)
+
+    if date_from:
+        query = query.filter(Transaction.date >= date_from)
+    if date_to:
+        query = query.filter(Transaction.date < date_to)
+
+    if bucket == "month":
+        closed_start, closed_end = _closed_months(date_from, date_to)
+        if closed_start is None or closed_start < closed_end:
+            rollup_query = db.query(
+                MonthlyRollup.year_month,
+                MonthlyRollup.category,
+                MonthlyRollup.total,
+                MonthlyRollup.count
+            ).filter(
+                MonthlyRollup.user_id == user_id,
+                MonthlyRollup.year_month < closed_end.strftime("%Y-%m"),
+                MonthlyRollup.count != 0
+            )
+            live_range = Transaction.date >= closed_end
+            if closed_start is not None:
+                rollup_query = rollup_query.filter(MonthlyRollup.year_month >= closed_start.strftime("%Y-%m"))
+                live_range = or_(Transaction.date < closed_start, live_range)
+            rows += [
+                (f"{year_month}-01", category, total, count)
+                for year_month, category, total, count in rollup_query
+            ]
+            query = query.filter(live_range)
+
+    rows += query.group_by(period, Transaction.category).all()
+
+    points = {}
+    for period_key, category, total, count in rows:
+        point = points.get(period_key)
+        if point is None:
+            point = points[period_key] = {
+                "period": date.fromisoformat(period_key),
+                "income": 0.0,
+                "expense": 0.0,
+                "net": 0.0,
+                "count": 0,
+                "categories": {} if by_category else None
+            }
+        total = total or 0.0
+        if category == "income":
+            point["income"] += total
+        elif category == "expense":
+            point["expense"] += total
+        point["count"] += count
+        if by_category:
+            point["categories"][category] = {"total": total, "count": count}
+
+    for point in points.values():
+        point["net"] = point["income"] - point["expense"]
+
+    return sorted(points.values(), key=lambda point: point["period"])
@@ -1,11 +1,16 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.cache import TTLCache
+from app.database import get_async_db, get_db
+from app.hashing import check_password, hash_password
+from app.instrumentation import identify_user, timed
 from app.models import User
 from app.schemas import TokenData
 import os
@@ -17,14 +22,49 @@ SECRET_KEY = os.getenv("SECRET_KEY", "quubkl6-tRWSmBAkoaIYEorg9L5VuVYox7QAcRoPxA
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Cache des utilisateurs authentifiés (token -> principal)
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+
+@dataclass(frozen=True, slots=True)
+class UserPrincipal:
+    """Identité minimale de l'utilisateur authentifié, partagée entre requêtes"""
+    id: int
+    username: str
+
+
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int) -> int:
+    """Retirer du cache tous les tokens d'un utilisateur"""
+    return user_cache.invalidate(lambda token, principal: principal.id == user_id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    state = inspect(target)
+    if any(
+        state.attrs[name].history.has_changes()
+        for name in ("hashed_password", "username", "token_version")
+    ):
+        invalidate_user(target.id)
+
+
+# Versions synchrones : les routes utilisent app.hashing.password_hasher
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return check_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -36,23 +76,156 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Impossible de valider les informations d'identification",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Impossible de valider les informations d'identification",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+# Version minimale de token connue par utilisateur (révocations vues par ce processus)
+_min_token_versions: Dict[int, int] = {}
+
+
+def revoke_tokens(user_id: int, token_version: int) -> None:
+    """Refuser, dans ce processus, les tokens émis avant `token_version`"""
+    if token_version <= _min_token_versions.get(user_id, 0):
+        return
+    _min_token_versions[user_id] = token_version
+    # Cache parcouru seulement quand une révocation est découverte, pas à chaque vérification
+    invalidate_user(user_id)
+
+
+def reset_auth_cache() -> None:
+    """Vider le cache des utilisateurs et les révocations connues"""
+    user_cache.clear()
+    _min_token_versions.clear()
+
+
+def decode_access_token(token: str) -> TokenData:
+    """Vérifier la signature et l'expiration du token et extraire ses claims"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
+        return TokenData(
+            username=username,
+            user_id=payload.get("uid"),
+            token_version=payload.get("ver"),
+            expires_at=payload.get("exp")
+        )
+    except (JWTError, ValueError):
         raise credentials_exception
-    
-    user = db.query(User).filter(User.username == token_data.username).first()
+
+
+def create_user_access_token(user: User) -> str:
+    """Token d'accès d'un utilisateur : sub (username), uid (id) et ver (token_version)"""
+    return create_access_token(
+        data={"sub": user.username, "uid": user.id, "ver": user.token_version},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+
+def login_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Nom d'utilisateur ou mot de passe incorrect",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _load_principal(db: Session, token: str, token_data: TokenData) -> UserPrincipal:
+    """Vérifier l'utilisateur du token en base et mettre le résultat en cache"""
+    user = db.query(User.id, User.username, User.token_version).filter(
+        User.username == token_data.username
+    ).first()
     if user is None:
         raise credentials_exception
-    return user
+    if user.token_version:
+        revoke_tokens(user.id, user.token_version)
+    if (token_data.token_version or 0) < user.token_version:
+        raise credentials_exception
+
+    principal = UserPrincipal(id=user.id, username=user.username)
+    # Ne jamais garder un token en cache au-delà de son expiration
+    ttl = AUTH_CACHE_TTL_SECONDS
+    if token_data.expires_at is not None:
+        ttl = min(ttl, token_data.expires_at - datetime.now(timezone.utc).timestamp())
+    user_cache.set(token, principal, ttl=ttl)
+    return principal
+
+
+def _principal_from_claims(token_data: TokenData) -> Optional[UserPrincipal]:
+    """Principal construit depuis les claims, ou None pour un ancien token sans `uid`"""
+    if token_data.user_id is None:
+        return None
+
+    if (token_data.token_version or 0) < _min_token_versions.get(token_data.user_id, 0):
+        raise credentials_exception
+
+    return UserPrincipal(id=token_data.user_id, username=token_data.username)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserPrincipal:
+    """
+    Authentification stricte : l'utilisateur est vérifié en base.
+
+    Refuse les tokens d'un utilisateur supprimé ou révoqués (claim `ver`
+    inférieur à users.token_version). Le résultat est mis en cache par token.
+    """
+    with timed("auth"):
+        token_data = decode_access_token(token)
+
+        # La signature et l'expiration sont vérifiées ci-dessus : seul l'accès DB est mis en cache
+        principal = user_cache.get(token)
+        if principal is None:
+            principal = _load_principal(db, token, token_data)
+    identify_user(principal.id)
+    return principal
+
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserPrincipal:
+    """
+    Authentification sans accès DB, à partir des claims du token.
+
+    Utilisée par les routes de lecture : l'identifiant vient du claim `uid`.
+    Un token révoqué reste accepté jusqu'à son expiration, sauf si la
+    révocation a été vue par ce processus. Les anciens tokens sans `uid`
+    passent par l'authentification stricte.
+    """
+    with timed("auth"):
+        principal = _principal_from_claims(decode_access_token(token))
+    if principal is None:
+        return get_current_user(token, db)
+    identify_user(principal.id)
+    return principal
+
+
+# Variantes pour le mode asynchrone (DB_ASYNC)
+
+async def get_current_user_async(
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
+    """Équivalent asynchrone de get_current_user"""
+    with timed("auth"):
+        token_data = decode_access_token(token)
+
+        principal = user_cache.get(token)
+        if principal is None:
+            principal = await db.run_sync(_load_principal, token, token_data)
+    identify_user(principal.id)
+    return principal
+
 
+async def get_current_principal_async(
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
+    """Équivalent asynchrone de get_current_principal"""
+    with timed("auth"):
+        principal = _principal_from_claims(decode_access_token(token))
+    if principal is None:
+        return await get_current_user_async(token, db)
+    identify_user(principal.id)
+    return principal
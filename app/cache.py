@@ -0,0 +1,230 @@
+# app/cache.py - Cache en mémoire borné (LRU) avec expiration (TTL)
+#
+# TTLCache est utilisé directement pour les objets Python (cache
+# d'authentification). Les backends (CacheBackend) stockent des octets sous
+# des clés texte : en mémoire par défaut, ou dans un serveur compatible Redis
+# partagé entre les processus (cache des réponses, voir app/response_cache.py).
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Cache clé/valeur en mémoire, borné en taille et avec expiration.
+
+    Quand le cache est plein, l'entrée la moins récemment utilisée est
+    évincée. Les accès sont protégés par un verrou : les routes synchrones
+    de FastAPI s'exécutent en parallèle dans un pool de threads.
+
+    Avec `sizeof`, la taille de chaque valeur est comptée (en octets) et le
+    cache est aussi borné par `max_bytes` (0 = pas de limite).
+    """
+
+    def __init__(
+            self,
+            maxsize: int,
+            ttl: float,
+            sizeof: Optional[Callable[[Any], int]] = None,
+            max_bytes: int = 0
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retourner la valeur associée à `key`, ou None si absente ou expirée"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Enregistrer une valeur ; `ttl` remplace la durée par défaut si fourni"""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Supprimer les entrées pour lesquelles predicate(key, value) est vrai"""
+        with self._lock:
+            keys = [key for key, (value, _, _) in self._data.items() if predicate(key, value)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Vider le cache et remettre les compteurs à zéro"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.bytes = 0
+
+    def stats(self) -> dict:
+        """Compteurs pour le monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+            if self.sizeof is not None:
+                stats.update({"memory_bytes": self.bytes, "max_bytes": self.max_bytes})
+            return stats
+
+
+class CacheBackend(ABC):
+    """
+    Stockage clé (str) / valeur (bytes) d'un cache partagé.
+
+    `blocking` indique que les appels font des entrées/sorties réseau : les
+    routes asynchrones les exécutent alors dans le pool de threads. Un backend
+    incomplet échoue dès son instanciation.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> int:
+        """Supprimer toutes les clés qui commencent par `prefix`"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend en mémoire du processus (LRU borné en entrées et en octets)"""
+
+    def __init__(self, maxsize: int, ttl: float, max_bytes: int = 0):
+        self._cache = TTLCache(maxsize, ttl, sizeof=len, max_bytes=max_bytes)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete_prefix(self, prefix: str) -> int:
+        return self._cache.invalidate(lambda key, value: key.startswith(prefix))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+def _escape_glob(text: str) -> str:
+    # Motif MATCH de Redis (glob) : caractères spéciaux échappés par une barre oblique inverse
+    return "".join("\\" + char if char in "*?[]\\" else char for char in text)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend pour un serveur compatible Redis (Redis, Valkey, KeyDB...).
+
+    `client` est un client redis-py (ou tout objet qui expose get, set(px=),
+    scan_iter, delete et info). Les clés sont préfixées par
+    `namespace` pour partager le serveur avec d'autres usages.
+    """
+
+    blocking = True
+
+    def __init__(self, client, namespace: str = "budget:"):
+        self.client = client
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, namespace: str = "budget:") -> "RedisCacheBackend":
+        import redis  # dépendance optionnelle (RESPONSE_CACHE_BACKEND=redis)
+
+        return cls(redis.Redis.from_url(url), namespace)
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(self.namespace + key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.namespace + key, value, px=max(1, int(ttl * 1000)))
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = list(self.client.scan_iter(match=_escape_glob(self.namespace + prefix) + "*"))
+        return self.client.delete(*keys) if keys else 0
+
+    def clear(self) -> None:
+        self.delete_prefix("")
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "backend": "redis",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+        try:
+            stats["memory_bytes"] = self.client.info("memory").get("used_memory")
+        except Exception:
+            stats["memory_bytes"] = None
+        return stats
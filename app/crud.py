@@ -0,0 +1,386 @@
+# app/crud.py - Accès aux données partagé par les routes synchrones et asynchrones
+#
+# Les fonctions reçoivent une Session synchrone. Les routes asynchrones les
+# exécutent avec AsyncSession.run_sync() : le code est le même, mais les
+# entrées/sorties passent par le driver asynchrone (aiosqlite, asyncpg...).
+# Les lectures, sans entités ORM, sont dans app/reads.py ; les écritures sur
+# les transactions passent aussi par des requêtes Core (INSERT/UPDATE/DELETE
+# ... RETURNING quand le dialecte le permet) pour éviter les relectures.
+
+import dataclasses
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app import ledger, reads, rollups, search
+from app.analytics import period_start
+from app.database import replica_router
+from app.models import Transaction, User, UserBalance, naive_utc
+from app.reads import TRANSACTION_COLUMNS, TransactionRecord
+from app.schemas import (
+    TransactionBatchUpdate,
+    TransactionCreate,
+    TransactionFilter,
+    TransactionUpdate,
+    UserCreate
+)
+
+CATEGORIES = ("income", "expense")
+
+# Nombre de lignes par INSERT lors d'un import en masse
+BULK_INSERT_CHUNK_SIZE = 1000
+
+# Dialectes dont DateTime est à la seconde (DATETIME sans fsp : les microsecondes sont arrondies)
+SECOND_PRECISION_DIALECTS = ("mysql", "mariadb")
+
+
+def _apply_changes(db: Session, user_id: int, changes: List[Tuple[datetime, str, float, int]]) -> None:
+    """Répercuter des deltas (date, category, amount, count) sur le solde et les totaux mensuels"""
+    ledger.apply_changes(db, user_id, [(category, amount, count) for _, category, amount, count in changes])
+    rollups.apply_changes(db, user_id, changes)
+
+
+def _touch_user_data(db: Session, user_id: int) -> None:
+    """Incrémenter users.data_version dans la transaction de l'écriture"""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1, data_modified_at=datetime.now(timezone.utc))
+    )
+    # L'utilisateur relit ses écritures sur le primaire, le temps que les réplicas rattrapent
+    replica_router.pin(user_id)
+
+
+def _dialect(db: Session):
+    return db.get_bind().dialect
+
+
+def _now(db: Session) -> datetime:
+    """Date d'écriture, déjà à la précision de la colonne : la valeur stockée est celle connue de l'application"""
+    now = datetime.now(timezone.utc)
+    if _dialect(db).name in SECOND_PRECISION_DIALECTS:
+        # Tronquée plutôt qu'arrondie par la base (23:59:59.6 resterait dans le mois de la ligne)
+        now = now.replace(microsecond=0)
+    return now
+
+
+def _check_category(category: str) -> None:
+    if category not in CATEGORIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La catégorie doit être 'income' ou 'expense'"
+        )
+
+
+def _transaction_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Transaction non trouvée"
+    )
+
+
+# Utilisateurs
+
+def check_user_available(db: Session, user: UserCreate) -> None:
+    """Vérifier que l'email et le nom d'utilisateur sont libres (HTTPException 400 sinon)"""
+    if db.query(User.id).filter(User.email == user.email).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cet email est déjà enregistré"
+        )
+
+    if db.query(User.id).filter(User.username == user.username).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ce nom d'utilisateur est déjà pris"
+        )
+
+
+def create_user(db: Session, user: UserCreate, hashed_password: str) -> User:
+    """Créer un utilisateur avec une ligne de solde vide"""
+    db_user = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashed_password,
+        balance=UserBalance()
+    )
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
+def get_user_by_username(db: Session, username: str) -> Optional[User]:
+    return db.query(User).filter(User.username == username).first()
+
+
+def bump_token_version(db: Session, user_id: int) -> int:
+    """Incrémenter users.token_version et retourner la nouvelle valeur"""
+    user = db.get(User, user_id)
+    user.token_version += 1
+    db.commit()
+    return user.token_version
+
+
+# Transactions
+
+def create_transaction(db: Session, user_id: int, transaction: TransactionCreate) -> TransactionRecord:
+    """Créer une transaction et mettre à jour le solde dans la même transaction DB"""
+    _check_category(transaction.category)
+
+    now = _now(db)
+    values = {**transaction.model_dump(), "date": now, "user_id": user_id}
+    statement = insert(Transaction).values(**values)
+
+    if _dialect(db).insert_returning:
+        # INSERT ... RETURNING : la ligne telle que stockée, sans SELECT
+        created = TransactionRecord(*db.execute(statement.returning(*TRANSACTION_COLUMNS)).one())
+    else:
+        # MySQL : l'id vient du curseur (lastrowid), le reste est déjà connu (date à la seconde)
+        result = db.execute(statement)
+        created = TransactionRecord(id=result.inserted_primary_key[0], **{**values, "date": naive_utc(now)})
+
+    _apply_changes(db, user_id, [(now, created.category, created.amount, 1)])
+    search.index_transactions(db, [Transaction.id == created.id])
+    _touch_user_data(db, user_id)
+    db.commit()
+
+    return created
+
+
+def bulk_create_transactions(db: Session, user_id: int, transactions: Iterable[TransactionCreate]) -> int:
+    """
+    Insérer des transactions déjà validées, par lots, dans une seule transaction DB.
+
+    Chaque lot est un INSERT exécuté en executemany ; le solde est mis à jour
+    une seule fois pour l'ensemble. Retourne le nombre de lignes insérées.
+    """
+    now = _now(db)
+    rows = [
+        {**transaction.model_dump(), "date": now, "user_id": user_id}
+        for transaction in transactions
+    ]
+    if not rows:
+        return 0
+
+    for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        db.execute(insert(Transaction), rows[start:start + BULK_INSERT_CHUNK_SIZE])
+
+    _apply_changes(db, user_id, [(now, row["category"], row["amount"], 1) for row in rows])
+    search.index_missing(db, user_id)
+    _touch_user_data(db, user_id)
+    db.commit()
+
+    return len(rows)
+
+
+def _select_for_update(db: Session, user_id: int, transaction_id: int):
+    """Ligne complète d'une transaction de l'utilisateur, verrouillée (HTTPException 404 sinon)"""
+    row = db.execute(
+        select(*TRANSACTION_COLUMNS)
+        .where(Transaction.id == transaction_id, Transaction.user_id == user_id)
+        .with_for_update()
+    ).first()
+
+    if row is None:
+        raise _transaction_not_found()
+
+    return TransactionRecord(*row)
+
+
+def update_transaction(
+        db: Session,
+        user_id: int,
+        transaction_id: int,
+        transaction_update: TransactionUpdate
+) -> TransactionRecord:
+    """
+    Mettre à jour les champs fournis et répercuter le changement sur le solde.
+
+    Un seul UPDATE ... RETURNING si ni le montant ni la catégorie ne changent ;
+    sinon les anciennes valeurs sont lues d'abord pour calculer les deltas. Sans
+    UPDATE ... RETURNING (MySQL), la ligne est toujours lue avant l'UPDATE.
+    """
+    # Mettre à jour uniquement les champs fournis
+    update_data = transaction_update.model_dump(exclude_unset=True)
+    if not update_data:
+        return reads.get_transaction(db, user_id, transaction_id)
+
+    changes_totals = "category" in update_data or "amount" in update_data
+    returning = _dialect(db).update_returning
+
+    old = None
+    if changes_totals or not returning:
+        old = _select_for_update(db, user_id, transaction_id)
+
+    statement = update(Transaction).where(
+        Transaction.id == transaction_id,
+        Transaction.user_id == user_id
+    ).values(**update_data)
+
+    if returning:
+        row = db.execute(statement.returning(*TRANSACTION_COLUMNS)).first()
+        if row is None:
+            raise _transaction_not_found()
+        updated = TransactionRecord(*row)
+    else:
+        db.execute(statement)
+        updated = TransactionRecord(**{**dataclasses.asdict(old), **update_data})
+
+    if old is not None and (updated.category, updated.amount) != (old.category, old.amount):
+        _apply_changes(db, user_id, [
+            (old.date, old.category, -old.amount, -1),
+            (updated.date, updated.category, updated.amount, 1)
+        ])
+    if "title" in update_data or "description" in update_data:
+        search.index_transactions(db, [Transaction.id == transaction_id])
+    _touch_user_data(db, user_id)
+    db.commit()
+
+    return updated
+
+
+def delete_transaction(db: Session, user_id: int, transaction_id: int) -> None:
+    """
+    Supprimer une transaction et la retirer du solde.
+
+    DELETE ... RETURNING donne en une requête les valeurs à retirer du solde ;
+    sans RETURNING (MySQL), la ligne est lue d'abord.
+    """
+    conditions = [Transaction.id == transaction_id, Transaction.user_id == user_id]
+    statement = delete(Transaction).where(*conditions)
+
+    search.unindex_transactions(db, conditions)
+    if _dialect(db).delete_returning:
+        row = db.execute(
+            statement.returning(Transaction.date, Transaction.category, Transaction.amount)
+        ).first()
+        if row is None:
+            raise _transaction_not_found()
+        date, category, amount = row
+    else:
+        old = _select_for_update(db, user_id, transaction_id)
+        db.execute(statement)
+        date, category, amount = old.date, old.category, old.amount
+
+    _apply_changes(db, user_id, [(date, category, -amount, -1)])
+    _touch_user_data(db, user_id)
+    db.commit()
+
+
+# Opérations par lot
+
+def _batch_conditions(user_id: int, criteria: TransactionFilter) -> list:
+    """Clause WHERE d'une opération par lot, toujours limitée à l'utilisateur"""
+    conditions = []
+    if criteria.ids is not None:
+        conditions.append(Transaction.id.in_(criteria.ids))
+    if criteria.category is not None:
+        conditions.append(Transaction.category == criteria.category)
+    if criteria.date_from is not None:
+        conditions.append(Transaction.date >= naive_utc(criteria.date_from))
+    if criteria.date_to is not None:
+        conditions.append(Transaction.date < naive_utc(criteria.date_to))
+
+    # Sans critère, l'opération porterait sur toutes les transactions
+    if not conditions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Au moins un critère est requis (ids, category, date_from, date_to)"
+        )
+    return [Transaction.user_id == user_id, *conditions]
+
+
+def _totals_by_month(db: Session, conditions: list) -> List[Tuple[datetime, str, float, int]]:
+    """
+    Totaux (mois, category, amount, count) des lignes ciblées, verrouillées.
+
+    Le verrou est pris dans une sous-requête (FOR UPDATE est interdit avec
+    GROUP BY) : les lignes ne peuvent pas changer avant l'UPDATE/DELETE qui
+    suit, et seuls les totaux agrégés remontent à l'application.
+    """
+    targeted = select(Transaction.date, Transaction.category, Transaction.amount) \
+        .where(*conditions).with_for_update().subquery()
+    month = period_start(targeted.c.date, "month")
+    rows = db.execute(
+        select(month, targeted.c.category, func.sum(targeted.c.amount), func.count())
+        .group_by(month, targeted.c.category)
+    )
+    return [
+        (datetime.strptime(period[:7], "%Y-%m"), category, total or 0.0, count)
+        for period, category, total, count in rows
+    ]
+
+
+def batch_update_transactions(db: Session, user_id: int, batch: TransactionBatchUpdate) -> int:
+    """
+    Appliquer les mêmes changements à toutes les transactions ciblées.
+
+    Un seul UPDATE ensembliste. Si le montant ou la catégorie changent, les
+    deltas du solde et des totaux mensuels se déduisent des totaux par
+    (mois, catégorie) lus avant l'UPDATE. Retourne le nombre de lignes modifiées.
+    """
+    update_data = batch.changes.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucun champ à modifier"
+        )
+    if "category" in update_data:
+        _check_category(update_data["category"])
+
+    conditions = _batch_conditions(user_id, batch)
+
+    changes = []
+    if "category" in update_data or "amount" in update_data:
+        for month, category, total, count in _totals_by_month(db, conditions):
+            new_total = update_data["amount"] * count if "amount" in update_data else total
+            changes += [
+                (month, category, -total, -count),
+                (month, update_data.get("category", category), new_total, count)
+            ]
+
+    # Lignes à réindexer, relevées avant l'UPDATE : les changements peuvent les sortir du filtre
+    reindexed = []
+    if ("title" in update_data or "description" in update_data) and search.backend(db) == "tokens":
+        reindexed = list(db.scalars(select(Transaction.id).where(*conditions)))
+
+    affected = db.execute(
+        update(Transaction).where(*conditions).values(**update_data),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+
+    if affected:
+        if changes:
+            _apply_changes(db, user_id, changes)
+        for start in range(0, len(reindexed), BULK_INSERT_CHUNK_SIZE):
+            chunk = reindexed[start:start + BULK_INSERT_CHUNK_SIZE]
+            search.index_transactions(db, [Transaction.id.in_(chunk)])
+        _touch_user_data(db, user_id)
+    db.commit()
+
+    return affected
+
+
+def batch_delete_transactions(db: Session, user_id: int, criteria: TransactionFilter) -> int:
+    """Supprimer toutes les transactions ciblées en un DELETE ; retourne le nombre de lignes supprimées"""
+    conditions = _batch_conditions(user_id, criteria)
+    totals = _totals_by_month(db, conditions)
+    search.unindex_transactions(db, conditions)
+
+    affected = db.execute(
+        delete(Transaction).where(*conditions),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+
+    if affected:
+        _apply_changes(db, user_id, [
+            (month, category, -total, -count) for month, category, total, count in totals
+        ])
+        _touch_user_data(db, user_id)
+    db.commit()
+
+    return affected
@@ -0,0 +1,96 @@
+# app/export.py - Export en flux des transactions d'un utilisateur (CSV, NDJSON)
+#
+# Les lignes sont lues par paquets avec un curseur côté serveur (yield_per)
+# et encodées au fil de l'eau : la mémoire utilisée ne dépend pas du nombre
+# de transactions exportées.
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from app.database import ReadSessionLocal
+from app.models import Transaction, naive_utc
+
+# Lignes lues par aller-retour avec la base (et encodées par morceau envoyé)
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = ("id", "date", "title", "amount", "category", "description")
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _iter_batches(
+        user_id: int,
+        category: Optional[str],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime]
+) -> Iterator[list]:
+    """Paquets de lignes (tuples) triées par (date, id), lus en flux"""
+    statement = select(*(getattr(Transaction, column) for column in EXPORT_COLUMNS)).where(
+        Transaction.user_id == user_id
+    )
+    if category:
+        statement = statement.where(Transaction.category == category)
+    if date_from:
+        statement = statement.where(Transaction.date >= naive_utc(date_from))
+    if date_to:
+        statement = statement.where(Transaction.date < naive_utc(date_to))
+    statement = statement.order_by(Transaction.date, Transaction.id)
+
+    # Session propre au flux : elle vit aussi longtemps que la réponse (réplica si possible)
+    db = ReadSessionLocal(info={"user_id": user_id})
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def stream_csv(user_id: int, category=None, date_from=None, date_to=None) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+
+    for rows in _iter_batches(user_id, category, date_from, date_to):
+        buffer.seek(0)
+        buffer.truncate()
+        for transaction_id, date, title, amount, category_, description in rows:
+            writer.writerow((
+                transaction_id,
+                date.isoformat() if date else "",
+                title,
+                amount,
+                category_,
+                description or ""
+            ))
+        yield buffer.getvalue().encode()
+
+
+def stream_ndjson(user_id: int, category=None, date_from=None, date_to=None) -> Iterator[bytes]:
+    for rows in _iter_batches(user_id, category, date_from, date_to):
+        yield "".join(
+            json.dumps({
+                "id": transaction_id,
+                "date": date.isoformat() if date else None,
+                "title": title,
+                "amount": amount,
+                "category": category_,
+                "description": description
+            }, ensure_ascii=False) + "\n"
+            for transaction_id, date, title, amount, category_, description in rows
+        ).encode()
+
+
+STREAMERS = {
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+}
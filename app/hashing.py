@@ -0,0 +1,132 @@
+# app/hashing.py - Hachage bcrypt hors du chemin de requête
+#
+# bcrypt est volontairement coûteux en CPU. Exécuté dans le pool de threads
+# de FastAPI, un pic de connexions occupe tous les threads et bloque les
+# autres routes. Les calculs sont donc envoyés à un pool de processus dédié,
+# borné : au-delà de PASSWORD_HASH_MAX_PENDING calculs en attente, la requête
+# est refusée avec un 503 plutôt que de faire grossir la file.
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+from app.metrics import Histogram
+
+load_dotenv()
+
+# Coût bcrypt (2^rounds itérations) : +1 double le temps de calcul
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Nombre de processus de hachage (0 = pool de threads par défaut d'asyncio)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Nombre maximal de calculs en cours ou en attente avant de refuser (503)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+# Contexte passlib, créé au premier hachage (dans le processus qui hache :
+# les workers du pool n'importent passlib qu'à leur premier calcul)
+_pwd_context = None
+
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+    return _pwd_context
+
+
+def __getattr__(name):
+    # `from app.hashing import pwd_context` reste possible
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Pool de processus borné pour bcrypt, avec métriques de latence"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.hash_latency = Histogram()
+        self.verify_latency = Histogram()
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # "spawn" : pas de fork d'un processus qui a déjà des threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def _run(self, histogram: Histogram, func, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Serveur surchargé, veuillez réessayer dans quelques instants",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+            with self._lock:
+                self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hacher un mot de passe ; HTTPException 503 si la file est pleine"""
+        return await self._run(self.hash_latency, hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Vérifier un mot de passe ; HTTPException 503 si la file est pleine"""
+        return await self._run(self.verify_latency, check_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Configuration, file d'attente et latences (en secondes, attente incluse)"""
+        return {
+            "workers": self.workers,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "hash_latency": self.hash_latency.snapshot(),
+            "verify_latency": self.verify_latency.snapshot()
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING)
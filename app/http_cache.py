@@ -0,0 +1,60 @@
+# app/http_cache.py - Requêtes conditionnelles (ETag) sur les lectures
+#
+# Chaque écriture incrémente users.data_version. L'ETag d'une lecture est
+# dérivé de (utilisateur, version) : tant que la version n'a pas changé, la
+# réponse est identique et un client qui renvoie l'ETag dans If-None-Match
+# reçoit un 304, sans requête sur les transactions ni sérialisation.
+#
+# La version est lue AVANT les données : si une écriture s'intercale, la
+# réponse porte l'ancien ETag avec les nouvelles données, et le client
+# recharge une fois de trop au lieu de garder une réponse périmée.
+
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+# Le navigateur garde la réponse (cache privé) mais la revalide à chaque usage
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(user_id: int, data_version: int) -> str:
+    return f'"{user_id}-{data_version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible de If-None-Match (RFC 9110, section 13.1.2)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def check_not_modified(
+        request: Request,
+        response: Response,
+        user_id: int,
+        data_version: int,
+        data_modified_at: Optional[datetime]
+) -> None:
+    """
+    Ajouter ETag/Last-Modified à la réponse, ou lever un 304 si le client est à jour.
+
+    Last-Modified est informatif : à la seconde près, il ne permet pas de
+    distinguer deux écritures rapprochées, donc seul If-None-Match déclenche
+    un 304.
+    """
+    headers = {"ETag": make_etag(user_id, data_version), "Cache-Control": CACHE_CONTROL}
+    if data_modified_at is not None:
+        if data_modified_at.tzinfo is None:
+            data_modified_at = data_modified_at.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(data_modified_at, usegmt=True)
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
@@ -0,0 +1,206 @@
+# app/instrumentation.py - Latence par route, requêtes SQL et Server-Timing
+#
+# MetricsMiddleware (middleware ASGI pur) ouvre un RequestTimings par requête,
+# porté par une ContextVar. Les événements de l'engine (app/database.py),
+# l'authentification et la sérialisation y ajoutent leur durée, y compris
+# depuis le pool de threads des routes synchrones : le contexte y est copié,
+# l'objet est partagé. En fin de requête, les durées alimentent des
+# histogrammes par route (modèle de chemin, jamais le chemin brut), exportés
+# au format texte Prometheus par GET /metrics.
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from starlette.datastructures import MutableHeaders
+
+from app.metrics import Histogram, prometheus_histogram, prometheus_labels
+
+load_dotenv()
+
+# Exposer GET /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Ajouter l'en-tête Server-Timing (auth, db, sérialisation) aux réponses
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Requêtes SQL par requête HTTP (de 1 à 100)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass(slots=True)
+class RequestTimings:
+    """Durées (en secondes) et requêtes SQL cumulées pendant une requête HTTP"""
+    auth: float = 0.0
+    db: float = 0.0
+    serialization: float = 0.0
+    statements: int = 0
+    # Scope ASGI (complété par le routage) et utilisateur authentifié, pour
+    # rattacher une requête SQL lente à son origine (app/slow_queries.py)
+    scope: Optional[dict] = None
+    user_id: Optional[int] = None
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def identify_user(user_id: int) -> None:
+    """Associer l'utilisateur authentifié à la requête en cours"""
+    timings = _current.get()
+    if timings is not None:
+        timings.user_id = user_id
+
+
+@contextmanager
+def timed(phase: str):
+    """Ajouter la durée du bloc à la phase ('auth', 'serialization') de la requête en cours"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, phase, getattr(timings, phase) + time.perf_counter() - start)
+
+
+def record_statement(duration: float) -> None:
+    """Compter une requête SQL exécutée (appelé par les événements de l'engine)"""
+    timings = _current.get()
+    if timings is not None:
+        timings.db += duration
+        timings.statements += 1
+
+
+class RouteMetrics:
+    """Compteurs et histogrammes par (méthode, route), sûrs entre threads"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._db_time: Dict[Tuple[str, str], Histogram] = {}
+        self._statements: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finish(self, method: str, route: str, status_code: int, duration: float, timings: RequestTimings) -> None:
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self._requests[(method, route, status_code)] = self._requests.get((method, route, status_code), 0) + 1
+            if key not in self._latency:
+                self._latency[key] = Histogram()
+                self._db_time[key] = Histogram()
+                self._statements[key] = Histogram(STATEMENT_BUCKETS)
+        self._latency[key].observe(duration)
+        self._db_time[key].observe(timings.db)
+        self._statements[key].observe(timings.statements)
+
+    def render(self) -> str:
+        """Métriques au format texte Prometheus"""
+        with self._lock:
+            in_flight = self.in_flight
+            requests = sorted(self._requests.items())
+            histograms = [
+                (name, help_text, sorted(series.items()))
+                for name, help_text, series in (
+                    ("budget_http_request_duration_seconds", "Durée des requêtes HTTP", self._latency),
+                    ("budget_db_duration_seconds", "Temps passé en base par requête HTTP", self._db_time),
+                    ("budget_db_statements", "Requêtes SQL exécutées par requête HTTP", self._statements),
+                )
+            ]
+
+        lines = [
+            "# HELP budget_http_requests_in_flight Requêtes HTTP en cours",
+            "# TYPE budget_http_requests_in_flight gauge",
+            f"budget_http_requests_in_flight {in_flight}",
+            "# HELP budget_http_requests_total Requêtes HTTP terminées, par statut",
+            "# TYPE budget_http_requests_total counter",
+        ]
+        lines += [
+            f"budget_http_requests_total{prometheus_labels({'method': method, 'route': route, 'status': status_code})} {count}"
+            for (method, route, status_code), count in requests
+        ]
+        for name, help_text, series in histograms:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), histogram in series:
+                lines += prometheus_histogram(name, {"method": method, "route": route}, histogram.snapshot())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+            self._db_time.clear()
+            self._statements.clear()
+
+
+route_metrics = RouteMetrics()
+
+
+def route_template(scope) -> str:
+    """Modèle de chemin de la route servie ('/api/transactions/{transaction_id}')"""
+    # FastAPI récent : le chemin préfixé des routeurs inclus est dans le contexte effectif
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    # Chemin sans route (404) : une seule série, quel que soit le chemin demandé
+    return path or "unmatched"
+
+
+def server_timing(timings: RequestTimings, total: float) -> str:
+    """Valeur de l'en-tête Server-Timing (durées en millisecondes)"""
+    return (
+        f"auth;dur={timings.auth * 1000:.2f}, "
+        f'db;dur={timings.db * 1000:.2f};desc="{timings.statements} SQL", '
+        f"serialization;dur={timings.serialization * 1000:.2f}, "
+        f"app;dur={total * 1000:.2f}"
+    )
+
+
+class MetricsMiddleware:
+    """Mesurer chaque requête HTTP (ASGI pur : pas de copie du corps, flux préservés)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope=scope)
+        token = _current.set(timings)
+        status_code = 500
+        start = time.perf_counter()
+        route_metrics.start()
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", server_timing(timings, time.perf_counter() - start)
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route_metrics.finish(
+                scope["method"], route_template(scope), status_code, time.perf_counter() - start, timings
+            )
@@ -0,0 +1,162 @@
+# app/ledger.py - Solde maintenu par utilisateur (table user_balances)
+#
+# Les handlers d'écriture appliquent des deltas dans la même transaction DB
+# que la modification, ce qui permet à /stats/summary de lire une seule ligne.
+# En cas de doute, `python -m app.ledger verify` compare la table aux
+# transactions et `python -m app.ledger rebuild` la recalcule.
+
+import argparse
+import math
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.models import Transaction, User, UserBalance
+
+# Écart toléré entre les totaux stockés et recalculés : les deltas successifs
+# (total = total + delta) cumulent des arrondis flottants proportionnels au total
+REL_TOLERANCE = 1e-9
+ABS_TOLERANCE = 1e-6
+
+
+def totals_match(stored: float, actual: float) -> bool:
+    """Total stocké égal au total recalculé, aux arrondis flottants près"""
+    return math.isclose(stored, actual, rel_tol=REL_TOLERANCE, abs_tol=ABS_TOLERANCE)
+
+
+def compute_summary(db: Session, user_id: int) -> Dict[str, float]:
+    """Recalculer les totaux d'un utilisateur avec une requête agrégée"""
+    rows = db.query(
+        Transaction.category,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    ).filter(
+        Transaction.user_id == user_id
+    ).group_by(Transaction.category).all()
+
+    totals = {category: total or 0.0 for category, total, _ in rows}
+    return {
+        "total_income": totals.get("income", 0.0),
+        "total_expense": totals.get("expense", 0.0),
+        "transaction_count": sum(count for _, _, count in rows)
+    }
+
+
+def apply_changes(db: Session, user_id: int, changes: Iterable[Tuple[str, float, int]]) -> None:
+    """
+    Appliquer des deltas (category, amount, count) au solde d'un utilisateur.
+
+    La mise à jour est un UPDATE relatif (total = total + delta) exécuté dans
+    la transaction courante : elle est validée ou annulée avec la modification
+    des transactions. Si la ligne n'existe pas encore (utilisateur créé avant
+    la table), elle est reconstruite à partir des transactions.
+    """
+    income = expense = 0.0
+    count = 0
+    for category, amount, delta_count in changes:
+        if category == "income":
+            income += amount
+        elif category == "expense":
+            expense += amount
+        count += delta_count
+
+    result = db.execute(
+        update(UserBalance)
+        .where(UserBalance.user_id == user_id)
+        .values(
+            total_income=UserBalance.total_income + income,
+            total_expense=UserBalance.total_expense + expense,
+            transaction_count=UserBalance.transaction_count + count
+        )
+    )
+    if result.rowcount == 0:
+        # Les changements en attente font partie du recalcul : aucun delta à ajouter
+        db.flush()
+        db.add(UserBalance(user_id=user_id, **compute_summary(db, user_id)))
+
+
+def rebuild_balances(db: Session, fix: bool = True) -> List[dict]:
+    """
+    Comparer user_balances aux totaux recalculés depuis transactions.
+
+    Retourne la liste des écarts trouvés ; si `fix` est vrai, les lignes
+    fausses ou manquantes sont corrigées et la transaction est validée.
+    """
+    actual = {
+        user_id: {"total_income": 0.0, "total_expense": 0.0, "transaction_count": 0}
+        for (user_id,) in db.query(User.id)
+    }
+    rows = db.query(
+        Transaction.user_id,
+        Transaction.category,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    ).group_by(Transaction.user_id, Transaction.category)
+    for user_id, category, total, count in rows:
+        totals = actual.setdefault(
+            user_id, {"total_income": 0.0, "total_expense": 0.0, "transaction_count": 0}
+        )
+        if category == "income":
+            totals["total_income"] += total or 0.0
+        elif category == "expense":
+            totals["total_expense"] += total or 0.0
+        totals["transaction_count"] += count
+
+    stored = {balance.user_id: balance for balance in db.query(UserBalance)}
+    drifts = []
+    for user_id, totals in sorted(actual.items()):
+        balance = stored.get(user_id)
+        if balance is None:
+            drifts.append({"user_id": user_id, "field": None, "stored": None, "actual": None})
+            if fix:
+                db.add(UserBalance(user_id=user_id, **totals))
+            continue
+        for field, value in totals.items():
+            if not totals_match(getattr(balance, field), value):
+                drifts.append({
+                    "user_id": user_id,
+                    "field": field,
+                    "stored": getattr(balance, field),
+                    "actual": value
+                })
+                if fix:
+                    setattr(balance, field, value)
+
+    if fix:
+        db.commit()
+    return drifts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.ledger",
+        description="Vérifier ou reconstruire la table user_balances"
+    )
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args(argv)
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        drifts = rebuild_balances(db, fix=args.command == "rebuild")
+    finally:
+        db.close()
+
+    for drift in drifts:
+        if drift["field"] is None:
+            print(f"user_id={drift['user_id']}: solde manquant")
+        else:
+            print(
+                f"user_id={drift['user_id']} {drift['field']}: "
+                f"stocké={drift['stored']} réel={drift['actual']}"
+            )
+    print(f"{len(drifts)} écart(s) trouvé(s)" + (", corrigé(s)" if args.command == "rebuild" and drifts else ""))
+
+    return 1 if drifts and args.command == "verify" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
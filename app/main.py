@@ -1,17 +1,40 @@
 # app/main.py - Point d'entrée de l'API Budget
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import auth, transactions
+from app.auth import SECRET_KEY
+from app.database import DB_ASYNC, dispose_engines, init_db, replica_router
+from app.hashing import password_hasher
+from app.instrumentation import METRICS_ENABLED, MetricsMiddleware, route_metrics
+from app.metrics import PROMETHEUS_CONTENT_TYPE
+from app.replicas import ReplicaPinMiddleware
+from app.routers import admin, auth, transactions
+
+auth_router, transactions_router = auth.router, transactions.router
+if DB_ASYNC:
+    # Mêmes routes, implémentées avec AsyncSession
+    from app.routers import auth_async, transactions_async
+    auth_router, transactions_router = auth_async.router, transactions_async.router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage et arrêt de l'application (rien n'est fait à l'import)"""
+    # Schéma selon DB_INIT ; par défaut, aucun accès à la base avant la première requête
+    await run_in_threadpool(init_db)
+    yield
+    password_hasher.shutdown()
+    await dispose_engines()
 
-# Créer les tables dans la base de données
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Budget API",
     description="API de gestion de budget personnel",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configuration CORS
@@ -21,11 +44,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing"],
 )
 
+# Lecture de ses propres écritures d'un processus à l'autre (app/replicas.py)
+app.add_middleware(ReplicaPinMiddleware, router=replica_router, secret=SECRET_KEY)
+
+# Latence, statut et requêtes SQL par route (app/instrumentation.py) ;
+# ajouté en dernier, il englobe CORS et mesure la requête entière
+app.add_middleware(MetricsMiddleware)
+
 # Routes
-app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-app.include_router(transactions.router, prefix="/api/transactions", tags=["Transactions"])
+app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
+app.include_router(transactions_router, prefix="/api/transactions", tags=["Transactions"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Administration"])
 
 @app.get("/")
 def read_root():
@@ -37,3 +69,10 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Métriques par route au format texte Prometheus"""
+        return Response(route_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
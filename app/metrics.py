@@ -0,0 +1,91 @@
+# app/metrics.py - Métriques en mémoire (histogrammes de latence)
+
+import threading
+from typing import Dict, List, Mapping, Sequence
+
+# Bornes par défaut, en secondes (de 1 ms à 10 s)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Histogramme cumulatif à bornes fixes, sûr entre threads.
+
+    Chaque observation incrémente le premier compartiment dont la borne est
+    supérieure ou égale à la valeur ; snapshot() retourne des comptes cumulés
+    (même convention que Prometheus).
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return sum(self._counts)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Compte, somme, maximum et comptes cumulés par borne ("+Inf" inclus)"""
+        with self._lock:
+            cumulative = {}
+            running = 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative[str(bound)] = running
+            running += self._counts[-1]
+            cumulative["+Inf"] = running
+            return {
+                "count": running,
+                "sum": self._sum,
+                "max": self._max,
+                "mean": self._sum / running if running else 0.0,
+                "buckets": cumulative
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+            self._max = 0.0
+
+
+# Format texte Prometheus (exposition 0.0.4)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def prometheus_labels(labels: Mapping[str, object]) -> str:
+    """'{name="value",...}' avec les caractères spéciaux échappés, ou '' sans label"""
+    if not labels:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in labels.values()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def prometheus_histogram(name: str, labels: Mapping[str, object], snapshot: Dict[str, object]) -> List[str]:
+    """Lignes _bucket, _sum et _count d'un Histogram.snapshot()"""
+    lines = [
+        f"{name}_bucket{prometheus_labels({**labels, 'le': bound})} {count}"
+        for bound, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{prometheus_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{prometheus_labels(labels)} {snapshot['count']}")
+    return lines
@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.database import Base
 
+
+def naive_utc(value: datetime) -> datetime:
+    """Date au format des colonnes DateTime : UTC sans fuseau (une date sans fuseau est supposée UTC)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 class User(Base):
     __tablename__ = "users"
     
@@ -11,9 +18,17 @@ class User(Base):
     username = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=lambda:datetime.now(timezone.utc))
+    # Incrémentée pour révoquer tous les tokens émis jusque-là (claim "ver")
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Incrémentée à chaque écriture sur les transactions (ETag des lectures)
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+    data_modified_at = Column(DateTime, nullable=True)
     
     # Relations
     transactions = relationship("Transaction", back_populates="owner", cascade="all, delete-orphan")
+    balance = relationship("UserBalance", back_populates="owner", uselist=False, cascade="all, delete-orphan")
+    monthly_rollups = relationship("MonthlyRollup", back_populates="owner", cascade="all, delete-orphan")
+    search_tokens = relationship("TransactionToken", back_populates="owner", cascade="all, delete-orphan")
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -27,4 +42,47 @@ class Transaction(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Relations
-    owner = relationship("User", back_populates="transactions")
\ No newline at end of file
+    owner = relationship("User", back_populates="transactions")
+
+    __table_args__ = (
+        # Liste et pagination : WHERE user_id = ? ORDER BY date, id
+        Index("ix_transactions_user_date_id", "user_id", "date", "id"),
+        # Filtre par catégorie et agrégats : WHERE user_id = ? [AND category = ?] GROUP BY category
+        Index("ix_transactions_user_category_date", "user_id", "category", "date"),
+    )
+
+class UserBalance(Base):
+    """Totaux maintenus incrémentalement par utilisateur (une ligne par utilisateur)"""
+    __tablename__ = "user_balances"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_income = Column(Float, nullable=False, default=0.0)
+    total_expense = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    # Relations
+    owner = relationship("User", back_populates="balance")
+
+class MonthlyRollup(Base):
+    """Totaux par utilisateur, mois et catégorie, maintenus incrémentalement"""
+    __tablename__ = "monthly_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    year_month = Column(String(7), primary_key=True)  # "YYYY-MM"
+    category = Column(String(50), primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+    # Relations
+    owner = relationship("User", back_populates="monthly_rollups")
+
+class TransactionToken(Base):
+    """Index de recherche applicatif : un mot du titre ou de la description par ligne (voir app/search.py)"""
+    __tablename__ = "transaction_tokens"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    token = Column(String(50), primary_key=True)  # minuscules, sans accents
+    transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), primary_key=True)
+
+    # Relations
+    owner = relationship("User", back_populates="search_tokens")
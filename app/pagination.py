@@ -0,0 +1,31 @@
+# app/pagination.py - Curseurs opaques pour la pagination par clé (keyset)
+#
+# Un curseur encode la clé de tri (date, id) de la dernière ligne d'une page.
+# La page suivante reprend avec WHERE (date, id) > (curseur), ce qui utilise
+# l'index au lieu de parcourir puis jeter `skip` lignes comme OFFSET.
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(date: datetime, transaction_id: int) -> str:
+    """Encoder la clé de tri d'une ligne en curseur opaque"""
+    raw = json.dumps([date.isoformat(), transaction_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Décoder un curseur ; lève une HTTPException 400 s'il est invalide"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date, transaction_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(date), int(transaction_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide"
+        )
@@ -0,0 +1,100 @@
+# app/pool.py - Pool de connexions instrumenté
+#
+# Mesure le temps d'obtention d'une connexion (attente d'une connexion libre,
+# ouverture d'une connexion de débordement, pre-ping) et journalise les
+# obtentions lentes : c'est le premier symptôme d'un pool sous-dimensionné,
+# bien avant les erreurs "QueuePool limit ... overflow ... timed out".
+
+import logging
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.metrics import Histogram
+
+logger = logging.getLogger("app.database")
+
+# Bornes de l'histogramme d'attente, en secondes (de 0,1 ms à 30 s)
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolTelemetry:
+    """Compteurs et histogramme des obtentions de connexion d'un pool"""
+
+    def __init__(self):
+        self.checkout_wait = Histogram(CHECKOUT_BUCKETS)
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        # Seuil de journalisation, en secondes (None = désactivé)
+        self.slow_threshold = None
+        self._lock = threading.Lock()
+
+    def record(self, pool, elapsed: float) -> None:
+        self.checkout_wait.observe(elapsed)
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            with self._lock:
+                self.slow_checkouts += 1
+            logger.warning(
+                "Obtention de connexion lente : %.1f ms (%s)",
+                elapsed * 1000, pool.status()
+            )
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+
+class _InstrumentedPoolMixin:
+    telemetry: PoolTelemetry
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.telemetry.record_timeout()
+            raise
+        finally:
+            self.telemetry.record(self, time.perf_counter() - start)
+
+    def recreate(self):
+        # Pool recréé (dispose, fork...) : garder les mêmes compteurs
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+
+
+def pool_stats(pool) -> dict:
+    """Statistiques instantanées d'un pool (et télémétrie s'il est instrumenté)"""
+    stats = {"class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "timeout": pool.timeout(),
+        })
+    telemetry = getattr(pool, "telemetry", None)
+    if telemetry is not None:
+        stats.update({
+            "checkout_wait": telemetry.checkout_wait.snapshot(),
+            "slow_checkouts": telemetry.slow_checkouts,
+            "timeouts": telemetry.timeouts,
+            "slow_threshold_ms": None if telemetry.slow_threshold is None else telemetry.slow_threshold * 1000,
+        })
+    return stats
@@ -0,0 +1,148 @@
+# app/reads.py - Couche de lecture : colonnes seules, sans entités ORM
+#
+# Les routes de lecture ne modifient jamais ce qu'elles lisent. Les requêtes
+# ne sélectionnent donc que les colonnes utiles et construisent des
+# enregistrements légers (dataclass à __slots__) : pas d'identity map, pas
+# de suivi des modifications ni de relations à câbler. Les écritures restent
+# dans app/crud.py, avec les entités ORM.
+#
+# Mémoire et latence comparées aux entités : python -m benchmarks.bench_reads
+
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import starmap
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app import analytics, ledger
+from app.models import Transaction, User, UserBalance
+from app.pagination import decode_cursor, encode_cursor
+
+
+@dataclass(slots=True)
+class TransactionRecord:
+    """Transaction en lecture seule (mêmes champs que TransactionResponse)"""
+    id: int
+    title: str
+    amount: float
+    category: str
+    description: Optional[str]
+    date: datetime
+    user_id: int
+
+
+# Colonnes de TransactionRecord, dans l'ordre des champs
+TRANSACTION_COLUMNS = (
+    Transaction.id,
+    Transaction.title,
+    Transaction.amount,
+    Transaction.category,
+    Transaction.description,
+    Transaction.date,
+    Transaction.user_id,
+)
+
+
+def get_data_version(db: Session, user_id: int) -> Tuple[int, Optional[datetime]]:
+    """(data_version, data_modified_at) d'un utilisateur : une lecture par clé primaire"""
+    row = db.execute(
+        select(User.data_version, User.data_modified_at).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return 0, None
+    return row.data_version, row.data_modified_at
+
+
+def list_transactions(
+        db: Session,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        category: Optional[str] = None,
+        after: Optional[str] = None
+) -> Tuple[List[TransactionRecord], Optional[str]]:
+    """
+    Lister les transactions triées par (date, id).
+
+    Retourne la page et le curseur de la page suivante (None si la page
+    n'est pas pleine). Avec `after`, `skip` est ignoré.
+    """
+    statement = select(*TRANSACTION_COLUMNS).where(Transaction.user_id == user_id)
+
+    # Filtrer par catégorie si spécifié
+    if category:
+        statement = statement.where(Transaction.category == category)
+
+    statement = statement.order_by(Transaction.date, Transaction.id)
+
+    if after:
+        after_date, after_id = decode_cursor(after)
+        statement = statement.where(or_(
+            Transaction.date > after_date,
+            and_(Transaction.date == after_date, Transaction.id > after_id)
+        ))
+    else:
+        statement = statement.offset(skip)
+
+    transactions = list(starmap(TransactionRecord, db.execute(statement.limit(limit))))
+
+    next_cursor = None
+    if len(transactions) == limit:
+        last = transactions[-1]
+        next_cursor = encode_cursor(last.date, last.id)
+
+    return transactions, next_cursor
+
+
+def get_transaction(db: Session, user_id: int, transaction_id: int) -> TransactionRecord:
+    """Lire une transaction de l'utilisateur (HTTPException 404 sinon)"""
+    row = db.execute(
+        select(*TRANSACTION_COLUMNS).where(
+            Transaction.id == transaction_id,
+            Transaction.user_id == user_id
+        )
+    ).first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transaction non trouvée"
+        )
+
+    return TransactionRecord(*row)
+
+
+def get_summary(db: Session, user_id: int) -> dict:
+    """Résumé financier lu depuis le solde maintenu (une seule ligne)"""
+    row = db.execute(
+        select(UserBalance.total_income, UserBalance.total_expense, UserBalance.transaction_count)
+        .where(UserBalance.user_id == user_id)
+    ).first()
+    if row is None:
+        # Utilisateur créé avant la table : recalcul sans écriture (la session peut
+        # être sur un réplica) ; la ligne est créée à la prochaine écriture
+        summary = ledger.compute_summary(db, user_id)
+        row = (summary["total_income"], summary["total_expense"], summary["transaction_count"])
+
+    total_income, total_expense, transaction_count = row
+    return {
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "balance": total_income - total_expense,
+        "transaction_count": transaction_count
+    }
+
+
+def get_timeseries(
+        db: Session,
+        user_id: int,
+        bucket: str = "month",
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        by_category: bool = False
+) -> List[dict]:
+    """Revenus, dépenses et solde net par période (mois clos lus dans monthly_rollups)"""
+    return analytics.timeseries(db, user_id, bucket, date_from, date_to, by_category)
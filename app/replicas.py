@@ -0,0 +1,268 @@
+# app/replicas.py - Répartition des lectures entre réplicas et primaire
+#
+# Les sessions de lecture (ReadSessionLocal, voir app/database.py) demandent
+# leur engine à la première requête SQL, une fois l'utilisateur authentifié :
+#   - un utilisateur qui vient d'écrire reste sur le primaire pendant
+#     DB_REPLICA_PIN_SECONDS (il relit ses propres écritures malgré le retard
+#     de réplication) ;
+#   - sinon, les réplicas sains sont utilisés à tour de rôle ;
+#   - aucun réplica sain : lecture sur le primaire.
+# Un réplica est vérifié (SELECT 1) au plus toutes les DB_REPLICA_CHECK_SECONDS,
+# au moment où il est choisi ; une erreur de connexion le met de côté jusqu'à
+# la vérification suivante.
+# L'épinglage est gardé en mémoire par le processus qui a servi l'écriture et
+# porté par le client pour les autres (workers uvicorn, instances derrière un
+# répartiteur) : ReplicaPinMiddleware pose sur la réponse d'une écriture un
+# cookie signé (HMAC de SECRET_KEY), valable DB_REPLICA_PIN_SECONDS, et le
+# vérifie sur les requêtes suivantes.
+
+import hashlib
+import hmac
+import itertools
+import logging
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from app.pool import pool_stats
+
+logger = logging.getLogger("app.database")
+
+# Cookie de l'épinglage : "<utilisateur>.<expiration (epoch)>.<signature>"
+PIN_COOKIE = "read_pin"
+
+
+class RequestPin:
+    """Épinglage de la requête en cours : reçu du client, ou à lui renvoyer après une écriture"""
+    __slots__ = ("user_id", "until", "written")
+
+    def __init__(self, user_id: Optional[int] = None, until: float = 0.0):
+        self.user_id = user_id
+        self.until = until
+        self.written: Optional[int] = None
+
+
+_request_pin: ContextVar[Optional[RequestPin]] = ContextVar("request_pin", default=None)
+
+
+def _signature(secret: str, payload: str) -> str:
+    return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def sign_pin(secret: str, user_id: int, until: int) -> str:
+    """Valeur du cookie d'épinglage"""
+    payload = f"{user_id}.{until}"
+    return f"{payload}.{_signature(secret, payload)}"
+
+
+def read_pin(secret: str, value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(utilisateur, expiration) d'un cookie d'épinglage, None s'il est absent, altéré ou mal formé"""
+    if not value:
+        return None
+    payload, _, signature = value.rpartition(".")
+    if not hmac.compare_digest(_signature(secret, payload), signature):
+        return None
+    user_id, _, until = payload.partition(".")
+    try:
+        return int(user_id), int(until)
+    except ValueError:
+        return None
+
+
+class Replica:
+    """Un réplica : engine créé au premier usage et état de santé"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = None
+        self.healthy = True
+        self.checked_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.reads = 0
+
+    def display_url(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+
+class ReplicaRouter:
+    """Choix de l'engine des lectures, épinglage au primaire après écriture, santé des réplicas"""
+
+    def __init__(self, urls: List[str], engine_factory: Callable, pin_seconds: float = 5.0,
+                 check_seconds: float = 10.0):
+        self.replicas = [Replica(url) for url in urls]
+        self.pin_seconds = pin_seconds
+        self.check_seconds = check_seconds
+        self.pinned_reads = 0
+        self.fallback_reads = 0
+        self._engine_factory = engine_factory
+        self._pins: Dict[int, float] = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    # Lecture de ses propres écritures
+
+    def pin(self, user_id: int) -> None:
+        """Garder les lectures de l'utilisateur sur le primaire (appelé à chaque écriture)"""
+        if not self.replicas or self.pin_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._pins[user_id] = now + self.pin_seconds
+            # Purge des épinglages expirés, sans parcourir le dictionnaire à chaque écriture
+            if len(self._pins) > 1000:
+                self._pins = {user: until for user, until in self._pins.items() if until > now}
+        # Renvoyé au client par ReplicaPinMiddleware, pour les requêtes servies par un autre processus
+        request_pin = _request_pin.get()
+        if request_pin is not None:
+            request_pin.written = user_id
+
+    def is_pinned(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        request_pin = _request_pin.get()
+        if request_pin is not None and request_pin.user_id == user_id and request_pin.until > time.time():
+            return True
+        with self._lock:
+            until = self._pins.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    # Santé
+
+    def _engine(self, replica: Replica):
+        with self._lock:
+            if replica.engine is None:
+                replica.engine = self._engine_factory(replica.url)
+                event.listen(replica.engine, "handle_error", self._error_listener(replica))
+            return replica.engine
+
+    def _error_listener(self, replica: Replica):
+        def handle_error(context):
+            # Connexion perdue ou impossible : réplica écarté jusqu'à la prochaine vérification
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(replica, context.original_exception)
+        return handle_error
+
+    def mark_down(self, replica: Replica, error: BaseException) -> None:
+        with self._lock:
+            was_healthy = replica.healthy
+            replica.healthy = False
+            replica.checked_at = time.monotonic()
+            replica.last_error = f"{type(error).__name__}: {error}"
+        if was_healthy:
+            logger.warning("Réplica %s écarté : %s", replica.display_url(), replica.last_error)
+
+    def check(self, replica: Replica) -> bool:
+        """Vérifier un réplica (SELECT 1) et mettre à jour son état"""
+        try:
+            with self._engine(replica).connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as error:
+            self.mark_down(replica, error)
+            return False
+        with self._lock:
+            was_healthy = replica.healthy
+            replica.healthy = True
+            replica.checked_at = time.monotonic()
+            replica.last_error = None
+        if not was_healthy:
+            logger.warning("Réplica %s de nouveau disponible", replica.display_url())
+        return True
+
+    def _available(self, replica: Replica) -> bool:
+        checked_at = replica.checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.check_seconds:
+            return replica.healthy
+        return self.check(replica)
+
+    # Routage
+
+    def engine_for_read(self, user_id: Optional[int]):
+        """Engine d'un réplica sain, ou None pour lire sur le primaire"""
+        if not self.replicas:
+            return None
+        if self.is_pinned(user_id):
+            with self._lock:
+                self.pinned_reads += 1
+            return None
+
+        start = next(self._turn)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if self._available(replica):
+                with self._lock:
+                    replica.reads += 1
+                return self._engine(replica)
+
+        with self._lock:
+            self.fallback_reads += 1
+        return None
+
+    def stats(self) -> dict:
+        """Configuration, lectures par destination et état de chaque réplica"""
+        now = time.monotonic()
+        with self._lock:
+            pinned_users = sum(1 for until in self._pins.values() if until > now)
+            return {
+                "pin_seconds": self.pin_seconds,
+                "check_seconds": self.check_seconds,
+                "pinned_users": pinned_users,
+                "pinned_reads": self.pinned_reads,
+                "fallback_reads": self.fallback_reads,
+                "replicas": [
+                    {
+                        "url": replica.display_url(),
+                        "healthy": replica.healthy,
+                        "last_check_seconds_ago": None if replica.checked_at is None
+                        else round(now - replica.checked_at, 3),
+                        "last_error": replica.last_error,
+                        "reads": replica.reads,
+                        "pool": None if replica.engine is None else pool_stats(replica.engine.pool),
+                    }
+                    for replica in self.replicas
+                ],
+            }
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            if replica.engine is not None:
+                replica.engine.dispose()
+
+
+class ReplicaPinMiddleware:
+    """Épinglage au primaire porté par un cookie signé, valable quel que soit le processus (ASGI pur)"""
+
+    def __init__(self, app, router: ReplicaRouter, secret: str):
+        self.app = app
+        self.router = router
+        self.secret = secret
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.router.replicas or self.router.pin_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        received = read_pin(self.secret, HTTPConnection(scope).cookies.get(PIN_COOKIE))
+        request_pin = RequestPin(*received) if received is not None else RequestPin()
+        token = _request_pin.set(request_pin)
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and request_pin.written is not None:
+                until = math.ceil(time.time() + self.router.pin_seconds)
+                MutableHeaders(scope=message).append(
+                    "Set-Cookie",
+                    f"{PIN_COOKIE}={sign_pin(self.secret, request_pin.written, until)}; "
+                    f"Max-Age={math.ceil(self.router.pin_seconds)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            _request_pin.reset(token)
@@ -0,0 +1,96 @@
+# app/response_cache.py - Cache des réponses de lecture (liste, résumé)
+#
+# Les mêmes requêtes arrivent de plusieurs onglets et appareils d'un même
+# utilisateur : le corps JSON déjà sérialisé est gardé sous une clé
+# (utilisateur, data_version, route, paramètres). data_version est lu en base
+# à chaque requête (voir app/http_cache.py) : une écriture faite par un autre
+# processus change la clé, une entrée périmée n'est donc jamais servie. Les
+# écritures invalident en plus les entrées de l'utilisateur pour libérer la
+# mémoire tout de suite.
+
+import os
+from typing import Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+from dotenv import load_dotenv
+
+from app.cache import CacheBackend, MemoryCacheBackend, RedisCacheBackend
+
+load_dotenv()
+
+# memory (par défaut), redis (RESPONSE_CACHE_URL) ou none
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 10000))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 300))
+
+
+class ResponseCache:
+    """
+    Corps de réponses sérialisés, avec un en-tête optionnel (X-Next-Cursor).
+
+    Une entrée est stockée en octets : l'en-tête, un saut de ligne, puis le
+    corps JSON. Le curseur (base64url) ne contient jamais de saut de ligne.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def user_prefix(user_id: int) -> str:
+        return f"resp:{user_id}:"
+
+    @classmethod
+    def key(cls, user_id: int, data_version: int, route: str, params: Mapping[str, object] = None) -> str:
+        query = urlencode(sorted((name, value) for name, value in (params or {}).items() if value is not None))
+        return f"{cls.user_prefix(user_id)}{data_version}:{route}?{query}"
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """(corps, en-tête) en cache, ou None"""
+        if self.backend is None:
+            return None
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        header, _, body = entry.partition(b"\n")
+        return body, header.decode() or None
+
+    def set(self, key: str, body: bytes, header: Optional[str] = None) -> None:
+        if self.backend is not None:
+            self.backend.set(key, (header or "").encode() + b"\n" + body, self.ttl)
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Supprimer les réponses en cache d'un utilisateur (après une écriture)"""
+        if self.backend is None:
+            return 0
+        return self.backend.delete_prefix(self.user_prefix(user_id))
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        if self.backend is None:
+            return {"backend": None}
+        return {"ttl": self.ttl, **self.backend.stats()}
+
+
+def create_backend(name: str) -> Optional[CacheBackend]:
+    if name == "none":
+        return None
+    if name == "redis":
+        return RedisCacheBackend.from_url(RESPONSE_CACHE_URL)
+    if name == "memory":
+        return MemoryCacheBackend(
+            maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL_SECONDS, max_bytes=RESPONSE_CACHE_MAX_BYTES
+        )
+    raise ValueError(f"RESPONSE_CACHE_BACKEND inconnu : {name}")
+
+
+response_cache = ResponseCache(create_backend(RESPONSE_CACHE_BACKEND), RESPONSE_CACHE_TTL_SECONDS)
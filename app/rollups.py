@@ -0,0 +1,180 @@
+# app/rollups.py - Totaux mensuels maintenus (table monthly_rollups)
+#
+# Comme le solde de app/ledger.py, les handlers d'écriture appliquent des
+# deltas par (mois, catégorie) dans la même transaction DB que la
+# modification. Les mois clos ne changent plus en pratique : les séries
+# mensuelles les lisent ici au lieu de parcourir les transactions.
+# `python -m app.rollups verify` compare la table aux transactions et
+# `python -m app.rollups rebuild` la recalcule (backfill après migration).
+
+import argparse
+import sys
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.analytics import period_start
+from app.ledger import totals_match
+from app.models import MonthlyRollup, Transaction
+
+
+def month_key(value: datetime) -> str:
+    """Clé de mois 'YYYY-MM' d'une date"""
+    return value.strftime("%Y-%m")
+
+
+def _upsert(db: Session, user_id: int, year_month: str, category: str, amount: float, count: int) -> None:
+    values = dict(user_id=user_id, year_month=year_month, category=category, total=amount, count=count)
+    dialect = db.get_bind().dialect.name
+
+    # Une seule requête quand le dialecte sait fusionner insertion et mise à jour
+    if dialect in ("sqlite", "postgresql"):
+        insert_ = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = insert_(MonthlyRollup).values(**values)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["user_id", "year_month", "category"],
+            set_={
+                "total": MonthlyRollup.total + statement.excluded.total,
+                "count": MonthlyRollup.count + statement.excluded.count
+            }
+        ))
+        return
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql_insert(MonthlyRollup).values(**values)
+        db.execute(statement.on_duplicate_key_update(
+            total=MonthlyRollup.total + statement.inserted.total,
+            count=MonthlyRollup.count + statement.inserted.count
+        ))
+        return
+
+    # Autres dialectes : UPDATE relatif, sinon INSERT dans un savepoint ; si une
+    # requête concurrente a créé la ligne entre-temps, le delta passe par UPDATE
+    update_statement = update(MonthlyRollup).where(
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.year_month == year_month,
+        MonthlyRollup.category == category
+    ).values(
+        total=MonthlyRollup.total + amount,
+        count=MonthlyRollup.count + count
+    )
+    if db.execute(update_statement).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(MonthlyRollup).values(**values))
+    except IntegrityError:
+        db.execute(update_statement)
+
+
+def apply_changes(db: Session, user_id: int, changes: Iterable[Tuple[datetime, str, float, int]]) -> None:
+    """
+    Appliquer des deltas (date, category, amount, count) aux totaux mensuels.
+
+    Les deltas sont regroupés par (mois, catégorie) : une mise à jour relative
+    par groupe (total = total + delta), qui crée la ligne si elle n'existe pas.
+    """
+    deltas = {}
+    for date, category, amount, count in changes:
+        key = (month_key(date), category)
+        total, total_count = deltas.get(key, (0.0, 0))
+        deltas[key] = (total + amount, total_count + count)
+
+    for (year_month, category), (amount, count) in deltas.items():
+        _upsert(db, user_id, year_month, category, amount, count)
+
+
+def compute_rollups(db: Session, user_id: Optional[int] = None) -> dict:
+    """Recalculer les totaux {(user_id, year_month, category): (total, count)} depuis transactions"""
+    month = period_start(Transaction.date, "month")
+    query = db.query(
+        Transaction.user_id,
+        month,
+        Transaction.category,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    rows = query.group_by(Transaction.user_id, month, Transaction.category)
+
+    return {
+        (row_user_id, period[:7], category): (total or 0.0, count)
+        for row_user_id, period, category, total, count in rows
+    }
+
+
+def rebuild_rollups(db: Session, fix: bool = True, user_id: Optional[int] = None) -> List[dict]:
+    """
+    Comparer monthly_rollups aux totaux recalculés depuis transactions.
+
+    Retourne la liste des écarts trouvés ; si `fix` est vrai, les lignes
+    fausses, manquantes ou en trop sont corrigées et la transaction est validée.
+    """
+    actual = compute_rollups(db, user_id)
+    query = db.query(MonthlyRollup)
+    if user_id is not None:
+        query = query.filter(MonthlyRollup.user_id == user_id)
+    stored = {(row.user_id, row.year_month, row.category): row for row in query}
+
+    drifts = []
+    for key in sorted(actual.keys() | stored.keys()):
+        total, count = actual.get(key, (0.0, 0))
+        row = stored.get(key)
+        # Une ligne à zéro sans transaction (mois entièrement supprimé) est correcte
+        if row is not None and totals_match(row.total, total) and row.count == count:
+            continue
+        drifts.append({
+            "user_id": key[0],
+            "year_month": key[1],
+            "category": key[2],
+            "stored": None if row is None else (row.total, row.count),
+            "actual": (total, count)
+        })
+        if fix:
+            if row is None:
+                db.add(MonthlyRollup(
+                    user_id=key[0], year_month=key[1], category=key[2], total=total, count=count
+                ))
+            else:
+                row.total, row.count = total, count
+
+    if fix:
+        db.commit()
+    return drifts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.rollups",
+        description="Vérifier ou reconstruire la table monthly_rollups"
+    )
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--user-id", type=int, default=None, help="limiter à un utilisateur")
+    args = parser.parse_args(argv)
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        drifts = rebuild_rollups(db, fix=args.command == "rebuild", user_id=args.user_id)
+    finally:
+        db.close()
+
+    for drift in drifts:
+        print(
+            f"user_id={drift['user_id']} {drift['year_month']} {drift['category']}: "
+            f"stocké={drift['stored']} réel={drift['actual']}"
+        )
+    print(f"{len(drifts)} écart(s) trouvé(s)" + (", corrigé(s)" if args.command == "rebuild" and drifts else ""))
+
+    return 1 if drifts and args.command == "verify" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
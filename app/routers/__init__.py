@@ -0,0 +1,36 @@
+from typing import Callable, Dict
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+
+
+def override_endpoints(router: APIRouter, endpoints: Dict[str, Callable]) -> APIRouter:
+    """
+    Copier `router` en remplaçant certaines routes par d'autres implémentations.
+
+    `endpoints` associe le nom d'une route (nom de la fonction) à sa nouvelle
+    fonction. Chemin, méthodes, modèle de réponse, code de statut et
+    documentation (openapi_extra compris) sont repris de la route d'origine ;
+    l'ordre des routes est conservé, ce qui évite qu'un chemin comme
+    /{transaction_id} masque les routes déclarées avant lui.
+    """
+    overridden = APIRouter()
+    for route in router.routes:
+        endpoint = endpoints.get(route.name) if isinstance(route, APIRoute) else None
+        if endpoint is None:
+            overridden.routes.append(route)
+            continue
+        overridden.add_api_route(
+            route.path,
+            endpoint,
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            name=route.name,
+            response_class=route.response_class,
+            openapi_extra=route.openapi_extra,
+        )
+    return overridden
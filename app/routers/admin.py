@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from typing import Optional
+import os
+import secrets
+from dotenv import load_dotenv
+from app.auth import user_cache
+from app.database import get_async_engine_if_created, get_engine, replica_router
+from app.hashing import password_hasher
+from app.pool import pool_stats
+from app.response_cache import response_cache
+from app.slow_queries import slow_query_log
+
+load_dotenv()
+
+# Clé d'accès aux routes d'administration (désactivées si vide)
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+
+
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Vérifier l'en-tête X-Admin-Key des routes d'administration"""
+    if not ADMIN_API_KEY or x_admin_key is None or not secrets.compare_digest(x_admin_key, ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès réservé à l'administration"
+        )
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/stats/auth-cache")
+def get_auth_cache_stats():
+    """
+    Statistiques du cache des utilisateurs authentifiés.
+
+    Returns:
+        dict: taille, capacité, hits, misses, évictions et taux de hit
+    """
+    return user_cache.stats()
+
+
+@router.get("/stats/password-hashing")
+def get_password_hashing_stats():
+    """
+    Statistiques du pool de hachage bcrypt.
+
+    Returns:
+        dict: configuration, calculs en attente, refus (503) et histogrammes
+        de latence (en secondes) du hachage et de la vérification
+    """
+    return password_hasher.stats()
+
+
+@router.get("/stats/db-pool")
+def get_db_pool_stats():
+    """
+    Statistiques du pool de connexions à la base de données.
+
+    Returns:
+        dict: pour l'engine synchrone (et asynchrone s'il est utilisé) :
+        connexions utilisées, libres et en débordement, histogramme du temps
+        d'obtention d'une connexion (en secondes), obtentions lentes et timeouts
+    """
+    stats = {"sync": pool_stats(get_engine().pool)}
+    async_engine = get_async_engine_if_created()
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.pool)
+    return stats
+
+
+@router.get("/stats/db-replicas")
+def get_db_replica_stats():
+    """
+    Statistiques des réplicas en lecture.
+
+    Returns:
+        dict: durée d'épinglage au primaire après une écriture, utilisateurs
+        épinglés, lectures envoyées au primaire (épinglées ou faute de réplica
+        sain) et, pour chaque réplica : état, dernière vérification, dernière
+        erreur, lectures servies et pool de connexions
+    """
+    return replica_router.stats()
+
+
+@router.get("/stats/response-cache")
+def get_response_cache_stats():
+    """
+    Statistiques du cache des réponses (liste et résumé des transactions).
+
+    Returns:
+        dict: backend, entrées, hits, misses, taux de hit, évictions et
+        mémoire utilisée (en octets)
+    """
+    return response_cache.stats()
+
+
+@router.get("/stats/slow-queries")
+def get_slow_queries(limit: Optional[int] = Query(None, ge=1)):
+    """
+    Dernières requêtes SQL lentes, les plus lentes en tête.
+
+    Args:
+        limit: nombre maximum de requêtes retournées (toutes par défaut)
+
+    Returns:
+        dict: seuil (en ms), EXPLAIN activé, taille du tampon, nombre total
+        de requêtes lentes et, pour chacune : durée, SQL, types des
+        paramètres, route, utilisateur et plan d'exécution
+    """
+    return slow_query_log.stats(limit)
@@ -1,67 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from datetime import timedelta
+from app import crud
 from app.database import get_db
-from app.models import User
+from app.hashing import password_hasher
 from app.schemas import UserCreate, UserResponse, Token
 from app.auth import (
-    get_password_hash,
-    verify_password,
-    create_access_token,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    UserPrincipal,
+    get_current_user,
+    create_user_access_token,
+    login_exception,
+    revoke_tokens
 )
 
 router = APIRouter()
 
+# Routes asynchrones : les accès DB passent par le pool de threads et bcrypt
+# par le pool de processus de app.hashing, sans bloquer un thread pendant le hachage
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     """Créer un nouveau utilisateur"""
     
-    # Vérifier si l'email existe déjà
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cet email est déjà enregistré"
-        )
-    
-    # Vérifier si le username existe déjà
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Ce nom d'utilisateur est déjà pris"
-        )
+    await run_in_threadpool(crud.check_user_available, db, user)
     
     # Créer l'utilisateur
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        username=user.username,
-        hashed_password=hashed_password
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    hashed_password = await password_hasher.hash(user.password)
+    return await run_in_threadpool(crud.create_user, db, user, hashed_password)
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Connexion et obtention du token JWT"""
     
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Nom d'utilisateur ou mot de passe incorrect",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = await run_in_threadpool(crud.get_user_by_username, db, form_data.username)
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
+        raise login_exception()
+    
+    return {"access_token": create_user_access_token(user), "token_type": "bearer"}
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+def revoke(db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
+    """Révoquer tous les tokens de l'utilisateur connecté (déconnexion partout)"""
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
+    token_version = crud.bump_token_version(db, current_user.id)
+    revoke_tokens(current_user.id, token_version)
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return None
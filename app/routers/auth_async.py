@@ -0,0 +1,46 @@
+# Routes d'authentification en mode asynchrone (DB_ASYNC=true)
+
+from fastapi import Depends
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud
+from app.database import get_async_db
+from app.hashing import password_hasher
+from app.schemas import UserCreate
+from app.auth import (
+    UserPrincipal,
+    get_current_user_async,
+    create_user_access_token,
+    login_exception,
+    revoke_tokens
+)
+from app.routers import auth, override_endpoints
+
+
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(crud.check_user_available, user)
+
+    hashed_password = await password_hasher.hash(user.password)
+    return await db.run_sync(crud.create_user, user, hashed_password)
+
+
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.run_sync(crud.get_user_by_username, form_data.username)
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
+        raise login_exception()
+
+    return {"access_token": create_user_access_token(user), "token_type": "bearer"}
+
+
+async def revoke(db: AsyncSession = Depends(get_async_db), current_user: UserPrincipal = Depends(get_current_user_async)):
+    token_version = await db.run_sync(crud.bump_token_version, current_user.id)
+    revoke_tokens(current_user.id, token_version)
+
+    return None
+
+
+router = override_endpoints(auth.router, {
+    "register": register,
+    "login": login,
+    "revoke": revoke,
+})
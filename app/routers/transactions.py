@@ -1,19 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.models import Transaction, User
-from app.schemas import TransactionCreate, TransactionResponse, TransactionUpdate
-from app.auth import get_current_user
+from datetime import datetime
+from typing import List, Literal, Optional, Tuple
+import json
+import os
+from app import crud, export, http_cache, reads, search
+from app.serialization import dump_json, dump_transactions
+from app.database import get_db, get_read_db
+from app.response_cache import response_cache
+from app.schemas import (
+    BatchResult,
+    BulkImportError,
+    BulkImportResponse,
+    TimeseriesPoint,
+    TransactionBatchUpdate,
+    TransactionCreate,
+    TransactionFilter,
+    TransactionResponse,
+    TransactionUpdate
+)
+from app.auth import UserPrincipal, get_current_principal, get_current_user
 
 router = APIRouter()
 
+# Nombre maximal de lignes par import en masse
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", 100000))
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# Validation d'un import entier (tableau JSON) en un appel
+_bulk_adapter = TypeAdapter(List[TransactionCreate])
+
 
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 def create_transaction(
         transaction: TransactionCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_user)
 ):
     """
     Créer une nouvelle transaction financière pour l'utilisateur connecté.
@@ -33,69 +58,400 @@ def create_transaction(
         HTTPException 400: Catégorie invalide (doit être 'income' ou 'expense')
         HTTPException 401: Token JWT invalide ou expiré
     """
-    # Valider la catégorie
-    if transaction.category not in ["income", "expense"]:
+    created = crud.create_transaction(db, current_user.id, transaction)
+    response_cache.invalidate_user(current_user.id)
+
+    return created
+
+
+def check_data_version(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_read_db),
+        current_user: UserPrincipal = Depends(get_current_principal)
+) -> int:
+    """
+    Dépendance des lectures : ETag depuis users.data_version, 304 si If-None-Match correspond.
+
+    Retourne data_version, qui fait partie de la clé du cache des réponses.
+    """
+    data_version, data_modified_at = reads.get_data_version(db, current_user.id)
+    http_cache.check_not_modified(request, response, current_user.id, data_version, data_modified_at)
+    return data_version
+
+
+def json_response(response: Response, body: bytes) -> Response:
+    """Réponse JSON déjà sérialisée, avec les en-têtes posés par les dépendances (ETag...)"""
+    return Response(body, media_type="application/json", headers=dict(response.headers))
+
+
+def _validate_bulk_row(index: int, row, valid: list, errors: list) -> None:
+    """Valider une ligne d'import ; les erreurs sont collectées, pas levées"""
+    try:
+        transaction = TransactionCreate.model_validate(row)
+    except ValidationError as e:
+        detail = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'ligne'}: {error['msg']}"
+            for error in e.errors()
+        )
+        errors.append(BulkImportError(index=index, detail=detail))
+        return
+    _check_bulk_category(index, transaction, valid, errors)
+
+
+def _check_bulk_category(index: int, transaction: TransactionCreate, valid: list, errors: list) -> None:
+    if transaction.category not in crud.CATEGORIES:
+        errors.append(BulkImportError(index=index, detail="La catégorie doit être 'income' ou 'expense'"))
+        return
+    valid.append(transaction)
+
+
+def _check_bulk_size(count: int) -> None:
+    if count > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,  # Content Too Large (nom de constante différent selon Starlette)
+            detail=f"Import limité à {BULK_IMPORT_MAX_ROWS} transactions par requête"
+        )
+
+
+def _parse_bulk_array(body: bytes) -> Tuple[List[TransactionCreate], List[BulkImportError]]:
+    """Décoder et valider un tableau JSON de transactions (exécuté dans le pool de threads)"""
+    # Cas courant, toutes les lignes valides : décodage et validation en une passe (pydantic-core)
+    try:
+        transactions = _bulk_adapter.validate_json(body)
+    except ValidationError:
+        pass
+    else:
+        _check_bulk_size(len(transactions))
+        valid, errors = [], []
+        for index, transaction in enumerate(transactions):
+            _check_bulk_category(index, transaction, valid, errors)
+        return valid, errors
+
+    # Sinon, ligne par ligne pour signaler chaque erreur avec sa position
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="JSON invalide")
+    if not isinstance(rows, list):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="La catégorie doit être 'income' ou 'expense'"
+            detail="Le corps doit être un tableau JSON de transactions"
         )
+    _check_bulk_size(len(rows))
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        _validate_bulk_row(index, row, valid, errors)
+    return valid, errors
+
+
+async def _read_bulk_rows(request: Request) -> Tuple[List[TransactionCreate], List[BulkImportError]]:
+    """Lire et valider le corps d'un import : tableau JSON ou flux NDJSON"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in NDJSON_MEDIA_TYPES:
+        return await run_in_threadpool(_parse_bulk_array, await request.body())
+
+    # Le flux est validé au fil de l'eau, par paquet de lignes reçues, hors de la boucle d'événements
+    valid, errors = [], []
+    index = 0
+    buffer = b""
+
+    def handle_lines(lines: List[bytes]) -> None:
+        nonlocal index
+        for line in lines:
+            if not line.strip():
+                continue
+            _check_bulk_size(index + 1)
+            try:
+                row = json.loads(line)
+            except ValueError:
+                errors.append(BulkImportError(index=index, detail="JSON invalide"))
+            else:
+                _validate_bulk_row(index, row, valid, errors)
+            index += 1
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if lines:
+            await run_in_threadpool(handle_lines, lines)
+    await run_in_threadpool(handle_lines, [buffer])
+    return valid, errors
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkImportResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/TransactionCreate"}}
+                },
+                "application/x-ndjson": {
+                    "schema": {"type": "string", "description": "Une transaction JSON par ligne"}
+                },
+            },
+        }
+    },
+)
+async def bulk_create_transactions(
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Importer des transactions en masse (migration depuis une banque par exemple).
 
-    db_transaction = Transaction(
-        **transaction.model_dump(),
-        user_id=current_user.id
-    )
-    db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
+    Le corps est un tableau JSON de transactions, ou un flux NDJSON (une
+    transaction par ligne, Content-Type: application/x-ndjson). Toutes les
+    lignes sont validées avant l'écriture ; les lignes valides sont insérées
+    par lots dans une seule transaction DB, les lignes invalides sont
+    ignorées et signalées avec leur position.
+
+    Args:
+        request: Requête HTTP (corps lu en flux)
+        db: Session de base de données
+        current_user: Utilisateur authentifié
+
+    Returns:
+        Nombre de transactions insérées et erreurs par ligne
+
+    Raises:
+        HTTPException 400: Corps JSON invalide ou qui n'est pas un tableau
+        HTTPException 401: Token JWT invalide ou expiré
+        HTTPException 413: Plus de BULK_IMPORT_MAX_ROWS lignes
+    """
+    valid, errors = await _read_bulk_rows(request)
+    inserted = await run_in_threadpool(crud.bulk_create_transactions, db, current_user.id, valid)
+    if inserted:
+        await run_in_threadpool(response_cache.invalidate_user, current_user.id)
+
+    return BulkImportResponse(inserted=inserted, errors=errors)
+
+
+@router.patch("/batch", response_model=BatchResult)
+def batch_update_transactions(
+        batch: TransactionBatchUpdate,
+        db: Session = Depends(get_db),
+        current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Modifier plusieurs transactions en une requête (recatégorisation par exemple).
+
+    Les transactions sont ciblées par une liste d'ids et/ou un filtre
+    (catégorie, intervalle de dates) ; les critères fournis sont combinés.
+    Les champs de `changes` sont appliqués à toutes les transactions ciblées
+    par un seul UPDATE, dans une transaction DB avec la mise à jour du solde :
+    tout est appliqué ou rien.
+
+    Args:
+        batch: Critères (ids, category, date_from, date_to) et changements à appliquer
+        db: Session de base de données
+        current_user: Utilisateur authentifié
+
+    Returns:
+        Nombre de transactions modifiées
+
+    Raises:
+        HTTPException 400: Aucun critère, aucun changement ou catégorie invalide
+        HTTPException 401: Token JWT invalide ou expiré
+        HTTPException 422: Plus de 1000 ids
+    """
+    affected = crud.batch_update_transactions(db, current_user.id, batch)
+    if affected:
+        response_cache.invalidate_user(current_user.id)
+
+    return BatchResult(affected=affected)
+
+
+@router.delete("/batch", response_model=BatchResult)
+def batch_delete_transactions(
+        criteria: TransactionFilter,
+        db: Session = Depends(get_db),
+        current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Supprimer plusieurs transactions en une requête.
+
+    Les transactions sont ciblées comme pour PATCH /batch (ids et/ou filtre),
+    puis supprimées par un seul DELETE dans une transaction DB avec la mise
+    à jour du solde. Cette action est irréversible.
+
+    Args:
+        criteria: Critères (ids, category, date_from, date_to) dans le corps JSON
+        db: Session de base de données
+        current_user: Utilisateur authentifié
+
+    Returns:
+        Nombre de transactions supprimées
+
+    Raises:
+        HTTPException 400: Aucun critère fourni
+        HTTPException 401: Token JWT invalide ou expiré
+        HTTPException 422: Plus de 1000 ids
+    """
+    affected = crud.batch_delete_transactions(db, current_user.id, criteria)
+    if affected:
+        response_cache.invalidate_user(current_user.id)
 
-    return db_transaction
+    return BatchResult(affected=affected)
 
 
 @router.get("/", response_model=List[TransactionResponse])
 def get_transactions(
-        skip: int = 0,
-        limit: int = 100,
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=100),
         category: str = None,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        after: Optional[str] = None,
+        db: Session = Depends(get_read_db),
+        current_user: UserPrincipal = Depends(get_current_principal),
+        data_version: int = Depends(check_data_version)
 ):
     """
     Récupérer la liste des transactions de l'utilisateur avec filtres et pagination.
 
-    Permet de filtrer par catégorie et de paginer les résultats pour
-    une meilleure performance avec de grandes quantités de données.
+    Les transactions sont triées par (date, id). Deux modes de pagination :
+    - `skip`/`limit` (historique) : OFFSET, de plus en plus lent sur les pages profondes
+    - `after`/`limit` (recommandé) : reprend après le curseur de la page précédente
+
+    Quand la page est pleine, l'en-tête `X-Next-Cursor` contient le curseur
+    opaque à passer dans `after` pour obtenir la page suivante.
+
+    La réponse porte un ETag qui change à chaque écriture de l'utilisateur :
+    avec `If-None-Match`, une liste inchangée est confirmée par un 304 sans
+    requête sur les transactions. Les pages déjà servies sont gardées en
+    cache côté serveur jusqu'à la prochaine écriture.
 
     Args:
-        skip: Nombre de transactions à ignorer (pour la pagination)
+        response: Réponse HTTP (pour l'en-tête X-Next-Cursor)
+        skip: Nombre de transactions à ignorer (ignoré si `after` est fourni)
         limit: Nombre maximum de transactions à retourner (max 100)
         category: Filtre optionnel par catégorie ('income' ou 'expense')
+        after: Curseur `X-Next-Cursor` renvoyé par la page précédente
         db: Session de base de données
         current_user: Utilisateur authentifié
+        data_version: Version des données (ETag, clé du cache des réponses)
 
     Returns:
         Liste des transactions correspondant aux critères de recherche
+        (304 sans contenu si l'ETag du client est à jour)
 
     Raises:
+        HTTPException 400: Curseur invalide
         HTTPException 401: Token JWT invalide ou expiré
+        HTTPException 422: limit hors de l'intervalle [1, 100]
     """
-    query = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id
+    key = response_cache.key(
+        current_user.id, data_version, "list",
+        {"skip": skip, "limit": limit, "category": category, "after": after}
     )
+    cached = response_cache.get(key)
+    if cached is None:
+        transactions, next_cursor = reads.list_transactions(
+            db, current_user.id, skip=skip, limit=limit, category=category, after=after
+        )
+        body = dump_transactions(transactions)
+        response_cache.set(key, body, next_cursor)
+    else:
+        body, next_cursor = cached
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return json_response(response, body)
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_transactions(
+        format: Literal["csv", "ndjson"] = "csv",
+        category: Optional[str] = None,
+        date_from: Optional[datetime] = Query(None, alias="from"),
+        date_to: Optional[datetime] = Query(None, alias="to"),
+        current_user: UserPrincipal = Depends(get_current_principal)
+):
+    """
+    Exporter toutes les transactions de l'utilisateur en CSV ou en NDJSON.
+
+    La réponse est envoyée en flux : les lignes sont lues par paquets avec
+    un curseur côté serveur et encodées au fil de l'eau, la mémoire utilisée
+    reste constante quel que soit le nombre de transactions. Les lignes sont
+    triées par (date, id).
+
+    Args:
+        format: 'csv' (avec ligne d'en-tête) ou 'ndjson' (un objet JSON par ligne)
+        category: Filtre optionnel par catégorie ('income' ou 'expense')
+        date_from: Date de début incluse (paramètre `from`)
+        date_to: Date de fin exclue (paramètre `to`)
+        current_user: Utilisateur authentifié
+
+    Returns:
+        Fichier CSV ou NDJSON en téléchargement
+
+    Raises:
+        HTTPException 401: Token JWT invalide ou expiré
+        HTTPException 422: Format ou date invalide
+    """
+    # La session est ouverte par le générateur : elle doit vivre pendant tout
+    # l'envoi, donc au-delà de la dépendance get_db
+    content = export.STREAMERS[format](current_user.id, category, date_from, date_to)
+
+    return StreamingResponse(
+        content,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
+    )
+
+
+@router.get("/search", response_model=List[TransactionResponse])
+def search_transactions(
+        response: Response,
+        q: str = Query(..., min_length=1, max_length=200),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(20, ge=1, le=100),
+        db: Session = Depends(get_read_db),
+        current_user: UserPrincipal = Depends(get_current_principal),
+        data_version: int = Depends(check_data_version)
+):
+    """
+    Rechercher des transactions par mots du titre ou de la description.
+
+    La recherche passe par l'index plein texte de la base (FTS5, tsvector,
+    FULLTEXT), sans parcourir les transactions. Chaque mot de `q` doit
+    apparaître, éventuellement en début de mot ("carre" trouve "Carrefour"),
+    sans tenir compte de la casse. Les résultats sont triés par pertinence.
+
+    Args:
+        response: Réponse HTTP (pour les en-têtes ETag)
+        q: Mots recherchés
+        skip: Nombre de résultats à ignorer
+        limit: Nombre maximum de résultats à retourner (max 100)
+        db: Session de base de données
+        current_user: Utilisateur authentifié
+        data_version: Version des données (ETag)
 
-    # Filtrer par catégorie si spécifié
-    if category:
-        query = query.filter(Transaction.category == category)
+    Returns:
+        Transactions correspondantes, les plus pertinentes d'abord
+        (304 sans contenu si l'ETag du client est à jour)
 
-    transactions = query.offset(skip).limit(limit).all()
+    Raises:
+        HTTPException 401: Token JWT invalide ou expiré
+        HTTPException 422: `q` absent ou trop long, limit hors de l'intervalle [1, 100]
+    """
+    transactions = search.search_transactions(db, current_user.id, q, skip=skip, limit=limit)
 
-    return transactions
+    return json_response(response, dump_transactions(transactions))
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction(
         transaction_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: Session = Depends(get_read_db),
+        current_user: UserPrincipal = Depends(get_current_principal),
+        data_version: int = Depends(check_data_version)
 ):
     """
     Récupérer une transaction spécifique par son ID.
@@ -107,26 +463,17 @@ def get_transaction(
         transaction_id: ID unique de la transaction à récupérer
         db: Session de base de données
         current_user: Utilisateur authentifié
+        data_version: Version des données (ETag, clé du cache des réponses)
 
     Returns:
         Transaction demandée avec tous ses détails
+        (304 sans contenu si l'ETag du client est à jour)
 
     Raises:
         HTTPException 401: Token JWT invalide ou expiré
         HTTPException 404: Transaction non trouvée ou n'appartient pas à l'utilisateur
     """
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-
-    if not transaction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction non trouvée"
-        )
-
-    return transaction
+    return reads.get_transaction(db, current_user.id, transaction_id)
 
 
 @router.put("/{transaction_id}", response_model=TransactionResponse)
@@ -134,7 +481,7 @@ def update_transaction(
         transaction_id: int,
         transaction_update: TransactionUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_user)
 ):
     """
     Mettre à jour une transaction existante.
@@ -155,33 +502,17 @@ def update_transaction(
         HTTPException 401: Token JWT invalide ou expiré
         HTTPException 404: Transaction non trouvée ou n'appartient pas à l'utilisateur
     """
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-
-    if not transaction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction non trouvée"
-        )
+    updated = crud.update_transaction(db, current_user.id, transaction_id, transaction_update)
+    response_cache.invalidate_user(current_user.id)
 
-    # Mettre à jour uniquement les champs fournis
-    update_data = transaction_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(transaction, field, value)
-
-    db.commit()
-    db.refresh(transaction)
-
-    return transaction
+    return updated
 
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_transaction(
         transaction_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_user)
 ):
     """
     Supprimer définitivement une transaction.
@@ -201,27 +532,18 @@ def delete_transaction(
         HTTPException 401: Token JWT invalide ou expiré
         HTTPException 404: Transaction non trouvée ou n'appartient pas à l'utilisateur
     """
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-
-    if not transaction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction non trouvée"
-        )
-
-    db.delete(transaction)
-    db.commit()
+    crud.delete_transaction(db, current_user.id, transaction_id)
+    response_cache.invalidate_user(current_user.id)
 
     return None
 
 
 @router.get("/stats/summary")
 def get_summary(
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        response: Response,
+        db: Session = Depends(get_read_db),
+        current_user: UserPrincipal = Depends(get_current_principal),
+        data_version: int = Depends(check_data_version)
 ):
     """
     Obtenir un résumé statistique des finances de l'utilisateur.
@@ -230,8 +552,10 @@ def get_summary(
     et le nombre total de transactions pour l'utilisateur connecté.
 
     Args:
+        response: Réponse HTTP (pour les en-têtes ETag)
         db: Session de base de données
         current_user: Utilisateur authentifié
+        data_version: Version des données (ETag, clé du cache des réponses)
 
     Returns:
         dict: Dictionnaire contenant:
@@ -243,17 +567,50 @@ def get_summary(
     Raises:
         HTTPException 401: Token JWT invalide ou expiré
     """
-    transactions = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id
-    ).all()
-
-    total_income = sum(t.amount for t in transactions if t.category == "income")
-    total_expense = sum(t.amount for t in transactions if t.category == "expense")
-    balance = total_income - total_expense
-
-    return {
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "balance": balance,
-        "transaction_count": len(transactions)
-    }
\ No newline at end of file
+    key = response_cache.key(current_user.id, data_version, "summary")
+    cached = response_cache.get(key)
+    if cached is None:
+        body = dump_json(reads.get_summary(db, current_user.id))
+        response_cache.set(key, body)
+    else:
+        body, _ = cached
+
+    return json_response(response, body)
+
+
+@router.get("/stats/timeseries", response_model=List[TimeseriesPoint])
+def get_timeseries(
+        bucket: Literal["day", "week", "month"] = "month",
+        date_from: Optional[datetime] = Query(None, alias="from"),
+        date_to: Optional[datetime] = Query(None, alias="to"),
+        by_category: bool = False,
+        db: Session = Depends(get_read_db),
+        current_user: UserPrincipal = Depends(get_current_principal)
+):
+    """
+    Obtenir l'évolution des revenus et des dépenses par jour, semaine ou mois.
+
+    Les totaux sont calculés par la base (GROUP BY sur le début de période) ;
+    seules les périodes qui contiennent au moins une transaction sont
+    retournées, dans l'ordre chronologique. Les semaines commencent le lundi.
+
+    Args:
+        bucket: Taille des périodes ('day', 'week' ou 'month')
+        date_from: Date de début incluse (paramètre `from`)
+        date_to: Date de fin exclue (paramètre `to`)
+        by_category: Ajouter le total et le nombre de transactions par catégorie
+        db: Session de base de données
+        current_user: Utilisateur authentifié
+
+    Returns:
+        Liste de périodes avec:
+            - period (date): Premier jour de la période
+            - income, expense, net (float): Revenus, dépenses et différence
+            - count (int): Nombre de transactions
+            - categories: Détail par catégorie (si by_category)
+
+    Raises:
+        HTTPException 401: Token JWT invalide ou expiré
+        HTTPException 422: Période ou date invalide
+    """
+    return reads.get_timeseries(db, current_user.id, bucket, date_from, date_to, by_category)
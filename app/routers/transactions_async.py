@@ -0,0 +1,215 @@
+# Routes des transactions en mode asynchrone (DB_ASYNC=true)
+#
+# Mêmes chemins et même documentation que app/routers/transactions.py ; la
+# logique de app/crud.py est exécutée via AsyncSession.run_sync(), donc sans
+# occuper de thread pendant les accès à la base.
+
+from fastapi import Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Literal, Optional
+from app import crud, http_cache, reads, search
+from app.database import get_async_db
+from app.response_cache import response_cache
+from app.serialization import dump_json, dump_transactions
+from app.schemas import (
+    BatchResult,
+    BulkImportResponse,
+    TransactionBatchUpdate,
+    TransactionCreate,
+    TransactionFilter,
+    TransactionUpdate
+)
+from app.auth import UserPrincipal, get_current_principal_async, get_current_user_async
+from app.routers import override_endpoints
+from app.routers import transactions
+from app.routers.transactions import _read_bulk_rows, json_response
+
+
+async def check_data_version(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async)
+) -> int:
+    data_version, data_modified_at = await db.run_sync(reads.get_data_version, current_user.id)
+    http_cache.check_not_modified(request, response, current_user.id, data_version, data_modified_at)
+    return data_version
+
+
+async def _cache_call(func, *args):
+    # Backend réseau (Redis) : l'appel ne doit pas bloquer la boucle d'événements
+    if response_cache.backend is not None and response_cache.backend.blocking:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
+
+async def create_transaction(
+        transaction: TransactionCreate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user_async)
+):
+    created = await db.run_sync(crud.create_transaction, current_user.id, transaction)
+    await _cache_call(response_cache.invalidate_user, current_user.id)
+
+    return created
+
+
+async def bulk_create_transactions(
+        request: Request,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user_async)
+):
+    # Corps décodé et validé dans le pool de threads, insertion via run_sync
+    valid, errors = await _read_bulk_rows(request)
+    inserted = await db.run_sync(crud.bulk_create_transactions, current_user.id, valid)
+    if inserted:
+        await _cache_call(response_cache.invalidate_user, current_user.id)
+
+    return BulkImportResponse(inserted=inserted, errors=errors)
+
+
+async def batch_update_transactions(
+        batch: TransactionBatchUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user_async)
+):
+    affected = await db.run_sync(crud.batch_update_transactions, current_user.id, batch)
+    if affected:
+        await _cache_call(response_cache.invalidate_user, current_user.id)
+
+    return BatchResult(affected=affected)
+
+
+async def batch_delete_transactions(
+        criteria: TransactionFilter,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user_async)
+):
+    affected = await db.run_sync(crud.batch_delete_transactions, current_user.id, criteria)
+    if affected:
+        await _cache_call(response_cache.invalidate_user, current_user.id)
+
+    return BatchResult(affected=affected)
+
+
+async def get_transactions(
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=100),
+        category: str = None,
+        after: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async),
+        data_version: int = Depends(check_data_version)
+):
+    key = response_cache.key(
+        current_user.id, data_version, "list",
+        {"skip": skip, "limit": limit, "category": category, "after": after}
+    )
+    cached = await _cache_call(response_cache.get, key)
+    if cached is None:
+        transactions, next_cursor = await db.run_sync(
+            reads.list_transactions, current_user.id, skip, limit, category, after
+        )
+        body = dump_transactions(transactions)
+        await _cache_call(response_cache.set, key, body, next_cursor)
+    else:
+        body, next_cursor = cached
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return json_response(response, body)
+
+
+async def search_transactions(
+        response: Response,
+        q: str = Query(..., min_length=1, max_length=200),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(20, ge=1, le=100),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async),
+        data_version: int = Depends(check_data_version)
+):
+    transactions = await db.run_sync(search.search_transactions, current_user.id, q, skip, limit)
+
+    return json_response(response, dump_transactions(transactions))
+
+
+async def get_transaction(
+        transaction_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async),
+        data_version: int = Depends(check_data_version)
+):
+    return await db.run_sync(reads.get_transaction, current_user.id, transaction_id)
+
+
+async def update_transaction(
+        transaction_id: int,
+        transaction_update: TransactionUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user_async)
+):
+    updated = await db.run_sync(crud.update_transaction, current_user.id, transaction_id, transaction_update)
+    await _cache_call(response_cache.invalidate_user, current_user.id)
+
+    return updated
+
+
+async def delete_transaction(
+        transaction_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user_async)
+):
+    await db.run_sync(crud.delete_transaction, current_user.id, transaction_id)
+    await _cache_call(response_cache.invalidate_user, current_user.id)
+
+    return None
+
+
+async def get_summary(
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async),
+        data_version: int = Depends(check_data_version)
+):
+    key = response_cache.key(current_user.id, data_version, "summary")
+    cached = await _cache_call(response_cache.get, key)
+    if cached is None:
+        body = dump_json(await db.run_sync(reads.get_summary, current_user.id))
+        await _cache_call(response_cache.set, key, body)
+    else:
+        body, _ = cached
+
+    return json_response(response, body)
+
+
+async def get_timeseries(
+        bucket: Literal["day", "week", "month"] = "month",
+        date_from: Optional[datetime] = Query(None, alias="from"),
+        date_to: Optional[datetime] = Query(None, alias="to"),
+        by_category: bool = False,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_principal_async)
+):
+    return await db.run_sync(
+        reads.get_timeseries, current_user.id, bucket, date_from, date_to, by_category
+    )
+
+
+router = override_endpoints(transactions.router, {
+    "create_transaction": create_transaction,
+    "bulk_create_transactions": bulk_create_transactions,
+    "batch_update_transactions": batch_update_transactions,
+    "batch_delete_transactions": batch_delete_transactions,
+    "get_transactions": get_transactions,
+    "search_transactions": search_transactions,
+    "get_transaction": get_transaction,
+    "update_transaction": update_transaction,
+    "delete_transaction": delete_transaction,
+    "get_summary": get_summary,
+    "get_timeseries": get_timeseries,
+})
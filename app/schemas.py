@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, field_validator
+from datetime import date, datetime
+from typing import Dict, List, Optional
 
 # Schémas pour User
 class UserBase(BaseModel):
@@ -35,11 +35,19 @@ class TransactionCreate(TransactionBase):
         }
 
 class TransactionUpdate(BaseModel):
+    # Champs absents : inchangés ; seule la description peut être effacée (null)
     title: Optional[str] = None
     amount: Optional[float] = None
     category: Optional[str] = None
     description: Optional[str] = None
 
+    @field_validator("title", "amount", "category")
+    @classmethod
+    def reject_null(cls, value):
+        if value is None:
+            raise ValueError("ne peut pas être null")
+        return value
+
 class TransactionResponse(TransactionBase):
     id: int
     date: datetime
@@ -47,6 +55,39 @@ class TransactionResponse(TransactionBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class BulkImportError(BaseModel):
+    index: int  # position de la ligne dans le tableau ou le flux NDJSON (à partir de 0)
+    detail: str
+
+class BulkImportResponse(BaseModel):
+    inserted: int
+    errors: List[BulkImportError]
+
+class TransactionFilter(BaseModel):
+    # Critères combinés (ET) ; au moins un critère est requis
+    ids: Optional[List[int]] = Field(None, max_length=1000)
+    category: Optional[str] = None
+    date_from: Optional[datetime] = None  # inclus
+    date_to: Optional[datetime] = None  # exclu
+
+class TransactionBatchUpdate(TransactionFilter):
+    changes: TransactionUpdate
+
+class BatchResult(BaseModel):
+    affected: int  # nombre de transactions modifiées ou supprimées
+
+class CategoryTotals(BaseModel):
+    total: float
+    count: int
+
+class TimeseriesPoint(BaseModel):
+    period: date  # premier jour de la période (lundi pour les semaines)
+    income: float
+    expense: float
+    net: float
+    count: int
+    categories: Optional[Dict[str, CategoryTotals]] = None
+
 # Schémas pour Authentication
 class Token(BaseModel):
     access_token: str
@@ -54,3 +95,6 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
+    token_version: Optional[int] = None
+    expires_at: Optional[float] = None
@@ -0,0 +1,314 @@
+# app/search.py - Recherche plein texte sur le titre et la description
+#
+# Chaque dialecte utilise son index plein texte, maintenu par la base :
+# - SQLite : table virtuelle FTS5 (contenu externe) tenue à jour par triggers ;
+#   user_id y est indexé pour ne classer que les lignes de l'utilisateur
+# - PostgreSQL : colonne générée search_vector (tsvector stocké, rien n'est
+#   recalculé au classement) et index GIN (user_id, search_vector), btree_gin
+# - MySQL/MariaDB : index FULLTEXT (title, description)
+# Ces objets sont créés avec la table transactions (create_all, migration
+# 0007) et ne figurent pas dans les modèles. Sans index natif (FTS5 absent,
+# autre dialecte, ou SEARCH_INDEX=tokens), les mots sont rangés par
+# l'application dans transaction_tokens à chaque écriture.
+#
+# Les résultats sont classés par pertinence (bm25, ts_rank, MATCH) et paginés
+# par skip/limit.
+#
+# Latence sur un grand volume : python -m benchmarks.bench_search
+
+import argparse
+import os
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from itertools import starmap
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, case, column, delete, event, func, insert, literal_column, or_, select, table
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+
+from app.models import Transaction, TransactionToken
+from app.reads import TRANSACTION_COLUMNS, TransactionRecord
+
+load_dotenv()
+
+# auto (index natif du dialecte si disponible) ou tokens (table transaction_tokens)
+SEARCH_INDEX = os.getenv("SEARCH_INDEX", "auto").lower()
+
+# Mots pris en compte dans une requête
+QUERY_MAX_TERMS = 8
+TOKEN_MAX_LENGTH = 50
+
+FTS_TABLE = "transactions_fts"
+PG_INDEX = "ix_transactions_search"
+MYSQL_INDEX = "ft_transactions_search"
+# Document indexé sous PostgreSQL, stocké dans une colonne générée absente des modèles
+PG_COLUMN = "search_vector"
+PG_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))"
+
+_NATIVE_DDL = {
+    "fts5": [
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "title, description, user_id, content='transactions', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON transactions BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, description, user_id) "
+        "VALUES (new.id, new.title, new.description, new.user_id); "
+        "END",
+        f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON transactions BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, user_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.user_id); "
+        "END",
+        f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, description, user_id ON transactions BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, user_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.user_id); "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, description, user_id) "
+        "VALUES (new.id, new.title, new.description, new.user_id); "
+        "END",
+        # Indexer les lignes déjà présentes (migration d'une base existante)
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ],
+    "tsvector": [
+        # btree_gin : user_id dans l'index GIN, seules les lignes de l'utilisateur sont lues
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        f"ALTER TABLE transactions ADD COLUMN IF NOT EXISTS {PG_COLUMN} tsvector "
+        f"GENERATED ALWAYS AS ({PG_DOCUMENT}) STORED",
+        f"CREATE INDEX {PG_INDEX} ON transactions USING gin (user_id, {PG_COLUMN})",
+    ],
+    "fulltext": [f"ALTER TABLE transactions ADD FULLTEXT INDEX {MYSQL_INDEX} (title, description)"],
+}
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=None)
+def _sqlite_has_fts5() -> bool:
+    import sqlite3
+
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(content)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def native_index(dialect) -> Optional[str]:
+    """Index plein texte disponible pour un dialecte ('fts5', 'tsvector', 'fulltext'), ou None"""
+    if dialect.name == "sqlite":
+        return "fts5" if _sqlite_has_fts5() else None
+    if dialect.name == "postgresql":
+        return "tsvector"
+    if dialect.name in ("mysql", "mariadb"):
+        return "fulltext"
+    return None
+
+
+def backend(db: Session) -> str:
+    """Index utilisé par les recherches : index natif, sinon 'tokens'"""
+    if SEARCH_INDEX == "tokens":
+        return "tokens"
+    return native_index(db.get_bind().dialect) or "tokens"
+
+
+def native_index_ddl(dialect) -> List[str]:
+    """Instructions SQL qui créent l'index plein texte du dialecte"""
+    return list(_NATIVE_DDL.get(native_index(dialect), ()))
+
+
+def create_native_index(connection) -> None:
+    """Créer l'index plein texte du dialecte (appelé après la création de transactions)"""
+    for statement in native_index_ddl(connection.dialect):
+        connection.exec_driver_sql(statement)
+
+
+def drop_native_index(connection) -> None:
+    """Supprimer l'index plein texte du dialecte (avant la table transactions, ou migration inverse)"""
+    kind = native_index(connection.dialect)
+    if kind == "fts5":
+        for suffix in ("ai", "ad", "au"):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif kind == "tsvector":
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {PG_INDEX}")
+        connection.exec_driver_sql(f"ALTER TABLE transactions DROP COLUMN IF EXISTS {PG_COLUMN}")
+    elif kind == "fulltext":
+        connection.exec_driver_sql(f"ALTER TABLE transactions DROP INDEX {MYSQL_INDEX}")
+
+
+@event.listens_for(Transaction.__table__, "after_create")
+def _after_create(target, connection, **kw):
+    create_native_index(connection)
+
+
+@event.listens_for(Transaction.__table__, "before_drop")
+def _before_drop(target, connection, **kw):
+    drop_native_index(connection)
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Filtre Alembic (include_name) : l'index plein texte n'est pas décrit par les modèles"""
+    if type_ == "table":
+        return name != FTS_TABLE and not name.startswith(f"{FTS_TABLE}_")
+    if type_ == "index":
+        return name not in (PG_INDEX, MYSQL_INDEX)
+    if type_ == "column":
+        return name != PG_COLUMN
+    return True
+
+
+# Index applicatif (transaction_tokens)
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Mots d'un texte, en minuscules et sans accents (même normalisation que FTS5)"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return [word[:TOKEN_MAX_LENGTH] for word in _WORD.findall(text)]
+
+
+def index_transactions(db: Session, conditions: list) -> None:
+    """(Ré)indexer les transactions ciblées dans transaction_tokens ; sans effet avec un index natif"""
+    if backend(db) != "tokens":
+        return
+    unindex_transactions(db, conditions)
+    rows = db.execute(
+        select(Transaction.id, Transaction.user_id, Transaction.title, Transaction.description).where(*conditions)
+    )
+    values = [
+        {"user_id": user_id, "token": token, "transaction_id": transaction_id}
+        for transaction_id, user_id, title, description in rows
+        for token in set(tokenize(title) + tokenize(description))
+    ]
+    if values:
+        db.execute(insert(TransactionToken), values)
+
+
+def index_missing(db: Session, user_id: int) -> None:
+    """Indexer les transactions de l'utilisateur qui n'ont encore aucun mot (après un import)"""
+    if backend(db) != "tokens":
+        return
+    indexed = select(TransactionToken.transaction_id).where(TransactionToken.user_id == user_id)
+    index_transactions(db, [Transaction.user_id == user_id, Transaction.id.not_in(indexed)])
+
+
+def unindex_transactions(db: Session, conditions: list) -> None:
+    """Retirer les transactions ciblées de transaction_tokens (avant leur suppression)"""
+    if backend(db) != "tokens":
+        return
+    targeted = select(Transaction.id).where(*conditions)
+    db.execute(delete(TransactionToken).where(TransactionToken.transaction_id.in_(targeted)))
+
+
+# Requêtes
+#
+# Chaque mot doit apparaître en entier, sauf le dernier qui peut n'être qu'un
+# début de mot (saisie en cours) : "carrefour mar" trouve "Carrefour Market".
+
+def _search_fts5(user_id: int, terms: List[str], skip: int, limit: int):
+    # user_id est une colonne de l'index : seules les lignes de l'utilisateur
+    # sont classées (bm25), puis la page seule est jointe à transactions
+    words = " ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+    fts = table(FTS_TABLE, column("rowid"))
+    rank = func.bm25(literal_column(FTS_TABLE), 10.0, 5.0, 0.0).label("rank")
+    hits = select(fts.c.rowid, rank).where(
+        literal_column(FTS_TABLE).match(f'user_id : "{user_id}" AND ({words})')
+    ).order_by(rank, fts.c.rowid).offset(skip).limit(limit).subquery()
+    return select(*TRANSACTION_COLUMNS).join(hits, hits.c.rowid == Transaction.id).where(
+        Transaction.user_id == user_id
+    ).order_by(hits.c.rank, Transaction.id)
+
+
+def _search_tsvector(user_id: int, terms: List[str], skip: int, limit: int):
+    # Colonne stockée : filtrée par l'index (user_id, search_vector), classée sans recalcul
+    document = literal_column(f"transactions.{PG_COLUMN}")
+    query = func.to_tsquery(literal_column("'simple'"), " & ".join(terms[:-1] + [f"{terms[-1]}:*"]))
+    return select(*TRANSACTION_COLUMNS).where(
+        document.op("@@")(query),
+        Transaction.user_id == user_id
+    ).order_by(func.ts_rank(document, query).desc(), Transaction.id).offset(skip).limit(limit)
+
+
+def _search_fulltext(user_id: int, terms: List[str], skip: int, limit: int):
+    relevance = match(
+        Transaction.title, Transaction.description,
+        against=" ".join([f"+{term}" for term in terms[:-1]] + [f"+{terms[-1]}*"])
+    ).in_boolean_mode()
+    return select(*TRANSACTION_COLUMNS).where(
+        relevance,
+        Transaction.user_id == user_id
+    ).order_by(relevance.desc(), Transaction.id).offset(skip).limit(limit)
+
+
+def _search_tokens(user_id: int, terms: List[str], skip: int, limit: int):
+    terms = tokenize(" ".join(terms))
+    matches = [TransactionToken.token == term for term in terms[:-1]]
+    matches.append(TransactionToken.token.startswith(terms[-1], autoescape=True))
+    # Une ligne par transaction qui contient tous les mots ; pertinence = nombre de mots trouvés
+    hits = select(
+        TransactionToken.transaction_id,
+        func.count().label("hits")
+    ).where(
+        TransactionToken.user_id == user_id,
+        or_(*matches)
+    ).group_by(TransactionToken.transaction_id).having(and_(
+        *(func.max(case((condition, 1), else_=0)) == 1 for condition in matches)
+    )).subquery()
+    return select(*TRANSACTION_COLUMNS).join(hits, hits.c.transaction_id == Transaction.id).order_by(
+        hits.c.hits.desc(), Transaction.date.desc(), Transaction.id
+    ).offset(skip).limit(limit)
+
+
+_SEARCHES = {
+    "fts5": _search_fts5,
+    "tsvector": _search_tsvector,
+    "fulltext": _search_fulltext,
+    "tokens": _search_tokens,
+}
+
+
+def search_transactions(db: Session, user_id: int, q: str, skip: int = 0, limit: int = 20) -> List[TransactionRecord]:
+    """Transactions dont le titre ou la description contient tous les mots de `q`, les plus pertinentes d'abord"""
+    terms = list(dict.fromkeys(_WORD.findall(q.lower())))[:QUERY_MAX_TERMS]
+    if not terms:
+        return []
+    statement = _SEARCHES[backend(db)](user_id, terms, skip, limit)
+    return list(starmap(TransactionRecord, db.execute(statement)))
+
+
+def rebuild_index(db: Session) -> str:
+    """Reconstruire l'index utilisé (FTS5 ou transaction_tokens) ; retourne son nom"""
+    kind = backend(db)
+    if kind == "fts5":
+        db.execute(insert(table(FTS_TABLE, column(FTS_TABLE))).values({FTS_TABLE: "rebuild"}))
+    elif kind == "tokens":
+        db.execute(delete(TransactionToken))
+        index_transactions(db, [])
+    # PostgreSQL et MySQL : l'index est maintenu par la base
+    db.commit()
+    return kind
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.search",
+        description="Reconstruire l'index de recherche des transactions"
+    )
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        kind = rebuild_index(db)
+    finally:
+        db.close()
+
+    print(f"Index de recherche reconstruit ({kind})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+# app/serialization.py - Sérialisation JSON rapide des réponses de lecture
+#
+# Les lignes lues colonne par colonne (TransactionRecord, voir app/reads.py)
+# sont validées par un TypeAdapter, sans construire d'objet Pydantic ni lire
+# d'attributs ORM, puis encodées en octets par orjson. Sans orjson,
+# l'encodeur JSON de Pydantic prend le relais (même rendu).
+#
+# Comparaison des deux chemins : python -m benchmarks.bench_serialization
+
+import json
+from typing import Any, Iterable, List
+
+from pydantic import TypeAdapter
+
+from app.instrumentation import timed
+from app.reads import TransactionRecord
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+_transaction_rows = TypeAdapter(List[TransactionRecord])
+
+
+def dump_transactions(rows: Iterable[TransactionRecord]) -> bytes:
+    """Valider des transactions (enregistrements ou dictionnaires) et les encoder en un tableau JSON"""
+    with timed("serialization"):
+        rows = _transaction_rows.validate_python(rows)
+        if orjson is not None:
+            return orjson.dumps(rows)
+        return _transaction_rows.dump_json(rows)
+
+
+def dump_json(content: Any) -> bytes:
+    """Encoder un objet JSON simple (dict, list, nombres, chaînes)"""
+    with timed("serialization"):
+        if orjson is not None:
+            return orjson.dumps(content)
+        # Même rendu que JSONResponse
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
@@ -0,0 +1,131 @@
+# app/slow_queries.py - Journal des requêtes SQL lentes
+#
+# Appelé par l'événement after_cursor_execute des engines (app/database.py) :
+# une requête plus longue que le seuil est journalisée avec sa route et
+# l'utilisateur d'origine (app/instrumentation.py), ses paramètres masqués
+# (seuls leurs types sont gardés) et, si demandé, son plan d'exécution
+# (EXPLAIN, lancé sur la même connexion). Les dernières requêtes lentes sont
+# gardées dans un tampon circulaire, consultable par
+# GET /api/admin/stats/slow-queries (les plus lentes en tête).
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.instrumentation import current_timings, route_template
+
+logger = logging.getLogger("app.database")
+
+# Requête SQL tronquée au-delà (imports en masse : VALUES (...), (...), ...)
+MAX_STATEMENT_LENGTH = 2000
+
+# Préfixe EXPLAIN par dialecte (plan estimé : la requête n'est pas rejouée)
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+    "mariadb": "EXPLAIN ",
+}
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """Remplacer chaque valeur par le nom de son type (montants, titres et e-mails ne sont jamais journalisés)"""
+    if executemany:
+        return f"{len(parameters)} jeux de paramètres"
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def explain(conn, statement: str, parameters: Any) -> List[str]:
+    """Plan d'exécution estimé d'une requête, une ligne par étape"""
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None:
+        raise NotImplementedError(f"EXPLAIN non pris en charge pour {conn.dialect.name}")
+    # Curseur DBAPI de la même connexion : même transaction, paramètres au format du driver
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [" | ".join(str(value) for value in row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Détection des requêtes lentes et tampon des plus récentes, sûr entre threads"""
+
+    def __init__(self, size: int = 50):
+        # Seuil en secondes (None = désactivé)
+        self.threshold: Optional[float] = None
+        # Lancer EXPLAIN sur les SELECT lents
+        self.explain = False
+        self.total = 0
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._entries.maxlen
+
+    def resize(self, size: int) -> None:
+        with self._lock:
+            self._entries = deque(self._entries, maxlen=size)
+
+    def record(self, conn, statement: str, parameters: Any, context, executemany: bool, elapsed: float) -> None:
+        if self.threshold is None or elapsed < self.threshold:
+            return
+
+        timings = current_timings()
+        scope = timings.scope if timings is not None else None
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement[:MAX_STATEMENT_LENGTH],
+            "parameters": redact_parameters(parameters, executemany),
+            "method": scope["method"] if scope is not None else None,
+            "route": route_template(scope) if scope is not None else None,
+            "user_id": timings.user_id if timings is not None else None,
+            "explain": None,
+        }
+        # Pas d'EXPLAIN pendant la lecture d'un curseur côté serveur (export en flux) :
+        # la connexion est occupée tant que les lignes ne sont pas toutes lues
+        if (self.explain and not executemany and statement.lstrip()[:6].upper() in ("SELECT", "WITH")
+                and not context.execution_options.get("stream_results")):
+            try:
+                entry["explain"] = explain(conn, statement, parameters)
+            except Exception as error:
+                entry["explain"] = [f"EXPLAIN impossible : {error}"]
+
+        with self._lock:
+            self.total += 1
+            self._entries.append(entry)
+        logger.warning(
+            "Requête SQL lente : %.1f ms (%s %s, utilisateur %s) %s %s",
+            elapsed * 1000, entry["method"], entry["route"], entry["user_id"],
+            entry["statement"], entry["parameters"]
+        )
+
+    def stats(self, limit: Optional[int] = None) -> Dict[str, object]:
+        """Configuration, nombre total de requêtes lentes et tampon, les plus lentes en tête"""
+        with self._lock:
+            entries = sorted(self._entries, key=lambda entry: entry["duration_ms"], reverse=True)
+            total = self.total
+        return {
+            "threshold_ms": None if self.threshold is None else self.threshold * 1000,
+            "explain": self.explain,
+            "size": self.size,
+            "total": total,
+            "queries": entries[:limit],
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total = 0
+
+
+slow_query_log = SlowQueryLog()
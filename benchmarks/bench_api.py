@@ -0,0 +1,432 @@
+# benchmarks/bench_api.py - Charge HTTP de bout en bout, comparable entre commits
+#
+# Crée un utilisateur par volume de données (1k, 100k et 1M transactions par
+# défaut, insérées en masse), puis envoie des requêtes concurrentes à chaque
+# endpoint (connexion comprise), soit à l'application ASGI dans le processus
+# (httpx.ASGITransport), soit à un serveur uvicorn local. Pour chaque endpoint :
+# débit (req/s), latences p50/p95/p99 et requêtes SQL par requête HTTP (lues
+# sur GET /metrics, voir app/instrumentation.py). Les écritures destructrices
+# (PATCH et DELETE /batch, DELETE /{id}) ne portent que sur des lignes jetables,
+# importées juste avant par le scénario bulk : le jeu de données reste intact.
+#
+# Les résultats sont écrits en JSON ; `compare` signale les régressions par
+# rapport à un fichier de référence (code de sortie 1) :
+#
+#   python -m benchmarks.bench_api run [--sizes 1000,100000,1000000] [--mode both]
+#       [--requests 200] [--concurrency 10] [--database bench.db] [--output bench_api.json]
+#   python -m benchmarks.bench_api compare reference.json bench_api.json [--threshold 0.1]
+#
+# Le cache des réponses est désactivé par défaut (--response-cache memory pour
+# le mesurer) : sinon les lectures répétées ne touchent plus la base.
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+PASSWORD = "bench-password"
+MERCHANTS = ["Carrefour", "Leclerc", "Pharmacie", "Boulangerie", "Lidl", "Monoprix", "Picard", "Fnac"]
+BATCH_SIZE = 50000
+# Identifiants de transactions tirés pour GET et PUT /{transaction_id}
+SAMPLE_IDS = 100
+# Curseurs de pagination répartis sur tout l'historique (pages profondes comprises)
+SAMPLE_CURSORS = 20
+# Transactions ciblées par ids par PATCH et DELETE /batch
+BATCH_IDS = 10
+# Description des lignes jetables importées par /bulk, puis modifiées et supprimées
+SPARE_MARKER = "bench-jetable"
+
+
+def scenarios(username: str, token: str, ids: list, cursors: list, requests: int, warmup: int,
+              load_spare) -> list:
+    """(nom, route, nombre de requêtes, fabrique de requête) pour un utilisateur"""
+    headers = {"Authorization": f"Bearer {token}"}
+    # bcrypt domine la connexion et l'inscription, l'import et l'export sont volumineux : moins de requêtes
+    slow_requests = max(5, requests // 10)
+    run_id = f"{os.getpid()}_{time.time_ns()}"
+
+    # Les écritures destructrices ne touchent que les lignes importées par le scénario bulk :
+    # (warmup + requests) paquets de BATCH_IDS pour PATCH puis DELETE /batch, autant de lignes pour DELETE
+    needed = (warmup + requests) * (BATCH_IDS + 1)
+    bulk_rows = -(-needed // (warmup + slow_requests))
+    pool = []
+
+    def spare(start, count):
+        # Relevées au premier usage (pendant l'échauffement), une fois l'import mesuré
+        if not pool:
+            pool.extend(load_spare())
+        return [pool[(start + k) % len(pool)] for k in range(count)]
+
+    def get(url, **params):
+        return lambda i: ("GET", url, {"params": params, "headers": headers})
+
+    return [
+        ("login", "/api/auth/login", slow_requests,
+         lambda i: ("POST", "/api/auth/login", {"data": {"username": username, "password": PASSWORD}})),
+        ("register", "/api/auth/register", slow_requests,
+         lambda i: ("POST", "/api/auth/register", {"json": {
+             "username": f"bench_new_{run_id}_{i}", "email": f"bench_new_{run_id}_{i}@example.com",
+             "password": PASSWORD
+         }})),
+        ("list", "/api/transactions/", requests, get("/api/transactions/", limit=100)),
+        ("list_cursor", "/api/transactions/", requests,
+         lambda i: ("GET", "/api/transactions/", {"params": {"limit": 100, "after": cursors[i % len(cursors)]},
+                                                  "headers": headers})),
+        ("get", "/api/transactions/{transaction_id}", requests,
+         lambda i: ("GET", f"/api/transactions/{ids[i % len(ids)]}", {"headers": headers})),
+        ("summary", "/api/transactions/stats/summary", requests, get("/api/transactions/stats/summary")),
+        ("timeseries", "/api/transactions/stats/timeseries", requests,
+         get("/api/transactions/stats/timeseries", bucket="month")),
+        ("search", "/api/transactions/search", requests, get("/api/transactions/search", q="carrefour")),
+        ("create", "/api/transactions/", requests,
+         lambda i: ("POST", "/api/transactions/", {"headers": headers, "json": {
+             "title": f"Bench {i}", "amount": 12.5, "category": "expense"
+         }})),
+        ("update", "/api/transactions/{transaction_id}", requests,
+         lambda i: ("PUT", f"/api/transactions/{ids[i % len(ids)]}", {"headers": headers, "json": {
+             "amount": 10.0 + i % 7
+         }})),
+        # Une année d'historique (10 % des lignes), lue en entier
+        ("export", "/api/transactions/export", slow_requests,
+         get("/api/transactions/export", format="ndjson",
+             **{"from": "2023-01-01T00:00:00", "to": "2024-01-01T00:00:00"})),
+        ("bulk", "/api/transactions/bulk", slow_requests,
+         lambda i: ("POST", "/api/transactions/bulk", {"headers": headers, "json": [
+             {"title": f"Jetable {i}-{k}", "amount": 3.0, "category": "expense", "description": SPARE_MARKER}
+             for k in range(bulk_rows)
+         ]})),
+        ("batch_update", "/api/transactions/batch", requests,
+         lambda i: ("PATCH", "/api/transactions/batch", {"headers": headers, "json": {
+             "ids": spare(i * BATCH_IDS, BATCH_IDS), "changes": {"category": "income", "amount": 4.0}
+         }})),
+        ("batch_delete", "/api/transactions/batch", requests,
+         lambda i: ("DELETE", "/api/transactions/batch", {"headers": headers, "json": {
+             "ids": spare(i * BATCH_IDS, BATCH_IDS)
+         }})),
+        ("delete", "/api/transactions/{transaction_id}", requests,
+         lambda i: ("DELETE", f"/api/transactions/{spare((warmup + requests) * BATCH_IDS + i, 1)[0]}",
+                    {"headers": headers})),
+    ]
+
+
+def spare_ids(url: str, user_id: int) -> list:
+    """Ids des lignes jetables importées par le scénario bulk, dans l'ordre d'insertion"""
+    from sqlalchemy import create_engine, select
+
+    from app.models import Transaction
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(Transaction.id)
+                .where(Transaction.user_id == user_id, Transaction.description == SPARE_MARKER)
+                .order_by(Transaction.id)
+            ).scalars().all()
+    finally:
+        engine.dispose()
+
+
+def seed(url: str, sizes: list) -> dict:
+    """Créer (si besoin) un utilisateur par volume ; retourne {volume: (nom d'utilisateur, id, ids, curseurs)}"""
+    # Imports tardifs : DATABASE_URL doit être fixée avant le premier import de app
+    from sqlalchemy import create_engine, insert, select
+    from sqlalchemy.orm import sessionmaker
+
+    # app.search crée l'index plein texte avec la table transactions
+    from app import ledger, rollups, search  # noqa: F401
+    from app.database import Base
+    from app.hashing import hash_password
+    from app.models import Transaction, User
+    from app.pagination import encode_cursor
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    users = {}
+    try:
+        for rows in sizes:
+            username = f"bench_{rows}"
+            with engine.begin() as conn:
+                user_id = conn.execute(select(User.id).where(User.username == username)).scalar()
+            if user_id is None:
+                started = time.perf_counter()
+                with engine.begin() as conn:
+                    user_id = conn.execute(insert(User).values(
+                        email=f"{username}@example.com", username=username, hashed_password=hash_password(PASSWORD)
+                    )).inserted_primary_key[0]
+                start = datetime(2015, 1, 1)
+                step = timedelta(minutes=max(1, 10 * 365 * 24 * 60 // rows))
+                for offset in range(0, rows, BATCH_SIZE):
+                    with engine.begin() as conn:
+                        conn.execute(insert(Transaction), [
+                            {
+                                "title": f"{MERCHANTS[i % len(MERCHANTS)]} {i}",
+                                "amount": round(1 + (i * 7919) % 20000 / 100, 2),
+                                "category": "income" if i % 5 == 0 else "expense",
+                                "description": "Courses de la semaine" if i % 3 else None,
+                                "date": start + step * i,
+                                "user_id": user_id,
+                            }
+                            for i in range(offset, min(rows, offset + BATCH_SIZE))
+                        ])
+                db = sessionmaker(bind=engine)()
+                try:
+                    ledger.rebuild_balances(db)
+                    rollups.rebuild_rollups(db, user_id=user_id)
+                finally:
+                    db.close()
+                print(f"{username} : {rows} transactions insérées en {time.perf_counter() - started:.1f} s")
+            with engine.begin() as conn:
+                ids = conn.execute(
+                    select(Transaction.id).where(Transaction.user_id == user_id)
+                    .order_by(Transaction.id).limit(SAMPLE_IDS)
+                ).scalars().all()
+                # Lignes d'amorçage : ids consécutifs, dans l'ordre des dates
+                stride = max(1, rows // SAMPLE_CURSORS)
+                cursors = [
+                    encode_cursor(date, transaction_id)
+                    for date, transaction_id in conn.execute(
+                        select(Transaction.date, Transaction.id)
+                        .where(Transaction.user_id == user_id, Transaction.id < ids[0] + rows,
+                               (Transaction.id - ids[0]) % stride == 0)
+                        .order_by(Transaction.id)
+                    )
+                ]
+            users[rows] = (username, user_id, ids, cursors)
+    finally:
+        engine.dispose()
+    return users
+
+
+def percentile(durations: list, q: int) -> float:
+    """Percentile q (1..99) en millisecondes"""
+    if len(durations) == 1:
+        return durations[0] * 1000
+    return statistics.quantiles(durations, n=100, method="inclusive")[q - 1] * 1000
+
+
+def statement_totals(text: str) -> dict:
+    """{(méthode, route): (somme, nombre)} de budget_db_statements dans GET /metrics"""
+    totals = {}
+    for kind, method, route, value in re.findall(
+            r'^budget_db_statements_(sum|count)\{method="([^"]*)",route="([^"]*)"\} (\S+)$', text, re.M):
+        total, count = totals.get((method, route), (0.0, 0.0))
+        totals[(method, route)] = (total + float(value), count) if kind == "sum" else (total, count + float(value))
+    return totals
+
+
+async def drive(client: httpx.AsyncClient, make_request, number: int, concurrency: int, warmup: int) -> dict:
+    """Envoyer `number` requêtes avec `concurrency` clients ; débit, latences et erreurs"""
+    for i in range(warmup):
+        method, url, kwargs = make_request(i)
+        await client.request(method, url, **kwargs)
+
+    durations, errors, counter = [], 0, iter(range(number))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, kwargs = make_request(warmup + i)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            durations.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": number,
+        "errors": errors,
+        "rps": round(number / elapsed, 1),
+        "p50_ms": round(percentile(durations, 50), 3),
+        "p95_ms": round(percentile(durations, 95), 3),
+        "p99_ms": round(percentile(durations, 99), 3),
+    }
+
+
+async def run_mode(client: httpx.AsyncClient, mode: str, users: dict, args) -> list:
+    results = []
+    for rows, (username, user_id, ids, cursors) in users.items():
+        response = await client.post("/api/auth/login", data={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+        def load_spare():
+            return spare_ids(os.environ["DATABASE_URL"], user_id)
+
+        for name, route, number, make_request in scenarios(username, token, ids, cursors, args.requests,
+                                                           args.warmup, load_spare):
+            before = statement_totals((await client.get("/metrics")).text)
+            result = await drive(client, make_request, number, args.concurrency, args.warmup)
+            after = statement_totals((await client.get("/metrics")).text)
+            method = make_request(0)[0]
+            total, count = after.get((method, route), (0.0, 0.0))
+            previous_total, previous_count = before.get((method, route), (0.0, 0.0))
+            queries = (total - previous_total) / (count - previous_count) if count > previous_count else None
+            result = {"mode": mode, "rows": rows, "endpoint": name, **result,
+                      "queries_per_request": None if queries is None else round(queries, 2)}
+            results.append(result)
+            print(f"  {mode:<10} {rows:>8} {name:<12} {result['rps']:9.1f} {result['p50_ms']:9.2f} "
+                  f"{result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {result['queries_per_request'] or 0:7.2f} "
+                  f"{result['errors']:6}")
+    return results
+
+
+@asynccontextmanager
+async def in_process_client():
+    """Client httpx branché directement sur l'application ASGI (sans réseau)"""
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(env: dict):
+    """Serveur uvicorn local (processus séparé) et client httpx connecté"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    try:
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=100)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("Le serveur uvicorn n'a pas démarré")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import sqlite3
+
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "response_cache": args.response_cache,
+    }
+
+
+async def run_all(args, env: dict, users: dict) -> list:
+    print(f"  {'mode':<10} {'lignes':>8} {'endpoint':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'SQL':>7} {'err.':>6}")
+    results = []
+    if args.mode in ("inprocess", "both"):
+        async with in_process_client() as client:
+            results += await run_mode(client, "inprocess", users, args)
+    if args.mode in ("uvicorn", "both"):
+        async with uvicorn_client(env) as client:
+            results += await run_mode(client, "uvicorn", users, args)
+    return results
+
+
+def run(args) -> int:
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as directory:
+        database = args.database or os.path.join(directory, "bench.db")
+        # Même configuration pour l'application importée ici et le serveur uvicorn
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.abspath(database)}",
+            "RESPONSE_CACHE_BACKEND": args.response_cache,
+            "METRICS_ENABLED": "true",
+            "DB_SLOW_QUERY_MS": "0",
+        }
+        os.environ.update(env)
+
+        users = seed(env["DATABASE_URL"], sizes)
+        results = asyncio.run(run_all(args, env, users))
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump({"meta": metadata(args), "results": results}, output, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+    return 0
+
+
+def compare(args) -> int:
+    """Comparer deux fichiers de résultats ; 1 si p95 ou débit régressent au-delà du seuil"""
+    with open(args.reference, encoding="utf-8") as reference, open(args.current, encoding="utf-8") as current:
+        before = {(r["mode"], r["rows"], r["endpoint"]): r for r in json.load(reference)["results"]}
+        after = json.load(current)["results"]
+
+    regressions = 0
+    print(f"  {'mode':<10} {'lignes':>8} {'endpoint':<12} {'p95 ms':>17} {'req/s':>19}")
+    for result in after:
+        key = (result["mode"], result["rows"], result["endpoint"])
+        if key not in before:
+            continue
+        old = before[key]
+        slower = result["p95_ms"] > old["p95_ms"] * (1 + args.threshold)
+        fewer = result["rps"] < old["rps"] * (1 - args.threshold)
+        regressions += slower or fewer
+        print(f"  {key[0]:<10} {key[1]:>8} {key[2]:<12} {old['p95_ms']:8.2f} → {result['p95_ms']:6.2f} "
+              f"{old['rps']:9.1f} → {result['rps']:7.1f}" + ("  RÉGRESSION" if slower or fewer else ""))
+    print(f"{regressions} régression(s) au-delà de {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_api")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="mesurer et écrire les résultats en JSON")
+    run_parser.add_argument("--sizes", default="1000,100000,1000000", help="transactions par utilisateur")
+    run_parser.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="both")
+    run_parser.add_argument("--requests", type=int, default=200, help="requêtes mesurées par endpoint")
+    run_parser.add_argument("--concurrency", type=int, default=10, help="clients simultanés")
+    run_parser.add_argument("--warmup", type=int, default=5, help="requêtes non mesurées par endpoint")
+    run_parser.add_argument("--database", help="fichier SQLite réutilisé entre deux lancements (défaut : temporaire)")
+    run_parser.add_argument("--response-cache", choices=["none", "memory"], default="none")
+    run_parser.add_argument("--output", default="bench_api.json")
+
+    compare_parser = commands.add_parser("compare", help="comparer deux fichiers de résultats")
+    compare_parser.add_argument("reference")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="écart toléré (0.1 = 10 %%)")
+
+    args = parser.parse_args(argv)
+    return run(args) if args.command == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
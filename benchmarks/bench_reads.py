@@ -0,0 +1,133 @@
+# benchmarks/bench_reads.py - Lectures : entités ORM ou colonnes seules
+#
+# Mesure la mémoire retenue par 1000 transactions chargées (entités ORM dans
+# l'identity map ou TransactionRecord de app/reads.py) et la latence des
+# lectures des routes (page de liste, transaction par id, résumé).
+#
+#   python -m benchmarks.bench_reads [--rows 1000] [--number 200]
+
+import argparse
+import gc
+import os
+import statistics
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import ledger, reads
+from app.database import Base
+from app.models import Transaction, User, UserBalance
+
+
+def retained_memory(load) -> int:
+    """Octets encore alloués après load() (résultat gardé en vie)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = load()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def measure(func, number: int, repeat: int = 5) -> float:
+    """Durée médiane d'un appel, en microsecondes"""
+    return statistics.median(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_reads")
+    parser.add_argument("--rows", type=int, default=1000, help="transactions chargées pour la mémoire")
+    parser.add_argument("--number", type=int, default=200, help="appels par mesure de latence")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.db")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        ReadSession = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+        with engine.begin() as conn:
+            user_id = conn.execute(
+                insert(User).values(email="bench@example.com", username="bench", hashed_password="x")
+            ).inserted_primary_key[0]
+            start = datetime(2024, 1, 1)
+            conn.execute(insert(Transaction), [
+                {
+                    "title": f"Transaction {i}",
+                    "amount": i * 1.25,
+                    "category": "income" if i % 3 == 0 else "expense",
+                    "description": "Description" if i % 2 else None,
+                    "date": start + timedelta(minutes=i),
+                    "user_id": user_id,
+                }
+                for i in range(args.rows)
+            ])
+        db = Session()
+        ledger.rebuild_balances(db)
+        db.close()
+
+        orm_db, read_db = Session(), ReadSession()
+        try:
+            transaction_id = orm_db.query(Transaction.id).filter(Transaction.user_id == user_id).first()[0]
+
+            def orm_all():
+                orm_db.expunge_all()
+                return orm_db.query(Transaction).filter(Transaction.user_id == user_id).all()
+
+            def orm_page():
+                orm_db.expunge_all()
+                return orm_db.query(Transaction).filter(
+                    Transaction.user_id == user_id
+                ).order_by(Transaction.date, Transaction.id).limit(100).all()
+
+            def orm_get():
+                orm_db.expunge_all()
+                return orm_db.query(Transaction).filter(
+                    Transaction.id == transaction_id, Transaction.user_id == user_id
+                ).first()
+
+            def orm_summary():
+                orm_db.expunge_all()
+                balance = orm_db.get(UserBalance, user_id)
+                return balance.total_income - balance.total_expense
+
+            memory = [
+                ("entités ORM", retained_memory(orm_all)),
+                ("TransactionRecord", retained_memory(
+                    lambda: reads.list_transactions(read_db, user_id, limit=args.rows)[0]
+                )),
+            ]
+            latency = [
+                ("page de 100", measure(orm_page, args.number),
+                 measure(lambda: reads.list_transactions(read_db, user_id), args.number)),
+                ("transaction par id", measure(orm_get, args.number),
+                 measure(lambda: reads.get_transaction(read_db, user_id, transaction_id), args.number)),
+                ("résumé", measure(orm_summary, args.number),
+                 measure(lambda: reads.get_summary(read_db, user_id), args.number)),
+            ]
+        finally:
+            orm_db.close()
+            read_db.close()
+            engine.dispose()
+
+    print(f"Mémoire retenue pour {args.rows} transactions")
+    for label, size in memory:
+        print(f"  {label:<20} {size / 1024:10.1f} Kio ({size / args.rows * 1000 / 1024:.1f} Kio / 1000 lignes)")
+    print(f"  gain : x{memory[0][1] / memory[1][1]:.1f}")
+    print("Latence (µs)                   ORM    colonnes")
+    for label, orm_duration, read_duration in latency:
+        print(f"  {label:<22} {orm_duration:10.1f} {read_duration:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
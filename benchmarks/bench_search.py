@@ -0,0 +1,134 @@
+# benchmarks/bench_search.py - Recherche plein texte : index ou LIKE '%mot%'
+#
+# Remplit une base SQLite de transactions réparties entre plusieurs
+# utilisateurs (libellés tirés d'une liste d'enseignes), puis mesure la
+# latence de app/search.py (FTS5 et table transaction_tokens) face à un
+# LIKE sur le titre et la description, pour un mot fréquent, des mots rares,
+# un préfixe, deux mots et une recherche sans résultat.
+#
+#   python -m benchmarks.bench_search [--rows 1000000] [--users 20] [--number 20]
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import timeit
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert, or_, select
+from sqlalchemy.orm import sessionmaker
+
+from app import search
+from app.database import Base
+from app.models import Transaction, User
+from app.reads import TRANSACTION_COLUMNS
+
+# Enseignes réelles en tête d'une liste d'enseignes générées ; fréquences en
+# 1/rang (loi de Zipf) : "Carrefour" apparaît dans ~12 % des transactions
+MERCHANTS = ["Carrefour", "Leclerc", "Pharmacie", "Boulangerie", "Lidl", "Monoprix", "Picard", "Fnac"]
+SYLLABLES = ["ca", "re", "four", "mo", "no", "prix", "bou", "lan", "ge", "rie", "sta", "tion", "to", "tal", "vo", "lta"]
+WORDS = ["courses", "semaine", "cadeau", "essence", "abonnement", "remboursement", "facture", "repas"] + [
+    f"note{i}" for i in range(300)
+]
+# (libellé, requête) : mot fréquent, mots rares, préfixe, deux mots, aucun résultat
+QUERIES = [("mot fréquent", "carrefour"), ("mots rares", "remboursement facture"),
+           ("préfixe", "phar"), ("deux mots", "carrefour market"), ("aucun résultat", "introuvable")]
+MERCHANT_COUNT = 2000
+BATCH_SIZE = 50000
+
+
+def measure(func, number: int, repeat: int = 5) -> float:
+    """Durée médiane d'un appel, en millisecondes"""
+    return statistics.median(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e3
+
+
+def like_search(db, user_id: int, q: str, limit: int = 20):
+    """Recherche naïve : chaque mot en LIKE '%mot%' sur le titre ou la description"""
+    statement = select(*TRANSACTION_COLUMNS).where(Transaction.user_id == user_id)
+    for word in q.split():
+        pattern = f"%{word}%"
+        statement = statement.where(or_(Transaction.title.ilike(pattern), Transaction.description.ilike(pattern)))
+    return db.execute(statement.order_by(Transaction.date.desc()).limit(limit)).all()
+
+
+def fill(engine, rows: int, users: int) -> list:
+    random.seed(42)
+    merchants = list(MERCHANTS)
+    while len(merchants) < MERCHANT_COUNT:
+        merchants.append("".join(random.sample(SYLLABLES, random.randint(2, 4))).capitalize())
+    weights = [1 / rank for rank in range(1, len(merchants) + 1)]
+
+    with engine.begin() as conn:
+        user_ids = [
+            conn.execute(insert(User).values(
+                email=f"bench{i}@example.com", username=f"bench{i}", hashed_password="x"
+            )).inserted_primary_key[0]
+            for i in range(users)
+        ]
+    start = datetime(2015, 1, 1)
+    for offset in range(0, rows, BATCH_SIZE):
+        count = min(BATCH_SIZE, rows - offset)
+        titles = random.choices(merchants, weights, k=count)
+        with engine.begin() as conn:
+            conn.execute(insert(Transaction), [
+                {
+                    "title": title + (" Market" if random.random() < 0.1 else ""),
+                    "amount": round(random.uniform(1, 200), 2),
+                    "category": "expense",
+                    "description": " ".join(random.sample(WORDS, 2)) if i % 4 else None,
+                    "date": start + timedelta(minutes=i),
+                    "user_id": user_ids[i % users],
+                }
+                for i, title in enumerate(titles, start=offset)
+            ])
+    return user_ids
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_search")
+    parser.add_argument("--rows", type=int, default=1000000, help="transactions au total")
+    parser.add_argument("--users", type=int, default=20, help="utilisateurs entre qui elles sont réparties")
+    parser.add_argument("--number", type=int, default=20, help="appels par mesure")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.db")
+        Base.metadata.create_all(engine)
+        started = time.perf_counter()
+        user_ids = fill(engine, args.rows, args.users)
+        print(f"{args.rows} transactions insérées (FTS5 par triggers) en {time.perf_counter() - started:.1f} s")
+
+        db = sessionmaker(bind=engine)()
+        try:
+            previous = search.SEARCH_INDEX
+            search.SEARCH_INDEX = "tokens"
+            started = time.perf_counter()
+            search.rebuild_index(db)
+            print(f"transaction_tokens remplie en {time.perf_counter() - started:.1f} s")
+
+            user_id = user_ids[0]
+            results = []
+            for label, q in QUERIES:
+                search.SEARCH_INDEX = "auto"
+                fts5 = measure(lambda: search.search_transactions(db, user_id, q), args.number)
+                search.SEARCH_INDEX = "tokens"
+                tokens = measure(lambda: search.search_transactions(db, user_id, q), args.number)
+                like = measure(lambda: like_search(db, user_id, q), args.number)
+                results.append((f"{label} ({q})", fts5, tokens, like))
+            search.SEARCH_INDEX = previous
+        finally:
+            db.close()
+            engine.dispose()
+
+    print(f"Latence d'une page de 20 résultats (ms), {args.rows // args.users} transactions par utilisateur")
+    print(f"  {'requête':<40} {'FTS5':>8} {'tokens':>8} {'LIKE':>8}")
+    for label, fts5, tokens, like in results:
+        print(f"  {label:<40} {fts5:8.2f} {tokens:8.2f} {like:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_serialization.py - Sérialisation d'une page de transactions
+#
+# Compare l'ancien chemin (entités ORM validées par TransactionResponse avec
+# from_attributes, puis encodées par Pydantic) au chemin rapide (colonnes
+# seules, TransactionRecord, orjson), avec et sans la requête SQL.
+#
+#   python -m benchmarks.bench_serialization [--rows 100] [--number 200]
+
+import argparse
+import os
+import statistics
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import reads
+from app.database import Base
+from app.models import Transaction, User
+from app.schemas import TransactionResponse
+from app.serialization import dump_transactions, orjson
+
+_responses = TypeAdapter(List[TransactionResponse])
+
+
+def orm_page(db, user_id: int, limit: int) -> list:
+    return db.query(Transaction).filter(
+        Transaction.user_id == user_id
+    ).order_by(Transaction.date, Transaction.id).limit(limit).all()
+
+
+def dump_orm(transactions) -> bytes:
+    return _responses.dump_json(_responses.validate_python(transactions, from_attributes=True))
+
+
+def measure(func, number: int, repeat: int = 5) -> float:
+    """Durée médiane d'un appel, en microsecondes"""
+    return statistics.median(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_serialization")
+    parser.add_argument("--rows", type=int, default=100, help="taille de la page")
+    parser.add_argument("--number", type=int, default=200, help="appels par mesure")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.db")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        with engine.begin() as conn:
+            user_id = conn.execute(
+                insert(User).values(email="bench@example.com", username="bench", hashed_password="x")
+            ).inserted_primary_key[0]
+            start = datetime(2024, 1, 1)
+            conn.execute(insert(Transaction), [
+                {
+                    "title": f"Transaction {i}",
+                    "amount": i * 1.25,
+                    "category": "income" if i % 3 == 0 else "expense",
+                    "description": "Description" if i % 2 else None,
+                    "date": start + timedelta(minutes=i),
+                    "user_id": user_id,
+                }
+                for i in range(args.rows)
+            ])
+
+        db = Session()
+        try:
+            entities = orm_page(db, user_id, args.rows)
+            rows, _ = reads.list_transactions(db, user_id, limit=args.rows)
+            assert len(rows) == len(entities) == args.rows
+
+            def orm_path():
+                db.expunge_all()
+                return dump_orm(orm_page(db, user_id, args.rows))
+
+            def column_path():
+                return dump_transactions(reads.list_transactions(db, user_id, limit=args.rows)[0])
+
+            results = [
+                ("sérialisation ORM (from_attributes + Pydantic)", measure(lambda: dump_orm(entities), args.number)),
+                ("sérialisation colonnes (records + orjson)", measure(lambda: dump_transactions(rows), args.number)),
+                ("requête + sérialisation ORM", measure(orm_path, args.number)),
+                ("requête + sérialisation colonnes", measure(column_path, args.number)),
+            ]
+        finally:
+            db.close()
+            engine.dispose()
+
+    print(f"Page de {args.rows} transactions, orjson {'présent' if orjson else 'absent'}")
+    for label, duration in results:
+        print(f"  {label:<50} {duration:10.1f} µs")
+    print(f"  gain sérialisation : x{results[0][1] / results[1][1]:.1f}, "
+          f"gain total : x{results[2][1] / results[3][1]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_startup.py - Démarrage à froid : de l'import à la première réponse
+#
+# Chaque mesure part d'un nouvel interpréteur (aucun module en cache) :
+#   - import : `import app.main` (l'engine ne doit pas encore exister) ;
+#   - prêt : import + lifespan (DB_INIT) + première requête /health ;
+#   - uvicorn : lancement du serveur jusqu'à la première réponse /health.
+# Sortie en erreur si la médiane « prêt » dépasse l'objectif (--target-ms).
+#
+#   python -m benchmarks.bench_startup [--repeat 5] [--target-ms 1500] [--db-init none]
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+# Exécuté dans un interpréteur neuf ; affiche les durées en JSON
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+import httpx
+from app.database import get_engine_if_created
+engine_at_import = get_engine_if_created() is not None
+
+async def ready():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.get("/health")).raise_for_status()
+        return time.perf_counter()
+
+done = asyncio.run(ready())
+print(json.dumps({"import": imported - started, "ready": done - started, "engine_at_import": engine_at_import}))
+"""
+
+
+def in_process(env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def uvicorn_ready(env: dict) -> float:
+    """Secondes entre le lancement d'uvicorn et la première réponse /health"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                    return time.perf_counter() - started
+            except OSError:
+                if server.poll() is not None or time.perf_counter() - started > 60:
+                    raise RuntimeError("Le serveur uvicorn n'a pas démarré")
+                time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_startup")
+    parser.add_argument("--repeat", type=int, default=5, help="démarrages mesurés")
+    parser.add_argument("--target-ms", type=float, default=1500, help="objectif pour la médiane « prêt »")
+    parser.add_argument("--db-init", choices=["none", "create", "migrate"], default="none")
+    parser.add_argument("--database-url", help="base utilisée (défaut : fichier SQLite temporaire)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "DATABASE_URL": args.database_url or f"sqlite:///{directory}/bench.db",
+            "DB_INIT": args.db_init,
+        }
+        runs = [in_process(env) for _ in range(args.repeat)]
+        servers = [uvicorn_ready(env) for _ in range(args.repeat)]
+
+    imports = statistics.median(run["import"] for run in runs) * 1000
+    ready = statistics.median(run["ready"] for run in runs) * 1000
+    server = statistics.median(servers) * 1000
+    print(f"Démarrage à froid (médiane de {args.repeat}, DB_INIT={args.db_init})")
+    print(f"  import app.main          {imports:8.1f} ms")
+    print(f"  prêt (lifespan, /health) {ready:8.1f} ms   objectif {args.target_ms:.0f} ms")
+    print(f"  uvicorn jusqu'à /health  {server:8.1f} ms")
+    if any(run["engine_at_import"] for run in runs):
+        print("  ERREUR : l'engine est créé dès l'import")
+        return 1
+    return 0 if ready <= args.target_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,10 @@ const Transactions = {
     async loadData() {
         try {
             // Récupérer les statistiques
+            // cache: 'no-cache' : le navigateur revalide avec If-None-Match (304 si rien n'a changé)
             const statsResponse = await fetch(`${CONFIG.API_URL}/api/transactions/stats/summary`, {
-                headers: { 'Authorization': `Bearer ${Auth.token}` }
+                headers: { 'Authorization': `Bearer ${Auth.token}` },
+                cache: 'no-cache'
             });
 
             if (statsResponse.status === 401) {
@@ -29,7 +31,8 @@ const Transactions = {
 
             // Récupérer les transactions
             const transResponse = await fetch(`${CONFIG.API_URL}/api/transactions/`, {
-                headers: { 'Authorization': `Bearer ${Auth.token}` }
+                headers: { 'Authorization': `Bearer ${Auth.token}` },
+                cache: 'no-cache'
             });
 
             if (transResponse.status === 401) {
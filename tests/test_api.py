@@ -1,5 +1,7 @@
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from app.main import app
 from app.database import Base, engine
 
@@ -8,10 +10,37 @@ client = TestClient(app)
 # Setup/Teardown de la base de données de test
 @pytest.fixture(autouse=True)
 def setup_database():
+    from app.auth import reset_auth_cache
+    from app.response_cache import response_cache
+
+    # Les tables sont recréées à chaque test : les ids d'utilisateurs sont réutilisés
+    reset_auth_cache()
+    response_cache.clear()
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
 
+@contextmanager
+def count_queries():
+    """Compte les requêtes SQL exécutées sur l'engine pendant le bloc"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def get_token(username="testuser", email="test@example.com", password="123"):
+    """Créer un utilisateur, se connecter et retourner son token"""
+    client.post("/api/auth/register",
+                json={"email": email, "username": username, "password": password})
+    login_response = client.post("/api/auth/login", data={"username": username, "password": password})
+    return login_response.json()["access_token"]
+
 def test_read_root():
     """Test de la route racine"""
     response = client.get("/")
@@ -251,6 +280,15 @@ def test_update_transaction():
     assert updated_transaction["category"] == "expense"
     assert updated_transaction["description"] == "Test"
 
+    # 4. null refusé pour les champs obligatoires, accepté pour la description
+    for field in ("title", "amount", "category"):
+        response = client.put("/api/transactions/1", json={field: None},
+                              headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 422
+    response = client.put("/api/transactions/1", json={"description": None},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200 and response.json()["description"] is None
+
 def test_delete_transaction():
     """Test de suppression d'une transaction"""
     client.post("/api/auth/register",
@@ -584,3 +622,1354 @@ def test_token_signed_with_wrong_key():
     response = client.get("/api/transactions/", headers={"Authorization": f"Bearer {wrong_token}"})
     assert response.status_code == 401
 
+
+def test_get_summary_large_dataset_uses_sql_aggregation():
+    """Test du résumé sur un gros volume : résultat exact et nombre de requêtes borné"""
+    from app import ledger
+    from app.database import SessionLocal
+    from app.models import Transaction, User
+    from sqlalchemy import insert, select
+
+    token = get_token()
+    get_token(username="otheruser", email="other@example.com")
+
+    with engine.begin() as conn:
+        user_id = conn.execute(select(User.id).where(User.username == "testuser")).scalar_one()
+        other_id = conn.execute(select(User.id).where(User.username == "otheruser")).scalar_one()
+        rows = [
+            {
+                "title": f"Transaction {i}",
+                "amount": float(i % 100),
+                "category": "income" if i % 3 == 0 else "expense",
+                "user_id": user_id,
+            }
+            for i in range(5000)
+        ]
+        # Transactions d'un autre utilisateur, qui ne doivent pas être comptées
+        rows += [
+            {"title": "Autre", "amount": 1000.0, "category": "income", "user_id": other_id}
+            for _ in range(100)
+        ]
+        conn.execute(insert(Transaction), rows)
+
+    # Import hors API : le solde maintenu est reconstruit par agrégation SQL
+    db = SessionLocal()
+    try:
+        with count_queries() as statements:
+            drifts = ledger.rebuild_balances(db)
+    finally:
+        db.close()
+    assert {drift["user_id"] for drift in drifts} == {user_id, other_id}
+    assert len(statements) <= 5
+
+    expected_income = float(sum(i % 100 for i in range(5000) if i % 3 == 0))
+    expected_expense = float(sum(i % 100 for i in range(5000) if i % 3 != 0))
+
+    with count_queries() as statements:
+        response = client.get("/api/transactions/stats/summary", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_income"] == pytest.approx(expected_income)
+    assert data["total_expense"] == pytest.approx(expected_expense)
+    assert data["balance"] == pytest.approx(expected_income - expected_expense)
+    assert data["transaction_count"] == 5000
+    # Authentification + lecture d'une seule ligne de solde
+    assert len(statements) <= 2
+
+
+def test_summary_ledger_follows_writes():
+    """Test du solde maintenu lors des créations, modifications et suppressions"""
+    from app import ledger
+    from app.database import SessionLocal
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    salary = client.post("/api/transactions/",
+                         json={"title": "Salaire", "amount": 3000.0, "category": "income"},
+                         headers=headers).json()
+    groceries = client.post("/api/transactions/",
+                            json={"title": "Courses", "amount": 200.0, "category": "expense"},
+                            headers=headers).json()
+    client.put(f"/api/transactions/{groceries['id']}", json={"amount": 250.0}, headers=headers)
+    client.put(f"/api/transactions/{salary['id']}", json={"category": "expense"}, headers=headers)
+    client.delete(f"/api/transactions/{groceries['id']}", headers=headers)
+
+    data = client.get("/api/transactions/stats/summary", headers=headers).json()
+    assert data == {
+        "total_income": 0.0,
+        "total_expense": 3000.0,
+        "balance": -3000.0,
+        "transaction_count": 1
+    }
+
+    db = SessionLocal()
+    try:
+        assert ledger.rebuild_balances(db, fix=False) == []
+    finally:
+        db.close()
+
+
+def test_ledger_verify_reports_and_rebuild_fixes_drift(capsys):
+    """Test de la commande de vérification et de reconstruction du solde"""
+    from app import ledger
+    from app.models import UserBalance
+    from sqlalchemy import update
+
+    token = get_token()
+    client.post("/api/transactions/",
+                json={"title": "Salaire", "amount": 3000.0, "category": "income"},
+                headers={"Authorization": f"Bearer {token}"})
+
+    with engine.begin() as conn:
+        conn.execute(update(UserBalance).values(total_income=1.0))
+
+    assert ledger.main(["verify"]) == 1
+    assert "total_income" in capsys.readouterr().out
+    assert ledger.main(["rebuild"]) == 0
+    assert ledger.main(["verify"]) == 0
+
+    data = client.get("/api/transactions/stats/summary", headers={"Authorization": f"Bearer {token}"}).json()
+    assert data["total_income"] == 3000.0
+
+    # Gros totaux : un écart d'arrondi flottant (relatif) n'est pas une dérive
+    client.post("/api/transactions/",
+                json={"title": "Cession", "amount": 20_000_000.0, "category": "income"},
+                headers={"Authorization": f"Bearer {token}"})
+    with engine.begin() as conn:
+        conn.execute(update(UserBalance).values(total_income=20_003_000.0 + 1e-5))
+    assert ledger.main(["verify"]) == 0
+
+
+def test_get_transactions_cursor_pagination():
+    """Test de la pagination par curseur : ordre (date, id), sans doublon ni trou"""
+    from app.models import Transaction, User
+    from datetime import datetime
+    from sqlalchemy import insert, select
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with engine.begin() as conn:
+        user_id = conn.execute(select(User.id).where(User.username == "testuser")).scalar_one()
+        # Plusieurs transactions à la même date : l'id départage
+        conn.execute(insert(Transaction), [
+            {
+                "title": f"Transaction {i}",
+                "amount": 10.0,
+                "category": "expense",
+                "date": datetime(2025, 1, 1 + i // 3),
+                "user_id": user_id,
+            }
+            for i in range(7)
+        ])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["after"] = cursor
+        response = client.get("/api/transactions/", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [(t["date"], t["id"]) for t in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert len(seen) == 7
+    assert seen == sorted(seen)
+    assert len(set(seen)) == 7
+
+
+def test_get_transactions_limit_and_cursor_validation():
+    """Test de la limite maximale de 100 et du rejet d'un curseur invalide"""
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/transactions/?limit=101", headers=headers)
+    assert response.status_code == 422
+
+    response = client.get("/api/transactions/?after=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+
+
+def test_transaction_queries_use_composite_indexes():
+    """Test du plan d'exécution (EXPLAIN QUERY PLAN) des requêtes de lecture sous SQLite"""
+    from app import ledger
+    from app.database import SessionLocal
+
+    if engine.dialect.name != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN est spécifique à SQLite")
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(3):
+        client.post("/api/transactions/",
+                    json={"title": f"Transaction {i}", "amount": 10.0, "category": "expense"},
+                    headers=headers)
+
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM transactions" in statement:
+            executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        cursor = client.get("/api/transactions/?limit=2", headers=headers).headers["X-Next-Cursor"]
+        client.get(f"/api/transactions/?limit=2&after={cursor}", headers=headers)
+        client.get("/api/transactions/?category=expense", headers=headers)
+        db = SessionLocal()
+        try:
+            ledger.compute_summary(db, 1)
+        finally:
+            db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in executed:
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            plans.append(" ".join(row[-1] for row in rows))
+
+    assert len(plans) == 4
+    assert "ix_transactions_user_date_id" in plans[0]
+    assert "ix_transactions_user_date_id" in plans[1]
+    assert "ix_transactions_user_category_date" in plans[2]
+    assert "ix_transactions_user_category_date" in plans[3]
+
+
+def test_migrations_match_models(tmp_path):
+    """Test que les migrations Alembic produisent le schéma déclaré dans les modèles"""
+    from alembic import command
+    from alembic.autogenerate import compare_metadata
+    from alembic.config import Config
+    from alembic.migration import MigrationContext
+    from pathlib import Path
+    from sqlalchemy import create_engine, text
+    from app.search import include_name
+
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = Config(str(Path(__file__).resolve().parent.parent / "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "0004_user_token_version")
+
+    # Base existante : les totaux mensuels sont calculés par la migration 0005
+    migrated = create_engine(url)
+    with migrated.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, email, username, hashed_password, token_version) "
+            "VALUES (1, 'a@example.com', 'a', 'x', 0)"
+        ))
+        conn.execute(text(
+            "INSERT INTO transactions (title, amount, category, date, user_id) VALUES "
+            "('a', 10.0, 'expense', '2025-03-02 10:00:00', 1), ('b', 5.5, 'expense', '2025-03-30 10:00:00', 1), "
+            "('c', 100.0, 'income', '2025-04-01 00:00:00', 1)"
+        ))
+    migrated.dispose()
+    command.upgrade(config, "head")
+
+    migrated = create_engine(url)
+    try:
+        with migrated.connect() as conn:
+            assert sorted(conn.execute(text(
+                "SELECT user_id, year_month, category, total, count FROM monthly_rollups"
+            ))) == [(1, "2025-03", "expense", 15.5, 2), (1, "2025-04", "income", 100.0, 1)]
+            # L'index plein texte (table FTS5 sous SQLite) n'est pas décrit par les modèles
+            context = MigrationContext.configure(conn, opts={"include_name": include_name})
+            diff = compare_metadata(context, Base.metadata)
+    finally:
+        migrated.dispose()
+    assert diff == []
+
+
+def test_authenticated_user_is_cached_per_token(monkeypatch):
+    """Test du cache des utilisateurs authentifiés : pas de requête users après le premier appel"""
+    from app.routers import admin
+
+    monkeypatch.setattr(admin, "ADMIN_API_KEY", "admin-secret")
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    transaction = {"title": "Courses", "amount": 50.0, "category": "expense"}
+
+    # Les écritures utilisent l'authentification stricte (vérifiée en base)
+    client.post("/api/transactions/", json=transaction, headers=headers)
+    with count_queries() as statements:
+        response = client.post("/api/transactions/", json=transaction, headers=headers)
+    assert response.status_code == 201
+    assert not any("FROM users" in statement for statement in statements)
+
+    stats = client.get("/api/admin/stats/auth-cache", headers={"X-Admin-Key": "admin-secret"}).json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+    assert client.get("/api/admin/stats/auth-cache").status_code == 403
+    assert client.get("/api/admin/stats/auth-cache", headers={"X-Admin-Key": "wrong"}).status_code == 403
+
+
+def test_user_cache_invalidated_on_password_change_and_deletion():
+    """Test de l'invalidation du cache lors d'un changement de mot de passe ou d'une suppression"""
+    from app.auth import get_password_hash, user_cache
+    from app.database import SessionLocal
+    from app.models import User
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    transaction = {"title": "Courses", "amount": 50.0, "category": "expense"}
+    client.post("/api/transactions/", json=transaction, headers=headers)
+    assert user_cache.stats()["size"] == 1
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == "testuser").first()
+        user.hashed_password = get_password_hash("nouveau")
+        db.commit()
+        assert user_cache.stats()["size"] == 0
+
+        client.post("/api/transactions/", json=transaction, headers=headers)
+        assert user_cache.stats()["size"] == 1
+
+        db.delete(user)
+        db.commit()
+        assert user_cache.stats()["size"] == 0
+    finally:
+        db.close()
+
+    response = client.post("/api/transactions/", json=transaction, headers=headers)
+    assert response.status_code == 401
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired_entries():
+    """Test du cache LRU/TTL : taille bornée et expiration"""
+    from app.cache import TTLCache
+
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # "b" est la moins récemment utilisée
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d") is None
+    assert cache.stats()["evictions"] == 2
+
+
+def test_read_endpoints_authenticate_from_token_claims():
+    """Test de l'authentification des lectures sans requête sur la table users"""
+    from app.auth import SECRET_KEY, ALGORITHM
+    from jose import jwt
+
+    token = get_token()
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    assert claims["sub"] == "testuser"
+    assert claims["uid"] == 1
+    assert claims["ver"] == 0
+
+    headers = {"Authorization": f"Bearer {token}"}
+    with count_queries() as statements:
+        assert client.get("/api/transactions/", headers=headers).status_code == 200
+        assert client.get("/api/transactions/stats/summary", headers=headers).status_code == 200
+    # Seule lecture de users : data_version pour l'ETag, pas l'authentification
+    users_queries = [statement for statement in statements if "FROM users" in statement]
+    assert users_queries and all("users.username" not in statement for statement in users_queries)
+
+
+def test_legacy_token_without_uid_still_accepted_on_reads():
+    """Test d'un ancien token (sans claim uid) sur une route de lecture"""
+    from app.auth import create_access_token
+
+    get_token()
+    legacy_token = create_access_token(data={"sub": "testuser"})
+    response = client.get("/api/transactions/", headers={"Authorization": f"Bearer {legacy_token}"})
+    assert response.status_code == 200
+
+
+def test_revoke_invalidates_existing_tokens(monkeypatch):
+    """Test de la révocation : les anciens tokens sont refusés, un nouveau login fonctionne"""
+    from app import auth
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    transaction = {"title": "Courses", "amount": 50.0, "category": "expense"}
+    assert client.post("/api/transactions/", json=transaction, headers=headers).status_code == 201
+
+    assert client.post("/api/auth/revoke", headers=headers).status_code == 204
+
+    assert client.post("/api/transactions/", json=transaction, headers=headers).status_code == 401
+    assert client.get("/api/transactions/", headers=headers).status_code == 401
+
+    new_token = client.post("/api/auth/login", data={"username": "testuser", "password": "123"}).json()["access_token"]
+    new_headers = {"Authorization": f"Bearer {new_token}"}
+    assert client.post("/api/transactions/", json=transaction, headers=new_headers).status_code == 201
+    assert client.get("/api/transactions/", headers=new_headers).status_code == 200
+
+    # Révocation déjà connue : un token absent du cache ne déclenche pas de parcours du cache
+    invalidated = []
+    monkeypatch.setattr(auth, "invalidate_user", invalidated.append)
+    for _ in range(3):
+        auth.user_cache.clear()
+        assert client.post("/api/transactions/", json=transaction, headers=new_headers).status_code == 201
+    assert invalidated == []
+
+
+def test_password_hashing_runs_in_pool_with_metrics(monkeypatch):
+    """Test du hachage hors du chemin de requête : coût configuré et métriques de latence"""
+    from app.hashing import BCRYPT_ROUNDS, password_hasher
+    from app.models import User
+    from app.database import SessionLocal
+    from app.routers import admin
+
+    monkeypatch.setattr(admin, "ADMIN_API_KEY", "admin-secret")
+    before = password_hasher.stats()
+    get_token()
+
+    db = SessionLocal()
+    try:
+        hashed_password = db.query(User.hashed_password).filter(User.username == "testuser").scalar()
+    finally:
+        db.close()
+    assert hashed_password.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+
+    stats = client.get("/api/admin/stats/password-hashing", headers={"X-Admin-Key": "admin-secret"}).json()
+    assert stats["hash_latency"]["count"] == before["hash_latency"]["count"] + 1
+    assert stats["verify_latency"]["count"] == before["verify_latency"]["count"] + 1
+    assert stats["pending"] == 0
+
+
+def test_password_hashing_sheds_load_when_queue_is_full(monkeypatch):
+    """Test du refus (503) quand la file de hachage est pleine"""
+    from app.hashing import password_hasher
+
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    rejected = password_hasher.rejected
+
+    response = client.post("/api/auth/register",
+                           json={"email": "test@example.com", "username": "testuser", "password": "123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert password_hasher.rejected == rejected + 1
+
+
+def test_async_routes_crud_flow():
+    """Test du mode asynchrone (AsyncSession) : mêmes routes, mêmes réponses"""
+    from fastapi import FastAPI
+    from app.database import get_async_engine
+    from app.routers import auth_async, transactions_async
+
+    async_app = FastAPI()
+    async_app.include_router(auth_async.router, prefix="/api/auth")
+    async_app.include_router(transactions_async.router, prefix="/api/transactions")
+
+    with TestClient(async_app) as async_client:
+        try:
+            response = async_client.post("/api/auth/register",
+                                         json={"email": "test@example.com", "username": "testuser", "password": "123"})
+            assert response.status_code == 201
+            token = async_client.post("/api/auth/login",
+                                      data={"username": "testuser", "password": "123"}).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            created = async_client.post("/api/transactions/",
+                                        json={"title": "Salaire", "amount": 3000.0, "category": "income"},
+                                        headers=headers)
+            assert created.status_code == 201
+            transaction_id = created.json()["id"]
+
+            response = async_client.put(f"/api/transactions/{transaction_id}", json={"amount": 2500.0}, headers=headers)
+            assert response.json()["amount"] == 2500.0
+            assert async_client.get(f"/api/transactions/{transaction_id}", headers=headers).json()["title"] == "Salaire"
+            assert len(async_client.get("/api/transactions/", headers=headers).json()) == 1
+            assert async_client.get("/api/transactions/stats/summary", headers=headers).json()["balance"] == 2500.0
+
+            assert async_client.delete(f"/api/transactions/{transaction_id}", headers=headers).status_code == 204
+            assert async_client.get(f"/api/transactions/{transaction_id}", headers=headers).status_code == 404
+            assert async_client.get("/api/transactions/stats/summary", headers=headers).json()["transaction_count"] == 0
+
+            response = async_client.post("/api/transactions/bulk", json=[
+                {"title": "Courses", "amount": 40.0, "category": "expense"},
+                {"title": "Erreur", "amount": 1.0, "category": "autre"},
+            ], headers=headers)
+            assert response.status_code == 201
+            assert response.json()["inserted"] == 1 and response.json()["errors"][0]["index"] == 1
+            assert async_client.get("/api/transactions/stats/summary", headers=headers).json()["balance"] == -40.0
+        finally:
+            async_client.portal.call(get_async_engine().dispose)
+
+    # Toutes les routes passent par AsyncSession, sauf l'export (flux lu par une session synchrone)
+    assert {
+        route.name for route in transactions_async.router.routes
+        if route.endpoint.__module__ == "app.routers.transactions"
+    } == {"export_transactions"}
+
+
+def test_to_async_url():
+    """Test de la conversion des URLs vers les drivers asynchrones"""
+    from app.database import to_async_url
+
+    assert to_async_url("sqlite:///./budget.db") == "sqlite+aiosqlite:///./budget.db"
+    assert to_async_url("mysql+pymysql://root:pw@localhost:3306/budget_db") == "mysql+aiomysql://root:pw@localhost:3306/budget_db"
+    assert to_async_url("postgresql://user:password@db:5432/budget_db") == "postgresql+asyncpg://user:password@db:5432/budget_db"
+    assert to_async_url("sqlite+aiosqlite:///./budget.db") == "sqlite+aiosqlite:///./budget.db"
+
+
+def test_db_pool_stats_and_slow_checkout_log(monkeypatch, caplog):
+    """Test des statistiques du pool de connexions et du journal des obtentions lentes"""
+    from app.routers import admin
+
+    if not hasattr(engine.pool, "telemetry"):
+        pytest.skip("Pool sans file d'attente (SQLite en mémoire)")
+
+    monkeypatch.setattr(admin, "ADMIN_API_KEY", "admin-secret")
+    monkeypatch.setattr(engine.pool.telemetry, "slow_threshold", 0.0)
+
+    with caplog.at_level("WARNING", logger="app.database"):
+        token = get_token()
+        client.get("/api/transactions/", headers={"Authorization": f"Bearer {token}"})
+    assert "Obtention de connexion lente" in caplog.text
+
+    stats = client.get("/api/admin/stats/db-pool", headers={"X-Admin-Key": "admin-secret"}).json()["sync"]
+    assert stats["checked_out"] == 0
+    assert stats["checkout_wait"]["count"] > 0
+    assert stats["slow_checkouts"] > 0
+    assert {"size", "overflow", "checked_in", "timeouts"} <= stats.keys()
+
+
+def test_engine_options_from_settings():
+    """Test des options de pool appliquées selon le type de base"""
+    from app.database import engine_options
+    from app.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+    options = engine_options("mysql+pymysql://root:pw@localhost:3306/budget_db")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping"} <= options.keys()
+
+    assert engine_options("sqlite+aiosqlite:///./budget.db", async_mode=True)["poolclass"] is InstrumentedAsyncQueuePool
+    assert "pool_size" not in engine_options("sqlite://")
+
+
+def test_bulk_import_json_array():
+    """Test de l'import en masse : lignes valides insérées, erreurs signalées par position"""
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    rows = [
+        {"title": f"Transaction {i}", "amount": 10.0, "category": "income" if i % 2 else "expense"}
+        for i in range(2500)
+    ]
+    rows[3] = {"title": "Sans montant", "category": "expense"}
+    rows[7] = {"title": "Catégorie", "amount": 5.0, "category": "autre"}
+
+    with count_queries() as statements:
+        response = client.post("/api/transactions/bulk", json=rows, headers=headers)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["inserted"] == 2498
+    assert [error["index"] for error in data["errors"]] == [3, 7]
+    assert "amount" in data["errors"][0]["detail"]
+    # Authentification + 3 lots d'INSERT + solde + totaux mensuels, pas une requête par ligne
+    assert len(statements) < 10
+
+    summary = client.get("/api/transactions/stats/summary", headers=headers).json()
+    assert summary["transaction_count"] == 2498
+    # Les lignes 3 et 7 (impaires, donc des revenus) sont rejetées
+    assert summary["total_income"] == pytest.approx(10.0 * 1248)
+    assert summary["total_expense"] == pytest.approx(10.0 * 1250)
+
+
+def test_bulk_import_ndjson_stream():
+    """Test de l'import en masse au format NDJSON"""
+    token = get_token()
+    body = "\n".join([
+        '{"title": "Salaire", "amount": 3000.0, "category": "income"}',
+        'pas du json',
+        '',
+        '{"title": "Courses", "amount": 50.0, "category": "expense", "description": "Marché"}',
+    ])
+
+    response = client.post(
+        "/api/transactions/bulk",
+        content=body.encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {"inserted": 2, "errors": [{"index": 1, "detail": "JSON invalide"}]}
+    transactions = client.get("/api/transactions/", headers={"Authorization": f"Bearer {token}"}).json()
+    assert [t["title"] for t in transactions] == ["Salaire", "Courses"]
+
+
+def test_bulk_import_rejects_invalid_body_and_oversized_imports(monkeypatch):
+    """Test du rejet d'un corps invalide et d'un import trop volumineux"""
+    from app.routers import transactions
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/api/transactions/bulk", json={"title": "Pas un tableau"}, headers=headers)
+    assert response.status_code == 400
+
+    monkeypatch.setattr(transactions, "BULK_IMPORT_MAX_ROWS", 2)
+    rows = [{"title": "T", "amount": 1.0, "category": "expense"}] * 3
+    response = client.post("/api/transactions/bulk", json=rows, headers=headers)
+    assert response.status_code == 413
+    assert client.get("/api/transactions/stats/summary", headers=headers).json()["transaction_count"] == 0
+
+
+def test_export_transactions_csv_and_ndjson_streams():
+    """Test de l'export en flux : toutes les lignes, filtres par catégorie et par dates"""
+    import csv
+    import io
+    import json
+    from datetime import datetime, timedelta, timezone
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = [
+        {"title": f"Ligne, {i}", "amount": float(i), "category": "income" if i % 3 == 0 else "expense"}
+        for i in range(2500)
+    ]
+    assert client.post("/api/transactions/bulk", json=rows, headers=headers).status_code == 201
+
+    response = client.get("/api/transactions/export?format=csv", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="transactions.csv"' in response.headers["content-disposition"]
+    exported = list(csv.reader(io.StringIO(response.text)))
+    assert exported[0] == ["id", "date", "title", "amount", "category", "description"]
+    assert len(exported) == 2501
+    assert exported[1][2:5] == ["Ligne, 0", "0.0", "income"]
+
+    response = client.get("/api/transactions/export?format=ndjson&category=income", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 834
+    assert {line["category"] for line in lines} == {"income"}
+    assert [line["id"] for line in lines] == sorted(line["id"] for line in lines)
+
+    # Intervalle de dates qui exclut toutes les transactions
+    response = client.get(
+        "/api/transactions/export?format=ndjson&from=2000-01-01T00:00:00&to=2000-02-01T00:00:00",
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.text == ""
+
+    # Borne avec fuseau : convertie en UTC (il y a 30 minutes, exprimé en UTC+02:00)
+    since = (datetime.now(timezone.utc) - timedelta(minutes=30)).astimezone(timezone(timedelta(hours=2)))
+    response = client.get("/api/transactions/export", params={"format": "ndjson", "from": since.isoformat()},
+                          headers=headers)
+    assert len(response.text.splitlines()) == 2500
+
+    assert client.get("/api/transactions/export?format=xml", headers=headers).status_code == 422
+    assert client.get("/api/transactions/export").status_code == 401
+
+
+def test_timeseries_groups_by_day_week_and_month():
+    """Test des séries temporelles : regroupement SQL, bornes de dates et détail par catégorie"""
+    from datetime import datetime
+    from app import rollups
+    from app.database import SessionLocal
+    from app.models import Transaction, User
+    from sqlalchemy import insert, select
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with engine.begin() as conn:
+        user_id = conn.execute(select(User.id).where(User.username == "testuser")).scalar_one()
+        conn.execute(insert(Transaction), [
+            # Dimanche 7 janvier 2024 : semaine du lundi 1er janvier
+            {"title": "Salaire", "amount": 3000.0, "category": "income", "date": datetime(2024, 1, 7, 9), "user_id": user_id},
+            {"title": "Loyer", "amount": 900.0, "category": "expense", "date": datetime(2024, 1, 7, 18), "user_id": user_id},
+            {"title": "Courses", "amount": 100.0, "category": "expense", "date": datetime(2024, 1, 8, 12), "user_id": user_id},
+            {"title": "Prime", "amount": 500.0, "category": "income", "date": datetime(2024, 2, 29, 23, 59), "user_id": user_id},
+        ])
+    # Import hors API : les totaux mensuels sont reconstruits
+    db = SessionLocal()
+    try:
+        rollups.rebuild_rollups(db)
+    finally:
+        db.close()
+
+    response = client.get("/api/transactions/stats/timeseries", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"period": "2024-01-01", "income": 3000.0, "expense": 1000.0, "net": 2000.0, "count": 3, "categories": None},
+        {"period": "2024-02-01", "income": 500.0, "expense": 0.0, "net": 500.0, "count": 1, "categories": None},
+    ]
+
+    weeks = client.get("/api/transactions/stats/timeseries?bucket=week", headers=headers).json()
+    assert [(point["period"], point["count"]) for point in weeks] == [
+        ("2024-01-01", 2), ("2024-01-08", 1), ("2024-02-26", 1)
+    ]
+
+    days = client.get(
+        "/api/transactions/stats/timeseries?bucket=day&by_category=true"
+        "&from=2024-01-07T00:00:00&to=2024-02-01T00:00:00",
+        headers=headers
+    ).json()
+    assert [point["period"] for point in days] == ["2024-01-07", "2024-01-08"]
+    assert days[0]["categories"] == {
+        "income": {"total": 3000.0, "count": 1},
+        "expense": {"total": 900.0, "count": 1},
+    }
+
+    response = client.get("/api/transactions/stats/timeseries?bucket=year", headers=headers)
+    assert response.status_code == 422
+
+
+def test_monthly_rollups_follow_writes_and_serve_closed_months(capsys):
+    """Test des totaux mensuels : deltas à chaque écriture, mois clos lus sans parcourir les transactions"""
+    from datetime import datetime, timezone
+    from app import rollups
+    from app.database import SessionLocal
+    from app.models import MonthlyRollup, Transaction, User
+    from sqlalchemy import insert, select
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    created = client.post("/api/transactions/", json={"title": "Salaire", "amount": 2000.0, "category": "income"},
+                          headers=headers).json()
+    client.post("/api/transactions/", json={"title": "Loyer", "amount": 800.0, "category": "expense"}, headers=headers)
+    client.post("/api/transactions/bulk", json=[
+        {"title": "Courses", "amount": 50.0, "category": "expense"},
+        {"title": "Remboursement", "amount": 30.0, "category": "income"},
+    ], headers=headers)
+    client.put(f"/api/transactions/{created['id']}", json={"amount": 2500.0}, headers=headers)
+    to_delete = client.post("/api/transactions/", json={"title": "Erreur", "amount": 99.0, "category": "expense"},
+                            headers=headers).json()
+    client.delete(f"/api/transactions/{to_delete['id']}", headers=headers)
+
+    current_month = datetime.now(timezone.utc).strftime("%Y-%m")
+    with engine.connect() as conn:
+        stored = {
+            category: (total, count)
+            for category, total, count in conn.execute(
+                select(MonthlyRollup.category, MonthlyRollup.total, MonthlyRollup.count)
+                .where(MonthlyRollup.year_month == current_month)
+            )
+        }
+        user_id = conn.execute(select(User.id).where(User.username == "testuser")).scalar_one()
+    assert stored == {"income": (2530.0, 2), "expense": (850.0, 2)}
+
+    db = SessionLocal()
+    try:
+        assert rollups.rebuild_rollups(db, fix=False) == []
+    finally:
+        db.close()
+
+    # Mois clos : lus dans monthly_rollups, la table transactions n'est parcourue que pour le mois courant
+    with engine.begin() as conn:
+        conn.execute(insert(Transaction), [
+            {"title": "Ancien", "amount": 10.0, "category": "income", "date": datetime(2023, 5, 2), "user_id": user_id}
+            for _ in range(3)
+        ])
+    assert rollups.main(["verify"]) == 1
+    assert "2023-05 income" in capsys.readouterr().out
+    assert rollups.main(["rebuild"]) == 0
+    assert rollups.main(["verify"]) == 0
+
+    with count_queries() as statements:
+        series = client.get("/api/transactions/stats/timeseries", headers=headers).json()
+    assert [(point["period"], point["income"], point["count"]) for point in series] == [
+        ("2023-05-01", 30.0, 3), (f"{current_month}-01", 2530.0, 4)
+    ]
+    live = [statement for statement in statements if "FROM transactions" in statement]
+    assert len(live) == 1 and "transactions.date >=" in live[0]
+
+
+def test_read_endpoints_answer_if_none_match_with_304():
+    """Test des ETags : 304 sans requête sur les transactions tant qu'aucune écriture n'a eu lieu"""
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post("/api/transactions/", json={"title": "Salaire", "amount": 100.0, "category": "income"},
+                          headers=headers).json()
+
+    for url in ("/api/transactions/", f"/api/transactions/{created['id']}", "/api/transactions/stats/summary"):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert response.headers["last-modified"].endswith("GMT")
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        with count_queries() as statements:
+            response = client.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        # Lecture de users.data_version par clé primaire, rien d'autre
+        assert len(statements) == 1 and "FROM users" in statements[0]
+
+    etag = client.get("/api/transactions/stats/summary", headers=headers).headers["etag"]
+    client.put(f"/api/transactions/{created['id']}", json={"title": "Salaire net"}, headers=headers)
+    response = client.get("/api/transactions/stats/summary", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    # Les ETags sont propres à chaque utilisateur
+    other = get_token(username="otheruser", email="other@example.com")
+    response = client.get("/api/transactions/stats/summary",
+                          headers={"Authorization": f"Bearer {other}", "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 200
+
+
+def test_response_cache_serves_repeat_reads_and_is_invalidated_by_writes(monkeypatch):
+    """Test du cache des réponses : hit sans requête sur les transactions, invalidation à l'écriture"""
+    from app.response_cache import response_cache
+    from app.routers import admin
+
+    monkeypatch.setattr(admin, "ADMIN_API_KEY", "secret")
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(3):
+        client.post("/api/transactions/", json={"title": f"T{i}", "amount": 10.0, "category": "income"},
+                    headers=headers)
+
+    first = client.get("/api/transactions/?limit=2", headers=headers)
+    with count_queries() as statements:
+        second = client.get("/api/transactions/?limit=2", headers=headers)
+        summary = client.get("/api/transactions/stats/summary", headers=headers)
+        cached_summary = client.get("/api/transactions/stats/summary", headers=headers)
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+    assert second.headers["etag"] == first.headers["etag"]
+    assert cached_summary.json() == summary.json() == {
+        "total_income": 30.0, "total_expense": 0.0, "balance": 30.0, "transaction_count": 3
+    }
+    # Deux lectures depuis le cache : seule data_version est lue pour elles
+    assert sum("FROM transactions" in statement or "FROM user_balances" in statement
+               for statement in statements) == 1
+
+    # Une écriture invalide les entrées de l'utilisateur
+    assert response_cache.backend.stats()["size"] == 2
+    client.post("/api/transactions/", json={"title": "T3", "amount": 5.0, "category": "expense"}, headers=headers)
+    assert response_cache.backend.stats()["size"] == 0
+    assert client.get("/api/transactions/stats/summary", headers=headers).json()["balance"] == 25.0
+
+    stats = client.get("/api/admin/stats/response-cache", headers={"X-Admin-Key": "secret"}).json()
+    assert stats["backend"] == "memory"
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert 0 < stats["memory_bytes"] <= stats["max_bytes"]
+
+
+def test_cache_backends_bound_memory_and_invalidate_by_prefix():
+    """Test des backends : limite en octets en mémoire, backend compatible Redis avec un client local"""
+    import fnmatch
+    from app.cache import CacheBackend, MemoryCacheBackend, RedisCacheBackend
+    from app.response_cache import ResponseCache
+
+    # Backend incomplet : refusé à l'instanciation, pas au premier appel
+    class Incomplete(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+    memory = MemoryCacheBackend(maxsize=100, ttl=60, max_bytes=25)
+    memory.set("a", b"x" * 10, ttl=60)
+    memory.set("b", b"x" * 10, ttl=60)
+    memory.set("c", b"x" * 10, ttl=60)
+    assert memory.get("a") is None
+    assert memory.stats()["memory_bytes"] == 20
+    memory.set("big", b"x" * 30, ttl=60)
+    assert memory.get("big") is None
+
+    class LocalRedis:
+        """Sous-ensemble des commandes Redis utilisées par le backend"""
+
+        def __init__(self):
+            self.data = {}
+
+        def get(self, name):
+            return self.data.get(name)
+
+        def set(self, name, value, px=None):
+            self.data[name] = value
+
+        def scan_iter(self, match):
+            return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+        def delete(self, *names):
+            return sum(self.data.pop(name, None) is not None for name in names)
+
+        def info(self, section):
+            return {"used_memory": sum(len(value) for value in self.data.values())}
+
+    server = LocalRedis()
+    cache = ResponseCache(RedisCacheBackend(server), ttl=60)
+    cache.set(cache.key(1, 3, "list", {"limit": 10, "category": None}), b"[]", "cursor")
+    cache.set(cache.key(1, 3, "summary"), b"{}")
+    cache.set(cache.key(12, 1, "summary"), b"{}")
+    assert cache.get(cache.key(1, 3, "list", {"limit": 10})) == (b"[]", "cursor")
+    assert cache.get(cache.key(1, 3, "summary")) == (b"{}", None)
+    assert cache.get(cache.key(1, 4, "summary")) is None
+
+    # Le préfixe de l'utilisateur 1 ne doit pas toucher l'utilisateur 12
+    assert cache.invalidate_user(1) == 2
+    assert list(server.data) == ["budget:resp:12:1:summary?"]
+    stats = cache.stats()
+    assert stats["backend"] == "redis"
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["memory_bytes"] == 3
+
+
+def test_fast_transaction_serialization_matches_response_model():
+    """Test du chemin rapide : même JSON que TransactionResponse, lignes invalides refusées"""
+    import json
+    from datetime import datetime
+    from typing import List
+    from pydantic import TypeAdapter, ValidationError
+    from app.schemas import TransactionResponse
+    from app.serialization import dump_transactions
+
+    rows = [
+        {"id": 1, "title": "Salaire", "amount": 3000.0, "category": "income", "description": None,
+         "date": datetime(2024, 1, 7, 9, 30, 0, 125000), "user_id": 1},
+        {"id": 2, "title": "Café ☕", "amount": 2.5, "category": "expense", "description": "Terrasse",
+         "date": datetime(2024, 1, 8), "user_id": 1},
+    ]
+    adapter = TypeAdapter(List[TransactionResponse])
+    assert json.loads(dump_transactions(rows)) == json.loads(adapter.dump_json(adapter.validate_python(rows)))
+
+    with pytest.raises(ValidationError):
+        dump_transactions([{**rows[0], "amount": "beaucoup"}])
+
+
+def test_read_layer_returns_records_without_loading_entities():
+    """Test de la couche de lecture : enregistrements légers, identity map vide"""
+    from app import reads
+    from app.database import ReadSessionLocal
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post("/api/transactions/", json={"title": "Salaire", "amount": 100.0, "category": "income"},
+                          headers=headers).json()
+
+    db = ReadSessionLocal()
+    try:
+        transactions, _ = reads.list_transactions(db, created["user_id"])
+        transaction = reads.get_transaction(db, created["user_id"], created["id"])
+        summary = reads.get_summary(db, created["user_id"])
+        assert len(db.identity_map) == 0
+    finally:
+        db.close()
+
+    assert transactions == [transaction]
+    assert isinstance(transaction, reads.TransactionRecord)
+    assert not hasattr(transaction, "__dict__")
+    assert (transaction.title, transaction.amount) == ("Salaire", 100.0)
+    assert summary["balance"] == 100.0
+
+
+# Nombre de requêtes SQL par endpoint (authentification en cache) : une
+# hausse signale une régression (N+1, rechargement après écriture...)
+STATEMENT_BUDGET = {
+    "POST /": 4,             # INSERT ... RETURNING, solde, totaux mensuels, data_version
+    "PUT /{id} titre": 2,    # UPDATE ... RETURNING, data_version
+    "PUT /{id} montant": 5,  # ancienne ligne (deltas), UPDATE ... RETURNING, solde, totaux, data_version
+    "PUT /{id} absent": 1,
+    "GET /": 2,              # data_version (ETag), page
+    "GET /{id}": 2,
+    "GET /stats/summary": 2,
+    "DELETE /{id}": 4,       # DELETE ... RETURNING, solde, totaux, data_version
+    "DELETE /{id} absent": 1,
+}
+
+
+def test_statement_counts_per_endpoint():
+    """Test du nombre de requêtes SQL exécutées par chaque endpoint"""
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    # Met l'utilisateur authentifié en cache avant de compter
+    client.post("/api/transactions/", json={"title": "Salaire", "amount": 100.0, "category": "income"},
+                headers=headers)
+
+    counts = {}
+
+    def measure(name, method, url, expected_status, **kwargs):
+        with count_queries() as statements:
+            response = client.request(method, url, headers=headers, **kwargs)
+        assert response.status_code == expected_status, name
+        counts[name] = len(statements)
+        return response
+
+    created = measure("POST /", "POST", "/api/transactions/", 201,
+                      json={"title": "Courses", "amount": 40.0, "category": "expense"}).json()
+    url = f"/api/transactions/{created['id']}"
+    assert measure("PUT /{id} titre", "PUT", url, 200, json={"title": "Marché"}).json()["title"] == "Marché"
+    assert measure("PUT /{id} montant", "PUT", url, 200, json={"amount": 45.0}).json()["amount"] == 45.0
+    measure("PUT /{id} absent", "PUT", "/api/transactions/999", 404, json={"title": "X"})
+    measure("GET /", "GET", "/api/transactions/", 200)
+    measure("GET /{id}", "GET", url, 200)
+    assert measure("GET /stats/summary", "GET", "/api/transactions/stats/summary", 200).json()["balance"] == 55.0
+    measure("DELETE /{id}", "DELETE", url, 204)
+    measure("DELETE /{id} absent", "DELETE", url, 404)
+
+    assert counts == STATEMENT_BUDGET
+
+
+def test_write_paths_without_returning_support(monkeypatch):
+    """Test des écritures sur un dialecte sans RETURNING (MySQL) : mêmes résultats"""
+    from app import crud
+
+    for capability in ("insert_returning", "update_returning", "delete_returning"):
+        monkeypatch.setattr(engine.dialect, capability, False)
+    # Colonnes DateTime à la seconde, comme MySQL
+    monkeypatch.setattr(crud, "SECOND_PRECISION_DIALECTS", (engine.dialect.name,))
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    with count_queries() as statements:
+        response = client.post("/api/transactions/", json={"title": "Courses", "amount": 40.0, "category": "expense"},
+                               headers=headers)
+    assert response.status_code == 201
+    assert not any("RETURNING" in statement for statement in statements)
+    created = response.json()
+    assert created["date"] and "." not in created["date"] and created["user_id"] == 1
+
+    url = f"/api/transactions/{created['id']}"
+    assert client.get(url, headers=headers).json() == created
+
+    updated = client.put(url, json={"title": "Marché", "category": "income"}, headers=headers).json()
+    assert {**created, "title": "Marché", "category": "income"} == updated
+    assert client.put("/api/transactions/999", json={"title": "X"}, headers=headers).status_code == 404
+
+    summary = client.get("/api/transactions/stats/summary", headers=headers).json()
+    assert (summary["total_income"], summary["total_expense"]) == (40.0, 0.0)
+
+    assert client.delete(url, headers=headers).status_code == 204
+    assert client.delete(url, headers=headers).status_code == 404
+    summary = client.get("/api/transactions/stats/summary", headers=headers).json()
+    assert (summary["balance"], summary["transaction_count"]) == (0.0, 0)
+
+
+def test_batch_update_and_delete_keep_aggregates_in_sync():
+    """Test des opérations par lot : UPDATE/DELETE ensemblistes, solde et totaux mensuels à jour"""
+    from datetime import datetime
+    from app import ledger, rollups
+    from app.database import SessionLocal
+    from app.models import Transaction
+    from sqlalchemy import insert
+
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = [
+        client.post("/api/transactions/", json={"title": title, "amount": amount, "category": category},
+                    headers=headers).json()["id"]
+        for title, amount, category in [
+            ("Salaire", 2000.0, "income"), ("Courses", 50.0, "expense"),
+            ("Cinéma", 12.0, "expense"), ("Loyer", 800.0, "expense"),
+        ]
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Transaction), [
+            {"title": "Ancien", "amount": 5.0, "category": "expense", "date": datetime(2023, 5, 2), "user_id": 1}
+            for _ in range(3)
+        ])
+    db = SessionLocal()
+    try:
+        rollups.rebuild_rollups(db)
+        ledger.rebuild_balances(db)
+    finally:
+        db.close()
+
+    # Les transactions d'un autre utilisateur ne sont jamais touchées
+    other_headers = {"Authorization": f"Bearer {get_token('other', 'other@example.com')}"}
+    other = client.post("/api/transactions/", json={"title": "Autre", "amount": 1.0, "category": "expense"},
+                        headers=other_headers).json()
+
+    with count_queries() as statements:
+        response = client.patch("/api/transactions/batch", json={
+            "ids": [ids[1], ids[2], other["id"]], "changes": {"category": "income", "amount": 20.0}
+        }, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"affected": 2}
+    assert sum(statement.lstrip().startswith("UPDATE transactions") for statement in statements) == 1
+
+    response = client.patch("/api/transactions/batch", json={
+        "category": "expense", "date_to": "2024-01-01T00:00:00", "changes": {"title": "Archivé"}
+    }, headers=headers)
+    assert response.json() == {"affected": 3}
+    # Bornes avec fuseau : comparées en UTC (2023-05-01 23:00 <= 2023-05-02 00:00 < 01:00)
+    response = client.patch("/api/transactions/batch", json={
+        "date_from": "2023-05-02T01:00:00+02:00", "date_to": "2023-05-02T03:00:00+02:00",
+        "changes": {"description": "Mai"}
+    }, headers=headers)
+    assert response.json() == {"affected": 3}
+
+    summary = client.get("/api/transactions/stats/summary", headers=headers).json()
+    assert (summary["total_income"], summary["total_expense"], summary["transaction_count"]) == (2040.0, 815.0, 7)
+
+    response = client.request("DELETE", "/api/transactions/batch", json={"category": "expense"}, headers=headers)
+    assert response.json() == {"affected": 4}
+    transactions = client.get("/api/transactions/", headers=headers).json()
+    assert sorted(transaction["id"] for transaction in transactions) == sorted(ids[:3])
+    assert client.get("/api/transactions/", headers=other_headers).json()[0]["category"] == "expense"
+
+    db = SessionLocal()
+    try:
+        assert rollups.rebuild_rollups(db, fix=False) == []
+        assert ledger.rebuild_balances(db, fix=False) == []
+    finally:
+        db.close()
+
+    # null pour un champ obligatoire : refusé avant toute écriture
+    for changes in ({"amount": None}, {"title": None}, {"category": None}):
+        assert client.patch("/api/transactions/batch", json={"ids": ids, "changes": changes},
+                            headers=headers).status_code == 422
+
+    # Sans critère, sans changement ou avec une catégorie invalide : rien n'est modifié
+    for body in ({"changes": {"title": "Tout"}}, {"ids": ids, "changes": {}},
+                 {"ids": ids, "changes": {"category": "autre"}}):
+        assert client.patch("/api/transactions/batch", json=body, headers=headers).status_code == 400
+    assert client.request("DELETE", "/api/transactions/batch", json={}, headers=headers).status_code == 400
+    assert client.request("DELETE", "/api/transactions/batch", json={"ids": list(range(1001))},
+                          headers=headers).status_code == 422
+    assert client.request("DELETE", "/api/transactions/batch", json={"ids": [999]},
+                          headers=headers).json() == {"affected": 0}
+
+
+def test_search_ranks_matches_with_fts5_and_token_index(monkeypatch):
+    """Test de la recherche plein texte : index FTS5, puis table transaction_tokens (repli)"""
+    from app import search
+
+    for index in ("auto", "tokens"):
+        monkeypatch.setattr(search, "SEARCH_INDEX", index)
+        headers = {"Authorization": f"Bearer {get_token(index, f'{index}@example.com')}"}
+        ids = {}
+        for title, description in [
+            ("Carrefour Market", "Courses de la semaine"),
+            ("Essence", "Station Carrefour"),
+            ("Café", "Terrasse, carrefour des Lilas"),
+            ("Loyer", None),
+        ]:
+            ids[title] = client.post("/api/transactions/", json={
+                "title": title, "amount": 10.0, "category": "expense", "description": description
+            }, headers=headers).json()["id"]
+        client.post("/api/transactions/bulk", json=[
+            {"title": "Carrefour City", "amount": 5.0, "category": "expense"}
+        ], headers=headers)
+
+        def titles(q, **params):
+            response = client.get("/api/transactions/search", params={"q": q, **params}, headers=headers)
+            assert response.status_code == 200
+            return [transaction["title"] for transaction in response.json()]
+
+        with count_queries() as statements:
+            found = titles("carre")
+        assert sorted(found) == ["Café", "Carrefour City", "Carrefour Market", "Essence"]
+        assert any(("MATCH" if index == "auto" else "transaction_tokens") in statement for statement in statements)
+        assert titles("carrefour market") == ["Carrefour Market"]
+        assert titles("CAFE") == titles("café") == ["Café"]
+        assert len(titles("carrefour", limit=2)) == 2 and len(titles("carrefour", skip=3)) == 1
+        assert titles("inconnu") == [] and titles("%!") == []
+
+        # L'index suit les modifications et les suppressions
+        client.put(f"/api/transactions/{ids['Loyer']}", json={"description": "Appartement rue Carrefour"},
+                   headers=headers)
+        client.delete(f"/api/transactions/{ids['Essence']}", headers=headers)
+        client.patch("/api/transactions/batch", json={"ids": [ids["Café"]], "changes": {"title": "Bistrot"}},
+                     headers=headers)
+        assert sorted(titles("carrefour")) == ["Bistrot", "Carrefour City", "Carrefour Market", "Loyer"]
+        assert titles("cafe") == []
+
+    # Chaque utilisateur ne voit que ses transactions
+    assert client.get("/api/transactions/search", params={"q": "market"}, headers=headers).json()[0]["user_id"] == 2
+    assert client.get("/api/transactions/search", headers=headers).status_code == 422
+
+    # Lot filtré sur un champ modifié (index 'tokens') : les lignes sont réindexées malgré leur sortie du filtre
+    headers = {"Authorization": f"Bearer {get_token('lot', 'lot@example.com')}"}
+    client.post("/api/transactions/", json={"title": "Carrefour", "amount": 3.0, "category": "income"},
+                headers=headers)
+    assert client.patch("/api/transactions/batch", json={
+        "category": "income", "changes": {"category": "expense", "title": "Monoprix"}
+    }, headers=headers).json() == {"affected": 1}
+    for q, expected in (("carrefour", []), ("monoprix", ["Monoprix"])):
+        found = client.get("/api/transactions/search", params={"q": q}, headers=headers).json()
+        assert [transaction["title"] for transaction in found] == expected
+
+
+def test_metrics_endpoint_reports_routes_statements_and_server_timing(monkeypatch):
+    """GET /metrics : latence, statut et requêtes SQL par modèle de route ; Server-Timing optionnel"""
+    from app import instrumentation
+
+    instrumentation.route_metrics.reset()
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    with count_queries() as statements:
+        created = client.post("/api/transactions/", json={"title": "a", "amount": 1.0, "category": "income"},
+                              headers=headers).json()
+    client.get(f"/api/transactions/{created['id']}", headers=headers)
+    client.get("/api/transactions/999", headers=headers)
+    client.get("/inexistant")
+    assert "server-timing" not in client.get("/api/transactions/", headers=headers).headers
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    route = '{method="GET",route="/api/transactions/{transaction_id}"'
+    assert 'budget_http_requests_total{method="GET",route="/api/transactions/{transaction_id}",status="200"} 1' in body
+    assert 'budget_http_requests_total{method="GET",route="/api/transactions/{transaction_id}",status="404"} 1' in body
+    assert 'budget_http_requests_total{method="GET",route="unmatched",status="404"} 1' in body
+    assert f"budget_http_request_duration_seconds_count{route}}} 2" in body
+    assert f'budget_db_statements_sum{{method="POST",route="/api/transactions/"}} {float(len(statements))}' in body
+    assert f'budget_db_statements_bucket{route},le="+Inf"}} 2' in body
+    # La requête /metrics elle-même est en cours
+    assert "budget_http_requests_in_flight 1" in body
+
+    monkeypatch.setattr(instrumentation, "SERVER_TIMING", True)
+    timing = client.get("/api/transactions/", headers=headers).headers["server-timing"]
+    phases = dict(part.split(";", 1) for part in timing.split(", "))
+    assert set(phases) == {"auth", "db", "serialization", "app"}
+    # Liste servie par le cache de réponses : seule la version des données est lue
+    assert phases["db"].endswith('desc="1 SQL"')
+
+
+def test_slow_query_log_captures_route_user_and_explain(monkeypatch, caplog):
+    """Test du journal des requêtes lentes : origine, paramètres masqués, EXPLAIN et route d'administration"""
+    from app.routers import admin
+    from app.slow_queries import slow_query_log
+
+    monkeypatch.setattr(admin, "ADMIN_API_KEY", "admin-secret")
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    client.post("/api/transactions/", json={"title": "Salaire secret", "amount": 1234.5, "category": "income"},
+                headers=headers)
+
+    slow_query_log.clear()
+    monkeypatch.setattr(slow_query_log, "threshold", 0.0)
+    monkeypatch.setattr(slow_query_log, "explain", True)
+    with caplog.at_level("WARNING", logger="app.database"):
+        client.get("/api/transactions/", params={"category": "income"}, headers=headers)
+    monkeypatch.setattr(slow_query_log, "threshold", None)
+    assert "Requête SQL lente" in caplog.text
+    assert "Salaire" not in caplog.text and "income" not in caplog.text
+
+    response = client.get("/api/admin/stats/slow-queries", headers={"X-Admin-Key": "admin-secret"})
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["total"] == len(stats["queries"]) > 0
+    durations = [query["duration_ms"] for query in stats["queries"]]
+    assert durations == sorted(durations, reverse=True)
+
+    listing = next(query for query in stats["queries"] if "FROM transactions" in query["statement"]
+                   and "ORDER BY" in query["statement"])
+    assert listing["method"] == "GET" and listing["route"] == "/api/transactions/"
+    assert listing["user_id"] == 1
+    assert "income" not in str(listing["parameters"]) and "str" in str(listing["parameters"])
+    assert any("ix_transactions" in step for step in listing["explain"])
+
+    limited = client.get("/api/admin/stats/slow-queries", params={"limit": 1},
+                         headers={"X-Admin-Key": "admin-secret"}).json()
+    assert limited["queries"] == stats["queries"][:1]
+    assert client.get("/api/admin/stats/slow-queries").status_code == 403
+
+
+def test_import_is_lazy_and_lifespan_initializes_schema(monkeypatch):
+    """L'import ne crée ni engine ni contexte bcrypt ; le lifespan applique DB_INIT et libère les ressources"""
+    import subprocess
+    import sys
+    from sqlalchemy import inspect
+    from app import database, hashing
+
+    check = (
+        "import app.main, app.database, app.hashing; "
+        "assert app.database.get_engine_if_created() is None; "
+        "assert app.hashing._pwd_context is None"
+    )
+    subprocess.run([sys.executable, "-c", check], check=True)
+
+    with pytest.raises(ValueError):
+        database.init_db("drop")
+
+    Base.metadata.drop_all(bind=engine)
+    monkeypatch.setattr(database, "DB_INIT", "create")
+    shutdowns = []
+    monkeypatch.setattr(hashing.password_hasher, "shutdown", lambda: shutdowns.append(True))
+    with TestClient(app) as started:
+        assert {"users", "transactions", "transactions_fts"} <= set(inspect(engine).get_table_names())
+        assert started.get("/health").status_code == 200
+    assert shutdowns == [True]
+
+
+def test_reads_go_to_replica_except_after_own_writes_and_fall_back_when_down(monkeypatch, tmp_path):
+    """Réplica local (second fichier SQLite) : lecture de ses écritures, répartition et repli sur le primaire"""
+    import sqlite3
+    from sqlalchemy import text
+    from app.database import DB_ASYNC, replica_router
+    from app.replicas import PIN_COOKIE, Replica
+    from app.response_cache import response_cache
+    from app.routers import admin
+
+    if engine.dialect.name != "sqlite" or not engine.url.database:
+        pytest.skip("Réplication simulée par copie de fichier SQLite")
+    if DB_ASYNC:
+        pytest.skip("Les routes asynchrones lisent sur le primaire")
+
+    def replicate():
+        with sqlite3.connect(engine.url.database) as primary, sqlite3.connect(tmp_path / "replica.db") as replica:
+            primary.backup(replica)
+
+    def titles():
+        response_cache.clear()
+        response = client.get("/api/transactions/", headers=headers)
+        assert response.status_code == 200
+        return sorted(transaction["title"] for transaction in response.json())
+
+    monkeypatch.setattr(admin, "ADMIN_API_KEY", "admin-secret")
+    monkeypatch.setattr(replica_router, "replicas", [Replica(f"sqlite:///{tmp_path / 'replica.db'}")])
+    monkeypatch.setattr(replica_router, "_pins", {})
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    client.post("/api/transactions/", json={"title": "Avant", "amount": 1.0, "category": "income"}, headers=headers)
+    replicate()
+    client.post("/api/transactions/", json={"title": "Après", "amount": 2.0, "category": "income"}, headers=headers)
+
+    # Juste après son écriture, l'utilisateur lit sur le primaire
+    assert titles() == ["Après", "Avant"]
+    # Autre processus (épinglages en mémoire absents) : le cookie signé garde la lecture sur le primaire
+    replica_router._pins.clear()
+    pin = client.cookies.get(PIN_COOKIE)
+    assert pin is not None
+    assert titles() == ["Après", "Avant"]
+    # Cookie altéré, puis épinglage expiré : lecture sur le réplica, en retard d'une écriture
+    user_id, until, signature = pin.split(".")
+    client.cookies.set(PIN_COOKIE, f"{int(user_id) + 1}.{until}.{signature}")
+    assert titles() == ["Avant"]
+    client.cookies.delete(PIN_COOKIE)
+    assert titles() == ["Avant"]
+    replicate()
+    assert titles() == ["Après", "Avant"]
+
+    # Solde absent (utilisateur antérieur à la table) : le résumé lu sur le réplica n'écrit rien
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM user_balances"))
+    replicate()
+    response_cache.clear()
+    summary = client.get("/api/transactions/stats/summary", headers=headers).json()
+    assert summary["total_income"] == 3.0 and summary["transaction_count"] == 2
+    for path in (engine.url.database, tmp_path / "replica.db"):
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM user_balances").fetchone()[0] == 0
+
+    stats = client.get("/api/admin/stats/db-replicas", headers={"X-Admin-Key": "admin-secret"}).json()
+    assert stats["pinned_reads"] >= 1 and stats["replicas"][0]["reads"] >= 2
+    assert stats["replicas"][0]["healthy"] is True
+    replica_router.dispose()
+
+    # Réplica injoignable : écarté à la vérification, lectures servies par le primaire
+    monkeypatch.setattr(replica_router, "replicas", [Replica(f"sqlite:///{tmp_path / 'absent' / 'replica.db'}")])
+    fallbacks = replica_router.fallback_reads
+    assert titles() == ["Après", "Avant"]
+    assert replica_router.fallback_reads > fallbacks
+    stats = client.get("/api/admin/stats/db-replicas", headers={"X-Admin-Key": "admin-secret"}).json()
+    assert stats["replicas"][0]["healthy"] is False and stats["replicas"][0]["last_error"]